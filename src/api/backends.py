@@ -0,0 +1,232 @@
+"""
+API token backends, picked with the `API_TOKEN_BACKEND` setting:
+
+    ModelTokenBackend     a row of `API_TOKEN_MODEL` per user (default)
+    SignedTokenBackend    self contained HMAC signed tokens, no table
+
+TokenAuthentication, the login and the logout serializers only talk to
+`get_token_backend()`.
+"""
+
+from __future__ import annotations
+
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.dispatch import receiver
+from django.contrib.auth import get_user_model
+from django.test.signals import setting_changed
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+
+from .models import get_token_model
+from .cache import (
+    cache_token,
+    get_cached_token,
+    acache_token,
+    aget_cached_token,
+    get_cached_user,
+    deny_token,
+    is_token_denied,
+)
+
+
+__all__ = [
+    "BaseTokenBackend",
+    "ModelTokenBackend",
+    "SignedToken",
+    "SignedTokenBackend",
+    "get_token_backend",
+]
+
+
+class BaseTokenBackend:
+
+    def issue(self, user: Any) -> str:
+        """A token key for `user`"""
+        raise NotImplementedError
+
+    def authenticate(self, key: str) -> tuple[Any, Any]:
+        """(user, token) for `key`, AuthenticationFailed otherwise"""
+        raise NotImplementedError
+
+    async def aauthenticate(self, key: str) -> tuple[Any, Any]:
+        """`authenticate()` for async views"""
+        return await sync_to_async(self.authenticate)(key)
+
+    def revoke(self, key: str) -> bool:
+        """Log `key` out, False when it isn't a valid token"""
+        raise NotImplementedError
+
+    def check(self, user: Any, token: Any) -> None:
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        if hasattr(token, "is_expired") and token.is_expired():
+            raise exceptions.AuthenticationFailed(_("Token expired."))
+
+
+class ModelTokenBackend(BaseTokenBackend):
+    """
+    Tokens stored in `API_TOKEN_MODEL`, resolved through api.cache.
+    """
+
+    @property
+    def model(self):
+        return get_token_model()
+
+    def issue(self, user: Any) -> str:
+        obj, _ = self.model.objects.get_or_create(user=user)
+        return obj.key
+
+    def authenticate(self, key: str) -> tuple[Any, Any]:
+
+        if (cached := get_cached_token(key)) is not None:
+            user, token = cached
+        else:
+            model = self.model
+            try:
+                token = model.objects.select_related("user").get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            user = token.user
+
+        self.check(user, token)
+
+        if cached is None:
+            cache_token(token)
+        return (user, token)
+
+    async def aauthenticate(self, key: str) -> tuple[Any, Any]:
+
+        if (cached := await aget_cached_token(key)) is not None:
+            user, token = cached
+        else:
+            model = self.model
+            try:
+                token = await model.objects.select_related("user").aget(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            user = token.user
+
+        self.check(user, token)
+
+        if cached is None:
+            await acache_token(token)
+        return (user, token)
+
+    def revoke(self, key: str) -> bool:
+
+        try:
+            obj = self.model.objects.get(key=key)
+        except self.model.DoesNotExist:
+            return False
+        obj.delete()
+        return True
+
+
+@dataclass(frozen=True, slots=True)
+class SignedToken:
+
+    key: str
+    user_id: Any
+    token_id: str
+    expired_at: datetime
+
+    def __str__(self) -> str:
+        return self.key
+
+    def is_expired(self) -> bool:
+        return timezone.now() >= self.expired_at
+
+
+class SignedTokenBackend(BaseTokenBackend):
+    """
+    The key is `django.core.signing` output over the user id, the expiry
+    and a random token id, signed with SECRET_KEY:
+
+        eyJ1IjoxLCJlIjoxNzYwMDAwMDAwLCJqIjoiLi4uIn0:<signature>
+
+    Checking one is CPU work, the user comes from api.cache. Logging out
+    puts the token id on the denylist until the token expires.
+    """
+
+    salt = "api.backends.SignedTokenBackend"
+
+    def issue(self, user: Any) -> str:
+
+        expired_at = timezone.now() + settings.API_TOKEN_EXPIRE_TIME
+        payload = {
+            "u": user.pk,
+            "e": int(expired_at.timestamp()),
+            "j": secrets.token_urlsafe(12),
+        }
+        return signing.dumps(payload, salt=self.salt)
+
+    def loads(self, key: str) -> Optional[SignedToken]:
+
+        try:
+            payload = signing.loads(key, salt=self.salt)
+            return SignedToken(
+                key=key,
+                user_id=payload["u"],
+                token_id=payload["j"],
+                expired_at=datetime.fromtimestamp(payload["e"], tz=dt_timezone.utc),
+            )
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return None
+
+    def authenticate(self, key: str) -> tuple[Any, SignedToken]:
+
+        token = self.loads(key)
+        if token is None or is_token_denied(token.token_id):
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+        if token.is_expired():
+            raise exceptions.AuthenticationFailed(_("Token expired."))
+
+        user = get_cached_user(token.user_id, get_user_model()._default_manager)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        self.check(user, token)
+        return (user, token)
+
+    def revoke(self, key: str) -> bool:
+
+        token = self.loads(key)
+        if token is None or token.is_expired() or is_token_denied(token.token_id):
+            return False
+        deny_token(token.token_id, (token.expired_at - timezone.now()).total_seconds())
+        return True
+
+
+_backend: Optional[BaseTokenBackend] = None
+
+
+def get_token_backend() -> BaseTokenBackend:
+
+    global _backend
+
+    if _backend is None:
+        backend = getattr(
+            settings, "API_TOKEN_BACKEND", "api.backends.ModelTokenBackend"
+        )
+        _backend = import_string(backend)()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_token_backend(*, setting: str, **kwargs: Any) -> None:
+    global _backend
+
+    if setting == "API_TOKEN_BACKEND":
+        _backend = None
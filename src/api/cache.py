@@ -0,0 +1,278 @@
+"""
+Cache of resolved API tokens (api.backends).
+
+The `(user, token)` pair is kept in two tiers, keyed by a digest of the
+token key so raw keys never reach the cache:
+
+    local     bounded LRU in the process, short lived
+    shared    the django cache `API_TOKEN_CACHE_ALIAS`, optional (Redis)
+
+No entry outlives the token's `expired_at`. Deleting a token or saving
+its user drops both tiers (see the receivers in api.models). Other
+processes may keep their local copy for up to
+`API_TOKEN_LOCAL_CACHE_TIMEOUT` seconds. That bound only holds when the
+shared tier is shared between processes, api.checks refuses a LocMem
+alias, which would keep a revoked token for `API_TOKEN_CACHE_TIMEOUT`.
+
+`QuerySet.update()` skips the receivers: after
+`users.update(is_active=False)` call `invalidate_user` (and
+`invalidate_token` for their keys) for the rows it touched.
+
+Signed tokens carry no row, only the user is cached (`get_cached_user`)
+and revoked ones go to the denylist (`deny_token`), which lives in the
+cache `API_TOKEN_DENYLIST_ALIAS` and must be shared between processes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils import timezone
+
+from helpers.metrics import cache_seconds, token_cache
+
+
+__all__ = [
+    "LRUCache",
+    "get_cached_token",
+    "cache_token",
+    "invalidate_token",
+    "aget_cached_token",
+    "acache_token",
+    "get_cached_user",
+    "invalidate_user",
+    "deny_token",
+    "is_token_denied",
+]
+
+KEY = "api_token:%s"
+USER_KEY = "api_token_user:%s"
+DENYLIST_KEY = "api_token_denied:%s"
+
+
+class LRUCache:
+    """Thread safe LRU of at most `maxsize` entries, each with a deadline"""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+
+        with self._lock:
+            if (item := self._data.get(key)) is None:
+                return None
+            value, deadline = item
+            if deadline <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, timeout: float) -> None:
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._data.clear()
+
+
+def get_local_cache_size() -> int:
+    return getattr(settings, "API_TOKEN_CACHE_SIZE", 1024)
+
+
+_local = LRUCache(get_local_cache_size())
+
+
+def get_shared_cache():
+    alias = getattr(settings, "API_TOKEN_CACHE_ALIAS", None)
+    return caches[alias] if alias else None
+
+
+def cache_key(key: str) -> str:
+    return KEY % hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_ttl(token: Any, timeout: float) -> float:
+    """`timeout` cut short by the token's expiry, 0 when already expired"""
+
+    if (expired_at := getattr(token, "expired_at", None)) is None:
+        return timeout
+    return max(0, min(timeout, (expired_at - timezone.now()).total_seconds()))
+
+
+def get_local_token(digest: str) -> Optional[tuple[Any, Any]]:
+
+    if (entry := _local.get(digest)) is not None:
+        token_cache.inc(result="local")
+    return entry
+
+
+def set_local_token(digest: str, entry: Optional[tuple[Any, Any]]) -> None:
+
+    if entry is None:
+        token_cache.inc(result="miss")
+        return
+    token_cache.inc(result="shared")
+    timeout = getattr(settings, "API_TOKEN_LOCAL_CACHE_TIMEOUT", 30)
+    if ttl := get_ttl(entry[1], timeout):
+        _local.set(digest, entry, ttl)
+
+
+def get_shared_ttl(token: Any) -> int:
+    timeout = getattr(settings, "API_TOKEN_CACHE_TIMEOUT", 60 * 5)
+    # whole seconds, rounded down so the entry never outlives the token
+    return int(get_ttl(token, timeout))
+
+
+def get_cached_token(key: str) -> Optional[tuple[Any, Any]]:
+
+    digest = cache_key(key)
+    if (entry := get_local_token(digest)) is not None:
+        return entry
+
+    if (shared := get_shared_cache()) is not None:
+        with cache_seconds.time(cache="api_token"):
+            entry = shared.get(digest)
+    set_local_token(digest, entry)
+    return entry
+
+
+async def aget_cached_token(key: str) -> Optional[tuple[Any, Any]]:
+
+    digest = cache_key(key)
+    if (entry := get_local_token(digest)) is not None:
+        return entry
+
+    if (shared := get_shared_cache()) is not None:
+        with cache_seconds.time(cache="api_token"):
+            entry = await shared.aget(digest)
+    set_local_token(digest, entry)
+    return entry
+
+
+def cache_token(token: Any) -> None:
+    """Keep the resolved token, `token.user` has to be loaded already"""
+
+    digest, entry = cache_key(token.key), (token.user, token)
+
+    timeout = getattr(settings, "API_TOKEN_LOCAL_CACHE_TIMEOUT", 30)
+    if ttl := get_ttl(token, timeout):
+        _local.set(digest, entry, ttl)
+
+    shared = get_shared_cache()
+    if shared is not None and (ttl := get_shared_ttl(token)):
+        shared.set(digest, entry, ttl)
+
+
+async def acache_token(token: Any) -> None:
+
+    digest, entry = cache_key(token.key), (token.user, token)
+
+    timeout = getattr(settings, "API_TOKEN_LOCAL_CACHE_TIMEOUT", 30)
+    if ttl := get_ttl(token, timeout):
+        _local.set(digest, entry, ttl)
+
+    shared = get_shared_cache()
+    if shared is not None and (ttl := get_shared_ttl(token)):
+        await shared.aset(digest, entry, ttl)
+
+
+def invalidate_token(key: str, using: Optional[str] = None) -> None:
+    """
+    Drop the token from both tiers now, and again once the current
+    transaction commits so a concurrent request can't put it back.
+    """
+
+    digest = cache_key(key)
+
+    def _invalidate() -> None:
+        _local.delete(digest)
+        if (shared := get_shared_cache()) is not None:
+            shared.delete(digest)
+
+    _invalidate()
+    transaction.on_commit(_invalidate, using=using)
+
+
+def get_cached_user(pk: Any, queryset) -> Optional[Any]:
+    """The user `pk` from `queryset`, None when it doesn't exist"""
+
+    key = USER_KEY % pk
+    if (user := _local.get(key)) is not None:
+        return user
+
+    shared = get_shared_cache()
+    if shared is None or (user := shared.get(key)) is None:
+        try:
+            user = queryset.get(pk=pk)
+        except queryset.model.DoesNotExist:
+            return None
+        if shared is not None:
+            shared.set(key, user, getattr(settings, "API_TOKEN_CACHE_TIMEOUT", 60 * 5))
+
+    _local.set(key, user, getattr(settings, "API_TOKEN_LOCAL_CACHE_TIMEOUT", 30))
+    return user
+
+
+def invalidate_user(pk: Any, using: Optional[str] = None) -> None:
+
+    key = USER_KEY % pk
+
+    def _invalidate() -> None:
+        _local.delete(key)
+        if (shared := get_shared_cache()) is not None:
+            shared.delete(key)
+
+    _invalidate()
+    transaction.on_commit(_invalidate, using=using)
+
+
+def get_denylist():
+    return caches[getattr(settings, "API_TOKEN_DENYLIST_ALIAS", "default")]
+
+
+def deny_token(token_id: str, timeout: float) -> None:
+    """
+    Deny `token_id` until its token expires, after that the signature
+    check turns it down anyway and the entry can go.
+    """
+    if timeout > 0:
+        get_denylist().set(DENYLIST_KEY % token_id, True, math.ceil(timeout))
+
+
+def is_token_denied(token_id: str) -> bool:
+    return get_denylist().get(DENYLIST_KEY % token_id, False)
+
+
+@receiver(setting_changed)
+def reset_token_cache(*, setting: str, **kwargs: Any) -> None:
+    global _local
+
+    if setting.startswith("API_TOKEN_"):
+        _local = LRUCache(get_local_cache_size())
@@ -0,0 +1,76 @@
+"""
+System checks for the API token settings.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.utils.module_loading import import_string
+
+from helpers.caches import is_local_cache
+
+
+@register(Tags.security, Tags.caches)
+def check_token_denylist(app_configs: Any = None, **kwargs: Any) -> list[Error]:
+    """
+    A logout under SignedTokenBackend is only a denylist entry, every
+    process has to see it or the token keeps working on the others.
+    """
+    from .backends import SignedTokenBackend
+
+    backend = getattr(settings, "API_TOKEN_BACKEND", "api.backends.ModelTokenBackend")
+    if not issubclass(import_string(backend), SignedTokenBackend):
+        return []
+
+    alias = getattr(settings, "API_TOKEN_DENYLIST_ALIAS", "default")
+    if alias not in settings.CACHES:
+        return [
+            Error(
+                "API_TOKEN_DENYLIST_ALIAS %r isn't a configured cache." % alias,
+                id="api.E001",
+            )
+        ]
+    if is_local_cache(alias):
+        return [
+            Error(
+                "SignedTokenBackend needs a denylist cache shared between "
+                "processes, %r is local to each one." % alias,
+                hint="Set REDIS_URL or point API_TOKEN_DENYLIST_ALIAS at a "
+                "shared cache.",
+                id="api.E002",
+            )
+        ]
+    return []
+
+
+@register(Tags.security, Tags.caches)
+def check_token_cache(app_configs: Any = None, **kwargs: Any) -> list[Error]:
+    """
+    The shared tier of the token cache is only invalidated where the
+    logout or the deactivation happened, a cache local to each process
+    would keep serving revoked tokens on the others.
+    """
+    alias = getattr(settings, "API_TOKEN_CACHE_ALIAS", None)
+    if alias is None:
+        return []
+    if alias not in settings.CACHES:
+        return [
+            Error(
+                "API_TOKEN_CACHE_ALIAS %r isn't a configured cache." % alias,
+                id="api.E003",
+            )
+        ]
+    if is_local_cache(alias):
+        return [
+            Error(
+                "API_TOKEN_CACHE_ALIAS needs a cache shared between processes, "
+                "%r is local to each one." % alias,
+                hint="Set REDIS_URL or set API_TOKEN_CACHE_ALIAS to None to "
+                "only keep the short lived per process tier.",
+                id="api.E004",
+            )
+        ]
+    return []
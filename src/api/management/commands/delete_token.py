@@ -3,6 +3,7 @@ from typing import Any
 from django.utils import timezone
 from django.core.management.base import BaseCommand
 
+from helpers.purge import BatchPurge
 from ...models import get_token_model
 
 
@@ -10,8 +11,26 @@ class Command(BaseCommand):
 
     help = "Delete expired token"
 
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--chunk-size", type=int, default=None)
+        parser.add_argument(
+            "--sleep", type=float, default=None, help="Seconds between batches"
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
     def handle(self, *args: list[Any], **options: dict[str, Any]) -> None:
 
         token = get_token_model()
 
-        token.objects.filter(expired_at__lte=timezone.now()).delete()
+        qs = token.objects.using(options["database"]).filter(
+            expired_at__lte=timezone.now()
+        )
+        purge = BatchPurge(
+            qs,
+            chunk_size=options["chunk_size"],
+            sleep=options["sleep"],
+            callback=lambda report: self.stdout.write(str(report)),
+        )
+        report = purge.count() if options["dry_run"] else purge.run()
+        self.stdout.write(self.style.SUCCESS("Expired tokens: %s" % report))
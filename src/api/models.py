@@ -8,8 +8,12 @@ from django.apps import apps
 from django.conf import settings
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from django.dispatch import receiver
 from django.core.exceptions import ImproperlyConfigured
 
+from . import checks  # noqa: F401, registers the system checks
+from .cache import invalidate_token, invalidate_user
+
 
 def get_token_model() -> type[Token]:
 
@@ -31,12 +35,12 @@ def create_token_expire(sender, instance, *args, **kwargs) -> None:
     expire_when = settings.API_TOKEN_EXPIRE_TIME
 
     if instance.expired_at is None:
-        created = instance.created
+        # pre_save, `created` is only filled in by the field on insert
+        created = instance.created or timezone.now()
 
         expire = created + expire_when
 
         instance.expired_at = expire
-        instance.save()
 
     return None
 
@@ -73,4 +77,26 @@ class Token(models.Model):
         return timezone.now() >= self.expired_at
 
 
-models.signals.post_save.connect(create_token_expire, sender=Token)
+models.signals.pre_save.connect(create_token_expire, sender=Token)
+
+
+@receiver(models.signals.post_save, sender=Token)
+@receiver(models.signals.post_delete, sender=Token)
+def invalidate_token_cache(sender, instance, using=None, **kwargs) -> None:
+    # logout (TokenLogoutSerializer) deletes the token
+    invalidate_token(instance.key, using=using)
+
+
+@receiver(models.signals.post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_token_cache(sender, instance, using=None, **kwargs) -> None:
+    # the cached user goes stale, deactivation has to apply at once
+    if kwargs.get("created"):
+        return
+    invalidate_user(instance.pk, using=using)
+    for key in (
+        get_token_model()
+        .objects.using(using)
+        .filter(user=instance)
+        .values_list("key", flat=True)
+    ):
+        invalidate_token(key, using=using)
@@ -11,10 +11,15 @@ from .views import (
     UserAPIView,
     ProductListCreateView,
     ProductRetrieveView,
+    ProductAvailabilityView,
     TokenLoginAPIView,
     TokenLogoutAPIView,
     UserOrderListAPIView,
     UserOrderRetrieveAPIView,
+    CheckoutAPIView,
+    AsyncProductListView,
+    AsyncProductDetailView,
+    AsyncUserOrderListView,
 )
 
 
@@ -23,6 +28,11 @@ urlpatterns = [
     path("logout/", TokenLogoutAPIView.as_view(), name="api_logout"),
     # products Views
     path("products/", ProductListCreateView.as_view(), name="product_list"),
+    path(
+        "products/availability/",
+        ProductAvailabilityView.as_view(),
+        name="product_availability",
+    ),
     path(
         "products/<pk>/<product_slug>/",
         ProductRetrieveView.as_view(),
@@ -34,11 +44,20 @@ urlpatterns = [
     path("redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
     # User Orders
     path("orders/", UserOrderListAPIView.as_view(), name="user_order"),
+    path("orders/checkout/", CheckoutAPIView.as_view(), name="order_checkout"),
     path(
         "orders/<uuid:order_id>/",
         UserOrderRetrieveAPIView.as_view(),
         name="order_retrieve",
     ),
+    # async read only views, for ASGI (api.views.asynchronous)
+    path("async/products/", AsyncProductListView.as_view(), name="async_product_list"),
+    path(
+        "async/products/<int:pk>/<product_slug>/",
+        AsyncProductDetailView.as_view(),
+        name="async_product_retrieve",
+    ),
+    path("async/orders/", AsyncUserOrderListView.as_view(), name="async_user_order"),
 ]
 
 
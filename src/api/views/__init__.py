@@ -2,3 +2,4 @@ from .products import *  # noqa
 from .users import *  # noqa
 from .token import *  # noqa
 from .orders import *  # noqa
+from .asynchronous import *  # noqa
@@ -0,0 +1,181 @@
+"""
+Read only API views served natively under ASGI.
+
+DRF's APIView is synchronous, so under ASGI each request to it holds a
+worker thread for its whole life. These are plain async Django views on
+the async ORM and cache, answering in the same shape as their DRF
+counterparts:
+
+    AsyncProductListView      ProductListCreateView GET, without search
+    AsyncProductDetailView    ProductRetrieveView GET
+    AsyncUserOrderListView    UserOrderListAPIView GET, without search
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.views import View
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import get_authorization_header
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import replace_query_param
+
+from api.backends import get_token_backend
+from products.cache import aget_detail_version, get_timeout
+from products.models import Product, Order
+from helpers.metrics import auth_failures
+from helpers.pagination import CursorPaginator, InvalidCursor, DEFAULT_CURSOR_ORDERING
+from helpers.serializers.products import ProductListSerializer
+from helpers.serializers.order import UserOrderSerializer
+
+
+__all__ = [
+    "AsyncProductListView",
+    "AsyncProductDetailView",
+    "AsyncUserOrderListView",
+]
+
+API_DETAIL_KEY = "api_product_detail:%s:%s"
+
+
+class AsyncAPIView(View):
+    """
+    Token (or session) authenticated, IsAuthenticated, JSON rendered.
+    """
+
+    http_method_names = ["get", "options"]
+    keyword = "Token"
+
+    async def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any):
+
+        try:
+            request.user = await self.authenticate(request)
+        except exceptions.AuthenticationFailed as e:
+            auth_failures.inc(reason=str(e.detail))
+            return self.error(e.detail, status=401)
+
+        if not request.user.is_authenticated:
+            return self.error(exceptions.NotAuthenticated.default_detail, status=401)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def authenticate(self, request: HttpRequest):
+        """The token user, the session user when there's no token"""
+
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return await request.auser()
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_("Invalid token header."))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_("Invalid token header."))
+
+        user, _token = await get_token_backend().aauthenticate(key)
+        return user
+
+    def render(self, data: Any, status: int = 200) -> HttpResponse:
+        return HttpResponse(
+            JSONRenderer().render(data), content_type="application/json", status=status
+        )
+
+    def error(self, detail: Any, status: int) -> HttpResponse:
+
+        response = self.render({"detail": detail}, status=status)
+        if status == 401:
+            response["WWW-Authenticate"] = self.keyword
+        return response
+
+
+class AsyncCursorListView(AsyncAPIView):
+    """
+    Keyset paginated list, same parameters and output as KeysetPagination.
+    """
+
+    serializer_class = None
+    page_size = 10
+    max_page_size = 100
+    ordering = DEFAULT_CURSOR_ORDERING
+
+    def get_queryset(self) -> QuerySet:
+        raise NotImplementedError
+
+    def get_page_size(self) -> int:
+
+        try:
+            page_size = int(self.request.GET["page_size"])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_next_link(self, next_cursor: Optional[str]) -> Optional[str]:
+
+        if next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), "cursor", next_cursor
+        )
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any):
+
+        paginator = CursorPaginator(
+            self.get_queryset(), self.get_page_size(), self.ordering
+        )
+        try:
+            page = await paginator.apage(request.GET.get("cursor") or None)
+        except InvalidCursor as e:
+            return self.error(str(e), status=404)
+
+        # everything serialized is already loaded, no query happens here
+        data = self.serializer_class(page.object_list, many=True).data
+        return self.render(
+            {"next": self.get_next_link(page.next_cursor), "results": data}
+        )
+
+
+class AsyncProductListView(AsyncCursorListView):
+
+    serializer_class = ProductListSerializer
+
+    def get_queryset(self) -> QuerySet:
+        return Product.objects.select_related("user")
+
+
+class AsyncUserOrderListView(AsyncCursorListView):
+
+    serializer_class = UserOrderSerializer
+
+    def get_queryset(self) -> QuerySet:
+        return Order.objects.select_related("user", "product__user").filter(
+            user=self.request.user
+        )
+
+
+class AsyncProductDetailView(AsyncAPIView):
+    """
+    The serialized product is cached under the product detail version
+    token (products.cache), saving the product swaps it.
+    """
+
+    queryset = Product.objects.select_related("user")
+
+    async def get(self, request: HttpRequest, pk: int, product_slug: str):
+
+        key = API_DETAIL_KEY % (pk, await aget_detail_version(pk))
+        if (data := await cache.aget(key)) is None:
+            try:
+                obj = await self.queryset.aget(pk=pk)
+            except Product.DoesNotExist:
+                return self.error(exceptions.NotFound.default_detail, status=404)
+            data = dict(ProductListSerializer(obj).data)
+            await cache.aset(key, data, get_timeout())
+
+        if data["product_slug"] != product_slug:
+            return self.error(exceptions.NotFound.default_detail, status=404)
+        return self.render(data)
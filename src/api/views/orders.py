@@ -14,7 +14,8 @@ from rest_framework.mixins import DestroyModelMixin
 
 from products.models import Order
 from api.permissions import IsUser
-from helpers.serializers.order import UserOrderSerializer
+from helpers.decorators import paginate
+from helpers.serializers.order import UserOrderSerializer, CheckoutSerializer
 
 
 class BaseGenericAPIView(GenericAPIView):
@@ -29,6 +30,7 @@ class BaseGenericAPIView(GenericAPIView):
         return qs
 
 
+@paginate(cursor=True, page_size=10)
 class UserOrderListAPIView(BaseGenericAPIView):
 
     serializer_class = UserOrderSerializer
@@ -38,6 +40,12 @@ class UserOrderListAPIView(BaseGenericAPIView):
     def get(self, request, *args: list[Any], **kwargs: dict[str, Any]) -> Response:
 
         queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
         serailizer = self.get_serializer(queryset, many=True)
 
         return Response(serailizer.data, status=status.HTTP_200_OK)
@@ -71,3 +79,24 @@ class UserOrderRetrieveAPIView(DestroyModelMixin, BaseGenericAPIView):
     def delete(self, request, *args: list[Any], **kwargs: dict[str, Any]) -> Response:
 
         return self.destroy(request, *args, **kwargs)
+
+
+class CheckoutAPIView(BaseGenericAPIView):
+
+    serializer_class = CheckoutSerializer
+
+    def post(self, request, *args: list[Any], **kwargs: dict[str, Any]) -> Response:
+        """
+        Create user orders for several products at once
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        orders = serializer.save()
+
+        return Response(
+            {
+                "message": "Added Items",
+                "orders": UserOrderSerializer(orders, many=True).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
@@ -2,16 +2,21 @@ from typing import Any
 
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
 
 from drf_spectacular.utils import extend_schema
 from drf_spectacular.utils import OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
 
 from products.models import Product
+from products.availability import get_availability
 from helpers.decorators import paginate
 from helpers.filters import ModelSearchFilterBackend
+from helpers.pagination import RankedPagination
 from helpers.serializers.order import UserOrderCreateSerializer
 from helpers.serializers.products import (
     ProductListSerializer,
@@ -20,13 +25,25 @@ from helpers.serializers.products import (
 )
 
 
-@paginate(PageNumberPagination, page_size=10)
+@paginate(cursor=True, page_size=10)
 class ProductListCreateView(GenericAPIView):
 
     serializer_class = ProductListSerializer
     permission_classes = (permissions.IsAuthenticated,)
     queryset = Product.objects.select_related("user")
     filter_backends = (ModelSearchFilterBackend,)
+    search_backend = "trigram"
+    search_query = "q"
+
+    @property
+    def paginator(self):
+        """Search results keep their rank, see RankedPagination"""
+
+        request = getattr(self, "request", None)
+        if request is not None and request.query_params.get(self.search_query):
+            if not hasattr(self, "_paginator"):
+                self._paginator = RankedPagination()
+        return super().paginator
 
     def get_serializer_class(self):
 
@@ -139,3 +156,58 @@ class ProductRetrieveView(GenericAPIView):
 
     def patch(self, request, *args: list[str], **kwargs: dict[str, Any]) -> Response:
         return self.put(request, *args, **kwargs)
+
+
+class ProductAvailabilityView(APIView):
+    """
+    Stock of many products at once, for storefront widgets that poll it.
+    Served from the availability snapshots (products.availability), the
+    database is only read for products missing from the cache. Inactive
+    products read as missing, as they do on the storefront.
+    """
+
+    permission_classes = (permissions.AllowAny,)
+    # public and polled, don't look up tokens or sessions
+    authentication_classes = ()
+    throttle_classes = (ScopedRateThrottle,)
+    throttle_scope = "product_availability"
+    max_ids = 100
+    # positive bigint, what a primary key can hold
+    max_id = 2**63 - 1
+
+    def get_ids(self, request) -> list[int]:
+
+        raw = request.query_params.get("ids", "")
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in raw.split(",") if pk.strip()))
+        except ValueError:
+            raise ValidationError({"ids": "Expected comma separated product ids."})
+        if not ids:
+            raise ValidationError({"ids": "This parameter is required."})
+        if len(ids) > self.max_ids:
+            raise ValidationError({"ids": "At most %d ids." % self.max_ids})
+        if not all(0 < pk <= self.max_id for pk in ids):
+            raise ValidationError({"ids": "Expected comma separated product ids."})
+        return ids
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="ids",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="Comma separated product ids, at most 100.",
+            )
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def get(self, request, *args: list[str], **kwargs: dict[str, Any]) -> Response:
+
+        ids = self.get_ids(request)
+        availability = get_availability(ids)
+        data = {}
+        for pk in ids:
+            value = availability.get(pk)
+            data[str(pk)] = value.as_dict() if value and value.active else None
+        return Response(data, status=status.HTTP_200_OK)
@@ -99,8 +99,32 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # HTMX
     "django_htmx.middleware.HtmxMiddleware",
+    # latency per view, see /metrics/
+    "helpers.metrics.MetricsMiddleware",
+    # queries per view, see /stats/queries/
+    "helpers.middleware.QueryCountMiddleware",
 ]
 
+# QueryCountMiddleware logs a request as an N+1 suspect when one statement
+# runs this many times, and any query slower than SLOW_QUERY_THRESHOLD seconds.
+QUERY_COUNT_DUPLICATE_THRESHOLD = 10
+SLOW_QUERY_THRESHOLD = 0.5
+
+# /health/ready/ probes (helpers.health), each given HEALTH_CHECK_TIMEOUT
+# seconds, the report is reused for HEALTH_CHECK_CACHE_SECONDS.
+HEALTH_CHECK_TIMEOUT = 2.0
+HEALTH_CHECK_CACHE_SECONDS = 5
+
+# /products/orders/events/ sends a keepalive comment after SSE_KEEPALIVE idle
+# seconds, a stream that falls EVENT_QUEUE_SIZE events behind drops the oldest.
+# Events go through Redis when REDIS_URL is set (helpers.broker).
+SSE_KEEPALIVE = 15
+EVENT_QUEUE_SIZE = 100
+
+# /metrics/ is for staff users, and for "Authorization: Bearer <METRICS_TOKEN>"
+# when this is set (a scraper).
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
 
 ROOT_URLCONF = "beckings.urls"
 
@@ -115,6 +139,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "helpers.context_processors.default_price",
+                "helpers.context_processors.product_card_cache",
             ],
             "builtins": [
                 "django.templatetags.static",
@@ -238,11 +263,62 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # per client IP, the public /api/products/availability/
+    "DEFAULT_THROTTLE_RATES": {"product_availability": "120/min"},
 }
 
 API_TOKEN_MODEL = "api.Token"
+# How API tokens are issued and checked (api.backends), rows of
+# API_TOKEN_MODEL or "api.backends.SignedTokenBackend" for stateless
+# signed tokens revoked through a denylist in API_TOKEN_DENYLIST_ALIAS, which
+# has to be shared by every process (Redis), api.checks refuses LocMem.
+API_TOKEN_BACKEND = "api.backends.ModelTokenBackend"
+API_TOKEN_DENYLIST_ALIAS = "default"
+
+# delete_token and delete_inactive_users delete in primary key ranges of
+# PURGE_CHUNK_SIZE rows (helpers.purge), pausing PURGE_SLEEP seconds between.
+PURGE_CHUNK_SIZE = 1000
+PURGE_SLEEP = 0.1
 API_TOKEN_EXPIRE_TIME = timedelta(days=2)  # two days
 
+# Resolved tokens (api.cache) are kept in a per process LRU and in the
+# shared cache below, never past the token's expiry. None keeps only the
+# LRU; the alias is set to "default" with REDIS_URL below, api.checks
+# refuses a cache local to each process.
+API_TOKEN_CACHE_ALIAS = None
+API_TOKEN_CACHE_TIMEOUT = 60 * 5  # five minutes
+API_TOKEN_CACHE_SIZE = 1024
+API_TOKEN_LOCAL_CACHE_TIMEOUT = 30  # seconds
+
+# Product search index used outside Postgres (ProductManager.search).
+# None picks SQLite FTS5 when available, else the in-process inverted index.
+# e.g "helpers.search_index.InMemorySearchIndex"
+SEARCH_INDEX_BACKEND = None
+
+# Rendered product cards (helpers/products/object_list.html) are cached per
+# (pk, updated_at) in the default cache, so saving a product invalidates it.
+PRODUCT_CARD_CACHE_TIMEOUT = 60 * 60  # one hour
+
+# Product detail object with its comments (products.cache), versioned and
+# invalidated by Product, Comment and Reply signals. Without REDIS_URL the
+# new version is only seen by one worker, the short timeout applies then.
+PRODUCT_DETAIL_CACHE_TIMEOUT = 60 * 15  # fifteen minutes
+PRODUCT_DETAIL_LOCAL_CACHE_TIMEOUT = 5  # seconds
+
+# Availability snapshots (products.availability) behind
+# /api/products/availability/, reloaded whenever a product's stock changes.
+# Without REDIS_URL the reload only reaches one worker, the short timeout
+# applies then.
+PRODUCT_AVAILABILITY_CACHE_TIMEOUT = 60 * 60  # an hour
+PRODUCT_AVAILABILITY_LOCAL_CACHE_TIMEOUT = 5  # seconds
+
+# Background export jobs (products.ExportJob) are written here by
+# `python manage.py run_export_jobs`, served only through the job views.
+EXPORT_ROOT = config("EXPORT_ROOT", default=str(BASE_DIR / "exports"))
+# A job still running after EXPORT_JOB_TIMEOUT seconds lost its worker, the
+# next claim marks it failed.
+EXPORT_JOB_TIMEOUT = 60 * 60  # an hour
+
 # DRF Spectacular
 
 SPECTACULAR_SETTINGS = {
@@ -276,6 +352,7 @@ if REDIS_URL:
             "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
         }
     }
+    API_TOKEN_CACHE_ALIAS = "default"
 
 
 UNFOLD = {"SITE_HEADER": "Beckings", "SITE_TITLE": "Becking inc."}
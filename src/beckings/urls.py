@@ -12,6 +12,10 @@ urlpatterns = [
     path("accounts/", include("clients.urls")),
     path("feedbacks/", include("feedbacks.urls")),
     path("health/", views.health_check_view, name="health_check"),
+    path("health/live/", views.health_check_view, name="liveness_check"),
+    path("health/ready/", views.readiness_check_view, name="readiness_check"),
+    path("stats/queries/", views.query_stats_view, name="query_stats"),
+    path("metrics/", views.metrics_view, name="metrics"),
     path("products/", include("products.urls")),
     path("api/", include("api.urls")),
 ]
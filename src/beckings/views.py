@@ -1,13 +1,54 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from django.template.loader import get_template
 from django.shortcuts import render, redirect
-from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, JsonResponse
+
+from helpers.health import get_health_report
+from helpers.middleware import query_stats
+from helpers import metrics
 
 
 def health_check_view(request: HttpRequest) -> HttpResponse:
+    """Liveness, the process answers"""
 
     return HttpResponse("Ok")
 
 
+def readiness_check_view(request: HttpRequest) -> JsonResponse:
+    """Readiness, the database, cache and static files answer (helpers.health)"""
+
+    report = get_health_report()
+    return JsonResponse(report.as_dict(), status=200 if report.ok else 503)
+
+
+@staff_member_required
+def query_stats_view(request: HttpRequest) -> JsonResponse:
+    """Database cost per view since the process started (QueryCountMiddleware)"""
+
+    return JsonResponse({"views": query_stats.as_dict()})
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Prometheus text format, for staff users and for the bearer token
+    `METRICS_TOKEN` when it is set. Anyone else gets a 401.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    user = request.user
+    if not (user.is_active and user.is_staff) and not (
+        token
+        and constant_time_compare(
+            request.headers.get("Authorization", ""), "Bearer %s" % token
+        )
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 def homepage_view(request: HttpRequest) -> HttpResponse | HttpResponseRedirect:
 
     _viewed = request.session.get("_viewed")
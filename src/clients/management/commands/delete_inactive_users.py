@@ -6,6 +6,8 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 
+from helpers.purge import BatchPurge
+
 
 UserModel = get_user_model()
 
@@ -17,8 +19,20 @@ class Command(BaseCommand):
     help = "Delete inactive user"
 
     def add_arguments(self, parser) -> None:
-        parser.add_argument("--all", action="store_true")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help=(
+                "Every never activated account past the activation window, "
+                "not only the ones who joined on its last day"
+            ),
+        )
         parser.add_argument("--database", default="default")
+        parser.add_argument("--chunk-size", type=int, default=None)
+        parser.add_argument(
+            "--sleep", type=float, default=None, help="Seconds between batches"
+        )
+        parser.add_argument("--dry-run", action="store_true")
 
     def handle(self, **options: Dict) -> None:
 
@@ -33,13 +47,26 @@ class Command(BaseCommand):
 
         try:
             now = timezone.now()
+            # never activated: accounts that logged in once were deactivated
+            # on purpose and aren't ours to delete
             qs = UserModel._default_manager.using(using).filter(
-                is_active=False, date_joined__date=(now - default_timestamp)
+                is_active=False, last_login__isnull=True
+            )
+            if options.get("all"):
+                qs = qs.filter(date_joined__lte=(now - default_timestamp))
+            else:
+                qs = qs.filter(date_joined__date=(now - default_timestamp))
+            purge = BatchPurge(
+                qs,
+                chunk_size=options.get("chunk_size"),
+                sleep=options.get("sleep"),
+                callback=lambda report: self.stdout.write(str(report)),
             )
-            if count := len(qs):
-                qs.delete()
+            report = purge.count() if options.get("dry_run") else purge.run()
+            if report.rows:
+                message = "Would delete" if report.dry_run else "Deleted"
                 self.stdout.write(
-                    self.style.SUCCESS("Deleted Inactive Users \n count: %s", count)
+                    self.style.SUCCESS("%s Inactive Users \n %s" % (message, report))
                 )
             else:
                 self.stdout.write(self.style.WARNING("No inactive users."))
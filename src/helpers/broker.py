@@ -0,0 +1,223 @@
+"""
+Publish/subscribe for pushing events to open connections (server-sent
+events, products.views.order_events_view).
+
+    >>> get_broker().publish("orders:1", {"status": "delivered"})
+    >>> get_broker().publish_many([("orders:1", {...}), ("orders:2", {...})])
+    >>> subscription = await get_broker().subscribe("orders:1")
+    >>> message = await subscription.get(timeout=15)  # None on timeout
+    >>> await subscription.close()
+
+`MemoryBroker` hands messages to the subscribers of its own process.
+With REDIS_URL set `RedisBroker` goes through Redis PUBLISH/SUBSCRIBE
+instead, so a change made in any worker (or in a management command)
+reaches the streams open on every worker. Messages are JSON objects.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+__all__ = ["MemoryBroker", "RedisBroker", "Subscription", "get_broker"]
+
+logger = logging.getLogger(__name__)
+
+
+def get_queue_size() -> int:
+    return getattr(settings, "EVENT_QUEUE_SIZE", 100)
+
+
+class Subscription:
+
+    channel: str
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """The next message, None when `timeout` seconds pass without one"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+
+class MemorySubscription(Subscription):
+    """
+    Bound to the event loop it was made on, `put()` may be called from
+    any thread. A reader that falls `EVENT_QUEUE_SIZE` messages behind
+    loses the oldest.
+    """
+
+    def __init__(self, broker: MemoryBroker, channel: str) -> None:
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(get_queue_size())
+
+    def put(self, message: dict) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # the loop is gone without the subscription being closed
+            self.broker.unsubscribe(self)
+
+    def _put(self, message: dict) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class MemoryBroker:
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._channels: dict[str, set[MemorySubscription]] = {}
+
+    def publish(self, channel: str, message: dict) -> None:
+
+        with self._lock:
+            subscriptions = list(self._channels.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def publish_many(self, messages: Iterable[tuple[str, dict]]) -> None:
+        for channel, message in messages:
+            self.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> MemorySubscription:
+
+        subscription = MemorySubscription(self, channel)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: MemorySubscription) -> None:
+
+        with self._lock:
+            subscriptions = self._channels.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._channels.pop(subscription.channel, None)
+
+    def subscribers(self, channel: str) -> int:
+        with self._lock:
+            return len(self._channels.get(channel, ()))
+
+
+class RedisSubscription(Subscription):
+    """One Redis connection per subscription, as SUBSCRIBE takes it over"""
+
+    def __init__(self, client: Any, pubsub: Any, channel: str) -> None:
+        self.client = client
+        self.pubsub = pubsub
+        self.channel = channel
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            remaining = None if deadline is None else max(0, deadline - loop.time())
+            message = await self.pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=remaining
+            )
+            if message is not None:
+                return json.loads(message["data"])
+            if deadline is not None and loop.time() >= deadline:
+                return None
+
+    async def close(self) -> None:
+
+        try:
+            await self.pubsub.unsubscribe(self.channel)
+        finally:
+            await self.pubsub.aclose()
+            await self.client.aclose()
+
+
+class RedisBroker:
+
+    def __init__(self, url: str) -> None:
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel: str, message: dict) -> None:
+        self.client.publish(channel, json.dumps(message, cls=DjangoJSONEncoder))
+
+    def publish_many(self, messages: Iterable[tuple[str, dict]]) -> None:
+        """One round trip for the lot"""
+
+        pipeline = self.client.pipeline(transaction=False)
+        for channel, message in messages:
+            pipeline.publish(channel, json.dumps(message, cls=DjangoJSONEncoder))
+        pipeline.execute()
+
+    async def subscribe(self, channel: str) -> RedisSubscription:
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        return RedisSubscription(client, pubsub, channel)
+
+
+_broker: Optional[MemoryBroker | RedisBroker] = None
+
+
+def get_broker() -> MemoryBroker | RedisBroker:
+
+    global _broker
+
+    if _broker is None:
+        if url := getattr(settings, "REDIS_URL", ""):
+            _broker = RedisBroker(url)
+        else:
+            _broker = MemoryBroker()
+    return _broker
+
+
+def publish(channel: str, message: dict) -> None:
+    """
+    `get_broker().publish()` that logs instead of raising, a lost event
+    shouldn't fail the change it reports.
+    """
+    try:
+        get_broker().publish(channel, message)
+    except Exception:
+        logger.exception("Couldn't publish to %s", channel)
+
+
+def publish_many(messages: Iterable[tuple[str, dict]]) -> None:
+    """`publish()` for a batch of (channel, message)"""
+    messages = list(messages)
+    try:
+        get_broker().publish_many(messages)
+    except Exception:
+        logger.exception("Couldn't publish %d messages", len(messages))
+
+
+@receiver(setting_changed)
+def reset_broker(*, setting: str, **kwargs: Any) -> None:
+    global _broker
+
+    if setting == "REDIS_URL":
+        _broker = None
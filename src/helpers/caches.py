@@ -0,0 +1,28 @@
+"""
+Which django caches are seen by every process.
+
+LocMemCache (the default without REDIS_URL) lives inside one process: an
+entry deleted or rewritten there stays as it was in every other worker
+until it expires. Anything invalidated on write either needs a shared
+cache or has to keep its entries short lived.
+
+    >>> is_local_cache("default")
+    True
+"""
+
+from __future__ import annotations
+
+from django.conf import settings
+
+
+__all__ = ["LOCAL_CACHE_BACKENDS", "is_local_cache"]
+
+# caches that live in one process
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_local_cache(alias: str = "default") -> bool:
+    return settings.CACHES[alias]["BACKEND"] in LOCAL_CACHE_BACKENDS
@@ -7,3 +7,12 @@ from django.http import HttpRequest
 def default_price(request: HttpRequest) -> dict[str, Any]:
 
     return {"DEFAULT_PRICE_CURRENCY": getattr(settings, "DEFAULT_PRICE_CURRENCY", "$")}
+
+
+def product_card_cache(request: HttpRequest) -> dict[str, Any]:
+
+    return {
+        "PRODUCT_CARD_CACHE_TIMEOUT": getattr(
+            settings, "PRODUCT_CARD_CACHE_TIMEOUT", 60 * 60
+        )
+    }
@@ -8,6 +8,7 @@ from django.http import HttpResponseBadRequest
 from rest_framework.pagination import BasePagination
 
 from helpers._typing import HTMXHttpRequest
+from helpers.pagination import KeysetPagination
 
 
 T = TypeVar("T")
@@ -33,7 +34,12 @@ except ImportError:
             self.fget = func
 
 
-def paginate[T](pagination_class: T, **kwargs: dict[str, Any] | Any) -> Any:
+def paginate[T](
+    pagination_class: T | None = None,
+    *,
+    cursor: bool = False,
+    **kwargs: dict[str, Any] | Any,
+) -> Any:
     """
     Decorator for paginating a function base view. \n
     Example:
@@ -41,8 +47,21 @@ def paginate[T](pagination_class: T, **kwargs: dict[str, Any] | Any) -> Any:
     >>> class UserAPIView(View):
     >>>     queryset = User.objects.all()
     >>>
+    Keyset (cursor) pagination, ordered by ("-timestamp", "pk") unless
+    `ordering` is passed:
+    >>> @paginate(cursor=True, page_size=10)
+    >>> class OrderAPIView(View):
+    >>>     queryset = Order.objects.all()
+    >>>
     """
 
+    if cursor:
+        pagination_class = pagination_class or KeysetPagination
+        assert hasattr(
+            pagination_class, "ordering"
+        ), "cursor pagination requires an `ordering` attribute."
+
+    assert pagination_class is not None
     assert issubclass(pagination_class, BasePagination)
 
     Paginator = type("Paginator", (pagination_class,), kwargs)
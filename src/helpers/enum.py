@@ -17,3 +17,11 @@ class OrderStatusChoices(TextChoices):
     pending = "pending", _("Pending")
     cancelled = "cancelled", _("Cancelled")
     in_transit = "in_transit", _("In Transit")
+
+
+class ExportJobStatusChoices(TextChoices):
+
+    pending = "pending", _("Pending")
+    running = "running", _("Running")
+    done = "done", _("Done")
+    failed = "failed", _("Failed")
@@ -0,0 +1,214 @@
+"""
+Row by row exports for django-import-export resources.
+
+`Resource.export()` builds a whole tablib Dataset before a single byte is
+written. For line based formats (csv, tsv, jsonl) rows can be rendered one
+at a time instead, so memory stays flat and the first bytes go out at once.
+
+Example:
+    >>> export = StreamingExport(OrderResource(), queryset, "csv")
+    >>> StreamingHttpResponse(export, content_type=export.content_type)
+
+`write_export()` does the same into a file, for the background export
+jobs (products.ExportJob) which are kept in `export_storage`.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import cached_property
+from import_export.formats.base_formats import Format
+from import_export.resources import Resource
+
+
+__all__ = [
+    "JSONL",
+    "StreamingExport",
+    "STREAMING_FORMATS",
+    "ExportStorage",
+    "export_storage",
+    "get_export_storage",
+    "write_export",
+]
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class JSONL(Format):
+    """JSON lines, one object per row"""
+
+    CONTENT_TYPE = "application/x-ndjson"
+
+    def __init__(self, encoding: Optional[str] = None) -> None:
+        self.encoding = encoding
+
+    def get_title(self) -> str:
+        return "jsonl"
+
+    def get_extension(self) -> str:
+        return "jsonl"
+
+    def get_content_type(self) -> str:
+        return self.CONTENT_TYPE
+
+    def is_binary(self) -> bool:
+        return False
+
+    def can_export(self) -> bool:
+        return True
+
+    def export_data(self, dataset, **kwargs: Any) -> str:
+        return "".join(json.dumps(row, default=str) + "\n" for row in dataset.dict)
+
+
+class Echo:
+    """csv.writer target, hands the written line back"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class DelimitedRenderer:
+
+    delimiter = ","
+
+    def __init__(self, headers: list[str]) -> None:
+        self.headers = headers
+        self.writer = csv.writer(Echo(), delimiter=self.delimiter)
+
+    def header(self) -> str:
+        return self.writer.writerow(self.headers)
+
+    def row(self, values: list[Any]) -> str:
+        return self.writer.writerow(values)
+
+
+class TabRenderer(DelimitedRenderer):
+
+    delimiter = "\t"
+
+
+class JSONLinesRenderer:
+
+    def __init__(self, headers: list[str]) -> None:
+        self.headers = headers
+
+    def header(self) -> str:
+        return ""
+
+    def row(self, values: list[Any]) -> str:
+        return json.dumps(dict(zip(self.headers, values)), default=str) + "\n"
+
+
+STREAMING_FORMATS = {
+    "csv": ("text/csv", DelimitedRenderer),
+    "tsv": ("text/tab-separated-values", TabRenderer),
+    "jsonl": (JSONL.CONTENT_TYPE, JSONLinesRenderer),
+}
+
+
+class StreamingExport:
+    """
+    Iterable of encoded export rows, header first.
+    The queryset is read with `.iterator(chunk_size)`.
+    """
+
+    def __init__(
+        self,
+        resource: Resource,
+        queryset: QuerySet,
+        format: str,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        encoding: str = "utf-8",
+    ) -> None:
+
+        if format not in STREAMING_FORMATS:
+            raise ValueError("%r can't be streamed." % format)
+
+        self.resource = resource
+        self.queryset = queryset
+        self.format = format
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.rows = 0
+
+    @classmethod
+    def supports(cls, format: Any) -> bool:
+        title = format if isinstance(format, str) else format.get_title()
+        return title in STREAMING_FORMATS
+
+    @property
+    def content_type(self) -> str:
+        return "%s; charset=%s" % (STREAMING_FORMATS[self.format][0], self.encoding)
+
+    def __iter__(self) -> Iterator[bytes]:
+
+        resource = self.resource
+        _, renderer_class = STREAMING_FORMATS[self.format]
+        renderer = renderer_class(resource.get_export_headers())
+
+        if header := renderer.header():
+            yield header.encode(self.encoding)
+
+        for instance in self.queryset.iterator(chunk_size=self.chunk_size):
+            self.rows += 1
+            yield renderer.row(resource.export_resource(instance)).encode(self.encoding)
+
+
+class ExportStorage(FileSystemStorage):
+    """
+    Local storage under `EXPORT_ROOT`, not served by the web server,
+    files go out through the export job download view.
+    """
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.EXPORT_ROOT)
+
+    def _clear_cached_properties(self, setting, **kwargs) -> None:
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == "EXPORT_ROOT":
+            self.__dict__.pop("base_location", None)
+            self.__dict__.pop("location", None)
+
+
+export_storage = ExportStorage()
+
+
+def get_export_storage() -> ExportStorage:
+    return export_storage
+
+
+def write_export(
+    resource: Resource,
+    queryset: QuerySet,
+    format: Format,
+    file,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Write the export to the binary `file` and return the number of rows.
+    Line based formats are written row by row, the rest need the whole
+    tablib Dataset.
+    """
+
+    if StreamingExport.supports(format):
+        export = StreamingExport(
+            resource, queryset, format.get_title(), chunk_size=chunk_size
+        )
+        for chunk in export:
+            file.write(chunk)
+        return export.rows
+
+    dataset = resource.export(queryset)
+    data = format.export_data(dataset)
+    file.write(data.encode() if isinstance(data, str) else data)
+    return len(dataset)
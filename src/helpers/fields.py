@@ -1,11 +1,17 @@
 """Helpers for models"""
 
+from functools import lru_cache
+
 from django.db import models
 from django.core.checks import Error
 from django.utils.text import slugify
 from django.core.exceptions import FieldDoesNotExist
 
 
+# imports slugify the same names over and over
+cached_slugify = lru_cache(maxsize=10_000)(slugify)
+
+
 class AutoSlugField(models.SlugField):
 
     def __init__(self, perform_from=None, *args, **kwargs):
@@ -46,6 +52,12 @@ class AutoSlugField(models.SlugField):
         value = super().pre_save(model_instance, add)
         if add:
             perform_from = getattr(model_instance, self.perform_from)
-            value = slugify(perform_from)
+            value = cached_slugify(perform_from)
             setattr(model_instance, self.attname, value)
         return value
+
+    def populate(self, instances) -> None:
+        """Set the slug of many instances at once, e.g before bulk_create"""
+        for instance in instances:
+            value = cached_slugify(getattr(instance, self.perform_from))
+            setattr(instance, self.attname, value)
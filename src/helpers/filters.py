@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from typing import TypeVar, Optional, Union
 
-from django.db import models
+from django.db import models, connections
 from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
 from django.db.models import QuerySet
+from django.db.models.functions import Greatest
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.template.loader import get_template
 
 from rest_framework.request import Request
@@ -27,7 +30,8 @@ def qs_vector_search(model: type[models.Model], query: Optional[str]) -> QuerySe
     if not query:
         return manager.none()
 
-    queryset = manager.search(query)
+    # ranked against the stored, GIN indexed search_vector column
+    queryset = manager.search(query).select_related("user")
     return queryset
 
 
@@ -62,7 +66,62 @@ def qs_filter(
     return qs
 
 
+def qs_trigram_search(
+    model: type[models.Model],
+    *,
+    search_fields: Optional[Union[list[str], tuple[str, ...]]] = None,
+    query: Optional[str],
+    queryset: Optional[QuerySet] = None,
+) -> QuerySet:
+    """
+    Substring search backed by pg_trgm GIN indexes, ranked by word similarity.
+    A related field (e.g user__username) is matched in a subquery on its
+    own table, a join would stop Postgres from using the indexes. Numeric
+    queries also match the model's other SEARCH_FIELDS (the price), as
+    `qs_filter` does.
+    Falls back to plain `icontains` outside Postgres.
+    """
+
+    search_fields = search_fields or getattr(model, "TRIGRAM_SEARCH_FIELDS", ())
+
+    assert search_fields, "%s has no TRIGRAM_SEARCH_FIELDS" % model.__name__
+
+    qs = queryset if queryset is not None else model.objects.select_related("user")
+
+    if not query:
+        return qs.all()
+
+    q = Q()
+    for field in search_fields:
+        if LOOKUP_SEP in field:
+            relation, name = field.split(LOOKUP_SEP, 1)
+            related = model._meta.get_field(relation).related_model
+            matches = related._default_manager.filter(**{f"{name}__icontains": query})
+            q |= Q(**{f"{relation}__in": matches})
+        else:
+            q |= Q(**{f"{field}__icontains": query})
+
+    if query.replace(".", "", 1).isdigit():
+        for field in getattr(model, "SEARCH_FIELDS", ()):
+            if not isinstance(
+                model._meta.get_field(field), (models.CharField, models.TextField)
+            ):
+                q |= Q(**{f"{field}__icontains": query})
+
+    if connections[qs.db].vendor != "postgresql":
+        return qs.filter(q)
+
+    similarities = [TrigramWordSimilarity(query, field) for field in search_fields]
+    similarity = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+
+    return qs.filter(q).annotate(similarity=similarity).order_by("-similarity")
+
+
 class ModelSearchFilterBackend(BaseFilterBackend):
+    """
+    Search backend is picked with the view's `search_backend` attribute,
+    "icontains" (default), "trigram" or "vector".
+    """
 
     def filter_queryset(
         self, request: Request, queryset: QuerySet, view: View
@@ -76,10 +135,19 @@ class ModelSearchFilterBackend(BaseFilterBackend):
         search_fields = getattr(view, "filter_fields", None)
         model = queryset.model
 
+        search_backend = getattr(view, "search_backend", "icontains")
         if getattr(view, "use_vector_search", False):
-            return qs_vector_search(model, query)
-
-        return qs_filter(model, search_fields=search_fields, query=query)
+            search_backend = "vector"
+
+        match search_backend:
+            case "vector":
+                return qs_vector_search(model, query)
+            case "trigram":
+                return qs_trigram_search(
+                    model, search_fields=search_fields, query=query
+                )
+            case _:
+                return qs_filter(model, search_fields=search_fields, query=query)
 
     def get_query(self, request, search_query) -> Optional[str]:
 
@@ -73,7 +73,11 @@ class FormatChoiceField(ChoiceField):
         format = self.formats.get(value)
         if format is not None:
             return format
-        raise ValidationError(self.error_messages["invalid"])
+        raise ValidationError(
+            self.error_messages["invalid_choice"],
+            code="invalid_choice",
+            params={"value": value},
+        )
 
     def validate(self, value):
         Field.validate(self, value)
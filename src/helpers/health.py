@@ -0,0 +1,160 @@
+"""
+Readiness probes (beckings.views.readiness_check_view).
+
+Each probe runs in a worker thread and is given `HEALTH_CHECK_TIMEOUT`
+seconds. The whole report is reused for `HEALTH_CHECK_CACHE_SECONDS`, so
+a load balancer polling every worker costs one round of probes per
+interval, not one per poll.
+
+    database          SELECT 1 on every configured database
+    cache             set and get of a key, only when REDIS_URL is set
+    static_manifest   the staticfiles manifest loads and isn't empty
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+
+__all__ = ["ProbeResult", "HealthReport", "get_health_report"]
+
+
+class Skipped(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class ProbeResult:
+
+    ok: bool
+    ms: float
+    error: Optional[str] = None
+    skipped: bool = False
+
+    def as_dict(self) -> dict[str, Any]:
+        data = {"ok": self.ok, "ms": round(self.ms, 2)}
+        if self.error:
+            data["error"] = self.error
+        if self.skipped:
+            data["skipped"] = True
+        return data
+
+
+@dataclass(slots=True)
+class HealthReport:
+
+    checks: dict[str, ProbeResult] = field(default_factory=dict)
+    checked_at: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.checks.values())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "status": "ok" if self.ok else "fail",
+            "checks": {name: result.as_dict() for name, result in self.checks.items()},
+        }
+
+
+def probe_database() -> None:
+
+    try:
+        for alias in connections:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+    finally:
+        # probe threads are pooled, don't keep their connections open
+        connections.close_all()
+
+
+def probe_cache() -> None:
+
+    if not getattr(settings, "REDIS_URL", ""):
+        raise Skipped
+    key, value = "health_check:%s" % uuid.uuid4().hex, uuid.uuid4().hex
+    cache.set(key, value, 10)
+    if cache.get(key) != value:
+        raise RuntimeError("cache returned a different value")
+    cache.delete(key)
+
+
+def probe_static_manifest() -> None:
+
+    if not hasattr(staticfiles_storage, "load_manifest"):
+        raise Skipped
+    if not staticfiles_storage.load_manifest():
+        raise RuntimeError("staticfiles manifest is missing or empty")
+
+
+PROBES: dict[str, Callable[[], None]] = {
+    "database": probe_database,
+    "cache": probe_cache,
+    "static_manifest": probe_static_manifest,
+}
+
+_executor = ThreadPoolExecutor(max_workers=len(PROBES), thread_name_prefix="health")
+_lock = threading.Lock()
+_report: Optional[HealthReport] = None
+
+
+def run_probe(probe: Callable[[], None]) -> ProbeResult:
+
+    started = time.perf_counter()
+    try:
+        probe()
+    except Skipped:
+        return ProbeResult(True, (time.perf_counter() - started) * 1000, skipped=True)
+    except Exception as e:
+        return ProbeResult(False, (time.perf_counter() - started) * 1000, repr(e))
+    return ProbeResult(True, (time.perf_counter() - started) * 1000)
+
+
+def run_probes() -> HealthReport:
+
+    timeout = getattr(settings, "HEALTH_CHECK_TIMEOUT", 2.0)
+    futures = {
+        name: _executor.submit(run_probe, probe) for name, probe in PROBES.items()
+    }
+    deadline = time.monotonic() + timeout
+
+    report = HealthReport(checked_at=time.monotonic())
+    for name, future in futures.items():
+        try:
+            report.checks[name] = future.result(max(0, deadline - time.monotonic()))
+        except TimeoutError:
+            report.checks[name] = ProbeResult(
+                False, timeout * 1000, "timed out after %ss" % timeout
+            )
+    return report
+
+
+def get_health_report() -> HealthReport:
+    """The last report while it is fresh, new probes otherwise"""
+
+    global _report
+
+    max_age = getattr(settings, "HEALTH_CHECK_CACHE_SECONDS", 5)
+    with _lock:
+        if _report is None or time.monotonic() - _report.checked_at >= max_age:
+            _report = run_probes()
+        return _report
+
+
+def clear_health_report() -> None:
+
+    global _report
+
+    with _lock:
+        _report = None
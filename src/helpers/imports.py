@@ -0,0 +1,432 @@
+"""
+High throughput model imports.
+
+django-import-export handles one row at a time, an instance lookup per row
+on `import_id_fields` then a save(). `BulkImporter` works on chunks:
+
+    clean       coerce and validate every row with the model fields
+    match       fetch the keys already in the table, one query per chunk
+    write       bulk_create the new rows, bulk_update the known ones
+
+Cleaning is pure python and usually the bulk of the work, with `workers`
+the chunks are cleaned in a process pool while the main process keeps
+writing the ones already done, in file order.
+
+Example:
+    >>> importer = BulkImporter(Product, ("product_name", "price"), ("product_name",))
+    >>> result = importer.run(read_rows("catalog.xlsx"), defaults={"user": user}, workers=4)
+    >>> result.created, result.updated, result.errors
+"""
+
+from __future__ import annotations
+
+import csv
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from django.core.exceptions import ValidationError
+from django.db import connections, models, transaction
+from django.utils.timezone import now
+
+
+__all__ = ["RowError", "ImportResult", "BulkImporter", "read_rows"]
+
+DEFAULT_CHUNK_SIZE = 1000
+# the line of the first row in a file, under its header
+FIRST_LINE = 2
+
+TRUE_VALUES = frozenset(("1", "t", "true", "y", "yes", "on"))
+FALSE_VALUES = frozenset(("0", "f", "false", "n", "no", "off"))
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def read_rows(path: str | Path, format: Optional[str] = None) -> Iterator[dict]:
+    """
+    Rows of a csv, tsv or xlsx file as dicts keyed by the header row,
+    read lazily so the whole file is never held in memory.
+    """
+    path = Path(path)
+    format = (format or path.suffix.lstrip(".")).lower()
+
+    match format:
+        case "csv" | "tsv":
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                yield from csv.DictReader(f, delimiter="\t" if format == "tsv" else ",")
+        case "xlsx":
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(path, read_only=True, data_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                headers = [
+                    str(h).strip() if h is not None else "" for h in next(rows, ())
+                ]
+                for values in rows:
+                    if any(value is not None for value in values):
+                        yield dict(zip(headers, values))
+            finally:
+                workbook.close()
+        case _:
+            raise ValueError("Unsupported import format %r." % format)
+
+
+@dataclass(frozen=True, slots=True)
+class RowError:
+
+    # as an editor shows the file, counting the header
+    line: int
+    errors: dict[str, list[str]]
+
+    def __str__(self) -> str:
+        return "line %s: %s" % (
+            self.line,
+            "; ".join(
+                "%s: %s" % (name, " ".join(messages))
+                for name, messages in self.errors.items()
+            ),
+        )
+
+
+@dataclass(slots=True)
+class ImportResult:
+
+    total: int = 0
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: list[RowError] = field(default_factory=list)
+
+    @property
+    def has_errors(self) -> bool:
+        return bool(self.errors)
+
+    def write_error_report(self, file: TextIO) -> None:
+        """One csv line per invalid field: line, field, message"""
+        writer = csv.writer(file)
+        writer.writerow(("line", "field", "error"))
+        for error in sorted(self.errors, key=lambda error: error.line):
+            for name, messages in error.errors.items():
+                writer.writerow((error.line, name, " ".join(messages)))
+
+
+def supports_update_from(connection) -> bool:
+    if connection.vendor == "sqlite":
+        # UPDATE ... FROM came with SQLite 3.33, Django runs on 3.31
+        return connection.Database.sqlite_version_info >= (3, 33)
+    return connection.vendor == "postgresql"
+
+
+def _init_worker() -> None:
+    # spawned workers (macOS, Windows) start without django set up
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _clean_chunk(importer: BulkImporter, rows: list[dict], start: int):
+    return importer.clean_rows(rows, start)
+
+
+class BulkImporter:
+    """
+    `fields` are the columns read from each row, `key_fields` identify an
+    existing row. Rows matching an existing key update the other fields,
+    or are skipped when every field is part of the key.
+    """
+
+    def __init__(
+        self,
+        model: type[models.Model],
+        fields: Iterable[str],
+        key_fields: Iterable[str],
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+
+        self.model = model
+        self.fields = tuple(fields)
+        self.key_fields = tuple(key_fields)
+        self.chunk_size = int(chunk_size)
+
+        assert self.key_fields, "key_fields can't be empty."
+        assert set(self.key_fields) <= set(self.fields)
+        assert self.chunk_size > 0
+
+    @property
+    def update_fields(self) -> list[str]:
+        return [name for name in self.fields if name not in self.key_fields]
+
+    def clean_value(self, model_field: models.Field, value: Any) -> Any:
+
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ""):
+            if model_field.has_default():
+                return model_field.get_default()
+            value = None if model_field.null else ""
+        elif isinstance(model_field, models.BooleanField) and isinstance(value, str):
+            lowered = value.lower()
+            if lowered in TRUE_VALUES:
+                value = True
+            elif lowered in FALSE_VALUES:
+                value = False
+        # to_python, then the field validators
+        return model_field.clean(value, None)
+
+    def clean_rows(
+        self, rows: Iterable[dict[str, Any]], start: int = FIRST_LINE
+    ) -> tuple[list[tuple[int, dict[str, Any]]], list[RowError]]:
+        """
+        (line, values) for the valid rows and the errors of the others.
+        No database access, chunks can be cleaned in other processes.
+        """
+
+        opts = self.model._meta
+        model_fields = [(name, opts.get_field(name)) for name in self.fields]
+        cleaned, errors = [], []
+
+        for line, row in enumerate(rows, start):
+            values, row_errors = {}, {}
+            for name, model_field in model_fields:
+                try:
+                    values[name] = self.clean_value(model_field, row.get(name))
+                except ValidationError as e:
+                    row_errors[name] = e.messages
+            if row_errors:
+                errors.append(RowError(line, row_errors))
+            else:
+                cleaned.append((line, values))
+        return cleaned, errors
+
+    def get_key(self, values: dict[str, Any]) -> tuple:
+        # NULL and "" are the same key
+        return tuple(
+            "" if (value := values[name]) is None else value for name in self.key_fields
+        )
+
+    def existing_rows(self, keys: Iterable[tuple]) -> dict[tuple, dict[str, Any]]:
+        """
+        key -> current values (and pk) for the keys already in the table.
+        The first key field narrows the query, the rest is matched in python.
+        """
+        keys = set(keys)
+        if not keys:
+            return {}
+
+        first = self.key_fields[0]
+        rows = (
+            self.model._default_manager.filter(
+                **{"%s__in" % first: {key[0] for key in keys}}
+            )
+            .order_by()
+            .values("pk", *self.fields)
+        )
+        return {key: row for row in rows if (key := self.get_key(row)) in keys}
+
+    def build(self, values: dict[str, Any], defaults: dict[str, Any]) -> models.Model:
+        return self.model(**defaults, **values)
+
+    def before_write(self, objs: list[models.Model]) -> None:
+        """Hook, called with the new instances before bulk_create"""
+
+    def after_write(self, created: list[models.Model], updated: list[Any]) -> None:
+        """Hook, called with the created instances and the updated pks"""
+
+    def write(
+        self,
+        rows: list[tuple[int, dict[str, Any]]],
+        result: ImportResult,
+        defaults: dict[str, Any],
+        seen: dict[tuple, Any],
+    ) -> None:
+        """
+        `seen` maps the keys met so far to their pk, across chunks.
+        When a key repeats the last row wins, unchanged rows are skipped.
+        """
+
+        existing = self.existing_rows(
+            key for _, values in rows if (key := self.get_key(values)) not in seen
+        )
+        seen.update((key, row["pk"]) for key, row in existing.items())
+        update_fields = self.update_fields
+
+        new, changed = {}, {}
+        for _, values in rows:
+            key = self.get_key(values)
+            current = existing.get(key)
+            if key not in seen:
+                result.skipped += key in new
+                new[key] = values
+            elif not update_fields or (
+                current is not None
+                and all(current[name] == values[name] for name in update_fields)
+            ):
+                result.skipped += 1
+            else:
+                changed[seen[key]] = values
+
+        objs = [self.build(values, defaults) for values in new.values()]
+        self.before_write(objs)
+        self.model._default_manager.bulk_create(objs, batch_size=self.chunk_size)
+        seen.update(zip(new, (obj.pk for obj in objs)))
+        self.update_rows(changed)
+
+        result.created += len(objs)
+        result.updated += len(changed)
+        self.after_write(objs, list(changed))
+
+    @property
+    def auto_now_fields(self) -> list[models.Field]:
+        return [
+            f for f in self.model._meta.concrete_fields if getattr(f, "auto_now", False)
+        ]
+
+    def update_rows(self, changed: dict[Any, dict[str, Any]]) -> None:
+        """
+        pk -> values. One UPDATE ... FROM (VALUES ...) per batch on Postgres
+        and SQLite 3.33+, Django's CASE WHEN based bulk_update elsewhere is
+        much slower to build.
+        """
+        if not changed:
+            return
+
+        manager = self.model._default_manager
+        connection = connections[manager.db]
+        opts = self.model._meta
+        fields = [opts.get_field(name) for name in self.update_fields]
+        auto_now = self.auto_now_fields
+        timestamp = now()
+
+        if not supports_update_from(connection):
+            objs = []
+            for pk, values in changed.items():
+                obj = self.model(pk=pk, **values)
+                # bulk_update skips pre_save
+                for f in auto_now:
+                    setattr(obj, f.attname, timestamp)
+                objs.append(obj)
+            manager.bulk_update(
+                objs,
+                [f.name for f in (*fields, *auto_now)],
+                batch_size=self.chunk_size,
+            )
+            return
+
+        quote_name = connection.ops.quote_name
+        table = quote_name(opts.db_table)
+        pk_field = opts.pk
+        columns = [pk_field, *fields]
+
+        if connection.vendor == "postgresql":
+            placeholder = "(%s)" % ", ".join(
+                "%%s::%s" % f.cast_db_type(connection) for f in columns
+            )
+            alias = "v(%s)" % ", ".join(quote_name(f.column) for f in columns)
+            refs = ["v.%s" % quote_name(f.column) for f in columns]
+        else:
+            # sqlite names VALUES columns column1, column2, ...
+            placeholder = "(%s)" % ", ".join(["%s"] * len(columns))
+            alias = "v"
+            refs = ["v.column%s" % i for i in range(1, len(columns) + 1)]
+
+        assignments = [
+            "%s = %s" % (quote_name(f.column), ref) for f, ref in zip(fields, refs[1:])
+        ]
+        assignments += ["%s = %%s" % quote_name(f.column) for f in auto_now]
+        auto_now_params = [f.get_db_prep_save(timestamp, connection) for f in auto_now]
+
+        batch_size = min(
+            self.chunk_size,
+            connection.ops.bulk_batch_size([*columns, *auto_now], list(changed))
+            or self.chunk_size,
+        )
+        with connection.cursor() as cursor:
+            for batch in chunked(changed.items(), batch_size):
+                params = [
+                    f.get_db_prep_save(
+                        pk if f is pk_field else values[f.name], connection
+                    )
+                    for pk, values in batch
+                    for f in columns
+                ]
+                cursor.execute(
+                    "UPDATE %s SET %s FROM (VALUES %s) AS %s WHERE %s.%s = %s"
+                    % (
+                        table,
+                        ", ".join(assignments),
+                        ", ".join([placeholder] * len(batch)),
+                        alias,
+                        table,
+                        quote_name(pk_field.column),
+                        refs[0],
+                    ),
+                    auto_now_params + params,
+                )
+
+    def clean_chunks(
+        self, rows: Iterable[dict[str, Any]], workers: int = 1
+    ) -> Iterator[tuple[int, list, list[RowError]]]:
+        """
+        (row count, cleaned, errors) per chunk, in order. With more than one
+        worker the chunks are cleaned in a process pool, at most two per
+        worker are in flight so memory stays bounded.
+        """
+        chunks = enumerate(chunked(rows, self.chunk_size))
+
+        if workers <= 1:
+            for index, chunk in chunks:
+                start = index * self.chunk_size + FIRST_LINE
+                yield len(chunk), *self.clean_rows(chunk, start)
+            return
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+            pending = deque()
+            for index, chunk in chunks:
+                start = index * self.chunk_size + FIRST_LINE
+                future = executor.submit(_clean_chunk, self, chunk, start)
+                pending.append((len(chunk), future))
+                if len(pending) >= workers * 2:
+                    count, future = pending.popleft()
+                    yield count, *future.result()
+            while pending:
+                count, future = pending.popleft()
+                yield count, *future.result()
+
+    def run(
+        self,
+        rows: Iterable[dict[str, Any]],
+        *,
+        defaults: Optional[dict[str, Any]] = None,
+        dry_run: bool = False,
+        raise_errors: bool = False,
+        workers: int = 1,
+    ) -> ImportResult:
+        """
+        Import `rows` (dicts keyed by field name) chunk by chunk in a single
+        transaction. Invalid rows are reported and left out; with
+        `raise_errors` any invalid row rolls the whole import back.
+        """
+        result = ImportResult()
+        defaults = defaults or {}
+        seen: dict[tuple, Any] = {}
+
+        with transaction.atomic():
+            for count, cleaned, errors in self.clean_chunks(rows, workers):
+                result.total += count
+                result.errors.extend(errors)
+                self.write(cleaned, result, defaults, seen)
+
+            if dry_run or (raise_errors and result.has_errors):
+                transaction.set_rollback(True)
+        return result
@@ -0,0 +1,257 @@
+"""
+In-process metrics, served in the Prometheus text format at /metrics/.
+
+    >>> orders_placed.inc(source="checkout")
+    >>> with cache_seconds.time(cache="product_detail"):
+    ...     cache.get(key)
+
+Every metric keeps its samples in a dict under its own lock, recording
+one is a dict lookup and an addition. Values live in the process, so
+each worker is scraped on its own (the usual gunicorn setup labels them
+by instance).
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from .middleware import get_view_name
+
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "registry",
+    "render",
+    "MetricsMiddleware",
+]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], **extra) -> str:
+
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{%s}" % ",".join('%s="%s"' % pair for pair in escaped)
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], Any] = {}
+        registry.register(self)
+
+    def key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+
+        lines = [
+            "# HELP %s %s" % (self.name, self.help),
+            "# TYPE %s %s" % (self.name, self.type),
+        ]
+        with self._lock:
+            lines.extend(self.samples())
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self.key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield "%s%s %s" % (
+                self.name,
+                format_labels(self.labels, key),
+                format_value(value),
+            )
+
+
+class Histogram(Metric):
+
+    type = "histogram"
+
+    def __init__(self, *args: Any, buckets=DEFAULT_BUCKETS, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+
+        key = self.key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if (entry := self._values.get(key)) is None:
+                # per bucket counts (not cumulative), +Inf last, then sum
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(self.key(labels))
+        return sum(entry[:-1]) if entry else 0
+
+    def samples(self) -> Iterator[str]:
+
+        for key, entry in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), entry[:-1]):
+                cumulative += count
+                yield "%s_bucket%s %d" % (
+                    self.name,
+                    format_labels(self.labels, key, le=format_value(bound)),
+                    cumulative,
+                )
+            labels = format_labels(self.labels, key)
+            yield "%s_sum%s %s" % (self.name, labels, format_value(entry[-1]))
+            yield "%s_count%s %d" % (self.name, labels, cumulative)
+
+
+class Registry:
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        assert metric.name not in self._metrics, "%s already exists" % metric.name
+        self._metrics[metric.name] = metric
+
+    def __getitem__(self, name: str) -> Metric:
+        return self._metrics[name]
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+registry = Registry()
+
+
+def render() -> str:
+    return registry.render()
+
+
+request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by URL name",
+    labels=("view", "method"),
+)
+requests_total = Counter(
+    "http_requests_total",
+    "Responses by URL name and status code",
+    labels=("view", "method", "status"),
+)
+db_seconds = Histogram(
+    "db_query_duration_seconds",
+    "Time spent in SQL per request, by URL name",
+    labels=("view",),
+)
+db_queries = Counter("db_queries_total", "SQL queries by URL name", labels=("view",))
+cache_seconds = Histogram(
+    "cache_operation_duration_seconds",
+    "Cache lookups by cache",
+    labels=("cache",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+orders_placed = Counter("orders_placed_total", "Orders placed", labels=("source",))
+order_stockouts = Counter(
+    "order_stockouts_total",
+    "Orders turned down for lack of stock",
+    labels=("source",),
+)
+token_cache = Counter(
+    "api_token_cache_total",
+    "API token lookups by result (local, shared, miss)",
+    labels=("result",),
+)
+auth_failures = Counter(
+    "api_auth_failures_total", "Rejected API tokens by reason", labels=("reason",)
+)
+
+
+# any other method is counted as "other", the label values stay bounded
+METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+def get_method_label(request: HttpRequest) -> str:
+    return request.method if request.method in METHODS else "other"
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Times every request by URL name. Put it before QueryCountMiddleware
+    to also get the SQL time of each view.
+    """
+
+    def process_request(self, request: HttpRequest) -> None:
+        request._metrics_started = time.perf_counter()
+
+    def process_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+
+        if (started := getattr(request, "_metrics_started", None)) is None:
+            return response
+        elapsed = time.perf_counter() - started
+
+        view = get_view_name(request)
+        method = get_method_label(request)
+        request_seconds.observe(elapsed, view=view, method=method)
+        requests_total.inc(view=view, method=method, status=response.status_code)
+        if (counter := getattr(request, "query_counter", None)) is not None:
+            db_seconds.observe(counter.seconds, view=view)
+            db_queries.inc(counter.count, view=view)
+        return response
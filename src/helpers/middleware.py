@@ -0,0 +1,173 @@
+"""
+Per request database instrumentation.
+
+`QueryCountMiddleware` wraps every database connection with
+`connection.execute_wrapper()` while a request runs, counting queries,
+SQL time and repeated statements. Totals are kept per view name in
+`query_stats` (served by beckings.views.query_stats_view) and a request
+that runs one statement `QUERY_COUNT_DUPLICATE_THRESHOLD` times or more
+is logged as an N+1 suspect.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, asdict
+from typing import Any
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+
+__all__ = ["QueryCounter", "QueryStats", "query_stats", "QueryCountMiddleware"]
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED = "<unresolved>"
+
+
+class QueryCounter:
+    """
+    `execute_wrapper` callable. Statements are told apart by their SQL
+    without the parameters, so an N+1 loop shows up as one entry.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+        self.slow: list[tuple[str, float]] = []
+        self.slow_threshold = getattr(settings, "SLOW_QUERY_THRESHOLD", 0.5)
+
+    def __call__(self, execute, sql, params, many, context):
+
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            self.statements[sql] += 1
+            if elapsed >= self.slow_threshold:
+                self.slow.append((sql, elapsed))
+
+    @property
+    def duplicates(self) -> int:
+        """queries that repeated an earlier statement"""
+        return sum(n - 1 for n in self.statements.values())
+
+    def most_repeated(self) -> tuple[str, int]:
+        return self.statements.most_common(1)[0] if self.statements else ("", 0)
+
+
+@dataclass(slots=True)
+class ViewQueryStats:
+
+    requests: int = 0
+    queries: int = 0
+    duplicates: int = 0
+    seconds: float = 0.0
+    max_queries: int = 0
+    n_plus_one: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["queries_per_request"] = self.queries / self.requests
+        data["ms_per_request"] = self.seconds * 1000 / self.requests
+        return data
+
+
+class QueryStats:
+    """Totals per view name, for the life of the process"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._views: dict[str, ViewQueryStats] = {}
+
+    def add(self, view_name: str, counter: QueryCounter, n_plus_one: bool) -> None:
+
+        with self._lock:
+            stats = self._views.setdefault(view_name, ViewQueryStats())
+            stats.requests += 1
+            stats.queries += counter.count
+            stats.duplicates += counter.duplicates
+            stats.seconds += counter.seconds
+            stats.max_queries = max(stats.max_queries, counter.count)
+            stats.n_plus_one += n_plus_one
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+
+        with self._lock:
+            return {
+                name: stats.as_dict()
+                for name, stats in sorted(
+                    self._views.items(), key=lambda item: -item[1].queries
+                )
+            }
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._views.clear()
+
+
+query_stats = QueryStats()
+
+
+def get_view_name(request: HttpRequest) -> str:
+
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED
+    return match.view_name or match.route or UNRESOLVED
+
+
+class QueryCountMiddleware(MiddlewareMixin):
+    """
+    Both hooks run in the request's sync thread, under ASGI too, which is
+    where the async ORM runs its queries.
+    """
+
+    def process_request(self, request: HttpRequest) -> None:
+
+        counter = request.query_counter = QueryCounter()
+        stack = request._query_count_wrappers = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+
+    def process_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+
+        if (stack := getattr(request, "_query_count_wrappers", None)) is None:
+            return response
+        stack.close()
+        counter = request.query_counter
+
+        view_name = get_view_name(request)
+        sql, repeated = counter.most_repeated()
+        n_plus_one = repeated >= getattr(
+            settings, "QUERY_COUNT_DUPLICATE_THRESHOLD", 10
+        )
+        query_stats.add(view_name, counter, n_plus_one)
+
+        if n_plus_one:
+            logger.warning(
+                "N+1 suspect in %s: %d queries, one statement ran %d times: %s",
+                view_name,
+                counter.count,
+                repeated,
+                sql[:500],
+            )
+        for sql, elapsed in counter.slow:
+            logger.warning(
+                "Slow query in %s (%.0f ms): %s", view_name, elapsed * 1000, sql[:500]
+            )
+        return response
@@ -1,8 +1,10 @@
 from django.forms import formset_factory, modelformset_factory
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, Http404
 from django.views.generic.base import TemplateResponseMixin, ContextMixin, View
 from django.core.exceptions import ImproperlyConfigured
 
+from .pagination import CursorPaginator, InvalidCursor
+
 
 class FormsetMixin(TemplateResponseMixin, ContextMixin):
 
@@ -180,3 +182,46 @@ class ModelFormsetView(ModelFormsetMixin, View):
     def get(self, request, *args, **kwargs):
         context = self.get_context_data()
         return self.render_to_response(context)
+
+
+class CursorPaginationMixin:
+    """
+    ListView mixin, paginate with an opaque `?cursor=` token (keyset) instead
+    of `?page=N`. Set `pagination_mode = "page"` to fall back to the default
+    OFFSET paginator.
+
+    Example:
+        >>> class ProductListView(CursorPaginationMixin, ListView):
+        ...          paginate_by = 10
+        ...          cursor_ordering = ("-timestamp", "pk")
+    """
+
+    pagination_mode = "cursor"
+    cursor_kwarg = "cursor"
+    cursor_ordering = None
+    cursor_paginator_class = CursorPaginator
+
+    def get_cursor_ordering(self):
+        if (ordering := self.cursor_ordering) is not None:
+            return ordering
+        raise ImproperlyConfigured(
+            "%s.cursor_ordering must be defined." % self.__class__.__name__
+        )
+
+    def get_cursor_paginator(self, queryset, per_page):
+        return self.cursor_paginator_class(
+            queryset, per_page, self.get_cursor_ordering()
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+
+        if self.pagination_mode != "cursor":
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = self.get_cursor_paginator(queryset, page_size)
+        cursor = self.request.GET.get(self.cursor_kwarg) or None
+        try:
+            page = paginator.page(cursor)
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
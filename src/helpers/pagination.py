@@ -0,0 +1,267 @@
+"""Keyset (cursor) pagination helpers"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from django.db.models import Q, QuerySet
+from django.core.paginator import InvalidPage
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+__all__ = [
+    "InvalidCursor",
+    "CursorPage",
+    "CursorPaginator",
+    "KeysetPagination",
+    "RankedPagination",
+]
+
+DEFAULT_CURSOR_ORDERING = ("-timestamp", "pk")
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPage(Sequence):
+
+    def __init__(
+        self,
+        object_list: list,
+        paginator: CursorPaginator,
+        *,
+        cursor: Optional[str] = None,
+        next_cursor: Optional[str] = None,
+    ) -> None:
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __repr__(self) -> str:
+        return "<Cursor page %s>" % (self.cursor or "first")
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by seeking past the last row of the previous page
+    instead of using OFFSET. No COUNT query is issued and every page costs
+    the same, however deep.
+
+    `ordering` must be unique per row, e.g ("-timestamp", "pk").
+
+    Example:
+        >>> paginator = CursorPaginator(Product.objects.all(), 10, ("-timestamp", "pk"))
+        >>> page = paginator.page(request.GET.get("cursor"))
+        >>> page.next_cursor
+    """
+
+    def __init__(
+        self, object_list: QuerySet, per_page: int, ordering: Sequence[str]
+    ) -> None:
+
+        assert isinstance(object_list, QuerySet)
+        assert ordering, "ordering can't be empty."
+
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    @property
+    def fields(self) -> list[tuple[str, bool]]:
+        """(field name, descending) pairs"""
+        return [(f.lstrip("-"), f.startswith("-")) for f in self.ordering]
+
+    def _get_field(self, name: str):
+        opts = self.object_list.model._meta
+        return opts.pk if name == "pk" else opts.get_field(name)
+
+    def encode_cursor(self, obj: Any) -> str:
+        position = [
+            self._get_field(name).value_to_string(obj) for name, _ in self.fields
+        ]
+        return urlsafe_base64_encode(json.dumps(position).encode())
+
+    def decode_cursor(self, cursor: str) -> list[Any]:
+        try:
+            position = json.loads(urlsafe_base64_decode(cursor))
+            if not isinstance(position, list) or len(position) != len(self.fields):
+                raise ValueError(cursor)
+            return [
+                self._get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, position)
+            ]
+        except Exception as err:
+            raise InvalidCursor("Invalid cursor.") from err
+
+    def seek(self, position: list[Any]) -> Q:
+        """
+        Build the keyset condition for rows after `position`, e.g
+        (timestamp < t) OR (timestamp = t AND pk > p)
+        """
+        q = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = "lt" if descending else "gt"
+            condition = Q(**{f"{name}__{lookup}": position[index]})
+            for prev_index, (prev_name, _) in enumerate(self.fields[:index]):
+                condition &= Q(**{prev_name: position[prev_index]})
+            q |= condition
+        return q
+
+    def page(self, cursor: Optional[str] = None) -> CursorPage:
+
+        qs = self.object_list.order_by(*self.ordering)
+        if cursor:
+            qs = qs.filter(self.seek(self.decode_cursor(cursor)))
+
+        # one extra row tells us whether there is a next page
+        object_list = list(qs[: self.per_page + 1])
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[: self.per_page]
+            next_cursor = self.encode_cursor(object_list[-1])
+
+        return CursorPage(object_list, self, cursor=cursor, next_cursor=next_cursor)
+
+    async def apage(self, cursor: Optional[str] = None) -> CursorPage:
+        """`page()` with the async ORM"""
+
+        qs = self.object_list.order_by(*self.ordering)
+        if cursor:
+            qs = qs.filter(self.seek(self.decode_cursor(cursor)))
+
+        object_list = [obj async for obj in qs[: self.per_page + 1]]
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[: self.per_page]
+            next_cursor = self.encode_cursor(object_list[-1])
+
+        return CursorPage(object_list, self, cursor=cursor, next_cursor=next_cursor)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Rest framework pagination backed by `CursorPaginator`, forward only.
+    """
+
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering = DEFAULT_CURSOR_ORDERING
+    paginator_class = CursorPaginator
+
+    def paginate_queryset(self, queryset, request, view=None) -> Optional[list]:
+
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        paginator = self.paginator_class(queryset, self.page_size, self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param) or None
+        try:
+            self.page = paginator.page(cursor)
+        except InvalidCursor as e:
+            raise NotFound(str(e))
+        return list(self.page)
+
+    def get_page_size(self, request) -> int:
+
+        if self.page_size_query_param:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+            except (KeyError, ValueError):
+                pass
+            else:
+                if page_size > 0:
+                    return min(page_size, self.max_page_size or page_size)
+        return self.page_size
+
+    def get_next_link(self) -> Optional[str]:
+
+        if not self.page.has_next():
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.page.next_cursor
+        )
+
+    def get_paginated_response(self, data) -> Response:
+
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema) -> dict[str, Any]:
+
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view) -> list[dict[str, Any]]:
+
+        parameters = [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            }
+        ]
+        if self.page_size_query_param:
+            parameters.append(
+                {
+                    "name": self.page_size_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Number of results to return per page.",
+                    "schema": {"type": "integer"},
+                }
+            )
+        return parameters
+
+
+class RankedPagination(PageNumberPagination):
+    """
+    Offset pages in the queryset's own order, for ranked search results
+    that a keyset ordering would reorder. Answers in the shape of
+    `KeysetPagination`.
+    """
+
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = "page_size"
+
+    def get_paginated_response(self, data) -> Response:
+
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema) -> dict[str, Any]:
+
+        return KeysetPagination.get_paginated_response_schema(self, schema)
@@ -0,0 +1,143 @@
+"""
+Batched deletes for maintenance commands (delete_token, delete_inactive_users).
+
+One `queryset.delete()` over a large table holds its locks for the whole
+run and collects every related row first. `BatchPurge` walks the primary
+key instead and deletes one range at a time, each in its own short
+transaction, with an optional pause between batches:
+
+    >>> purge = BatchPurge(Token.objects.filter(expired_at__lte=now()))
+    >>> report = purge.run()
+    >>> report.rows, report.rate
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+
+
+__all__ = ["BatchPurge", "PurgeReport"]
+
+
+def get_chunk_size() -> int:
+    return getattr(settings, "PURGE_CHUNK_SIZE", 1000)
+
+
+def get_sleep() -> float:
+    return getattr(settings, "PURGE_SLEEP", 0.0)
+
+
+@dataclass(slots=True)
+class PurgeReport:
+
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    dry_run: bool = False
+    # rows deleted per model, cascades included
+    deleted: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rate(self) -> float:
+        """rows per second"""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        if self.dry_run:
+            return "%d rows in %d batches (dry run)" % (self.rows, self.batches)
+        return "%d rows in %d batches, %.1fs, %.0f rows/s" % (
+            self.rows,
+            self.batches,
+            self.seconds,
+            self.rate,
+        )
+
+
+class BatchPurge:
+    """
+    Delete the rows of `queryset` in primary key ranges of `chunk_size`,
+    sleeping `sleep` seconds between batches. `callback(report)` is
+    called after each batch.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        *,
+        chunk_size: Optional[int] = None,
+        sleep: Optional[float] = None,
+        callback: Optional[Callable[[PurgeReport], Any]] = None,
+    ) -> None:
+
+        self.queryset = queryset.order_by()
+        self.chunk_size = chunk_size or get_chunk_size()
+        self.sleep = get_sleep() if sleep is None else sleep
+        self.callback = callback
+
+        assert self.chunk_size > 0
+
+    def ranges(self) -> Iterator[tuple[Any, Any]]:
+        """
+        (lower, upper) primary key bounds, lower exclusive and upper
+        inclusive, each holding at most `chunk_size` matching rows.
+        """
+
+        lower = None
+        while True:
+            queryset = self.queryset
+            if lower is not None:
+                queryset = queryset.filter(pk__gt=lower)
+            pks = queryset.order_by("pk").values_list("pk", flat=True)
+            upper = next(iter(pks[self.chunk_size - 1 : self.chunk_size]), None)
+            if upper is None:
+                # the last, partial range
+                upper = pks.reverse().first()
+                if upper is None:
+                    return
+                yield lower, upper
+                return
+            yield lower, upper
+            lower = upper
+
+    def get_range(self, lower: Any, upper: Any) -> QuerySet:
+
+        queryset = self.queryset.filter(pk__lte=upper)
+        if lower is not None:
+            queryset = queryset.filter(pk__gt=lower)
+        return queryset
+
+    def count(self) -> PurgeReport:
+        """What `run()` would delete"""
+
+        rows = self.queryset.count()
+        return PurgeReport(rows=rows, batches=-(-rows // self.chunk_size), dry_run=True)
+
+    def run(self) -> PurgeReport:
+
+        report = PurgeReport()
+        model = self.queryset.model._meta.label
+        started = time.monotonic()
+
+        for lower, upper in self.ranges():
+            if report.batches and self.sleep:
+                time.sleep(self.sleep)
+
+            with transaction.atomic(using=self.queryset.db):
+                _, deleted = self.get_range(lower, upper).delete()
+
+            report.batches += 1
+            report.rows += deleted.get(model, 0)
+            for label, count in deleted.items():
+                report.deleted[label] = report.deleted.get(label, 0) + count
+            report.seconds = time.monotonic() - started
+            if self.callback is not None:
+                self.callback(report)
+
+        report.seconds = time.monotonic() - started
+        return report
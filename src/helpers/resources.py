@@ -1,17 +1,43 @@
 from typing import Any
 
 from tablib import Dataset
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from import_export.fields import Field
 from import_export.resources import ModelResource
 from import_export.widgets import ForeignKeyWidget
 
 from products.models import Product
+from products.availability import refresh_availability
+from products.cache import invalidate_product_detail
+from helpers.imports import BulkImporter, ImportResult
+from helpers.search_index import get_search_index
 
 
 User = get_user_model()
 
 
+class ProductImporter(BulkImporter):
+    """
+    `BulkImporter` plus what Product.save() and its receivers would do:
+    slugs, the search vector / index, the detail and availability caches.
+    """
+
+    def before_write(self, objs: list[Product]) -> None:
+        Product._meta.get_field("product_slug").populate(objs)
+
+    def after_write(self, created: list[Product], updated: list[Any]) -> None:
+        pks = [obj.pk for obj in created] + updated
+        products = Product.objects.filter(pk__in=pks)
+        Product.objects.update_search_vector(products)
+        if (index := get_search_index(Product)) is not None:
+            # the rows written, not the whole catalog
+            index.update_many(products.only(*index.fields))
+        for pk in updated:
+            invalidate_product_detail(pk)
+        refresh_availability(pks)
+
+
 class ProductResource(ModelResource):
 
     class Meta:
@@ -25,6 +51,28 @@ class ProductResource(ModelResource):
             "quantity",
         )
 
+    @classmethod
+    def bulk_import(
+        cls,
+        rows,
+        *,
+        user,
+        key_fields=None,
+        chunk_size: int | None = None,
+        **kwargs: Any,
+    ) -> ImportResult:
+        """
+        High throughput import of `rows` (dicts), see `ProductImporter`.
+        `key_fields` default to `import_id_fields`.
+        """
+        importer = ProductImporter(
+            Product,
+            cls._meta.fields,
+            key_fields or cls._meta.import_id_fields,
+            chunk_size=chunk_size or cls._meta.batch_size,
+        )
+        return importer.run(rows, defaults={"user": user}, **kwargs)
+
     @classmethod
     def export_data(cls, queryset=None, **kwargs: Any) -> Dataset:
         export_fields = kwargs.pop("export_fields", None)
@@ -37,6 +85,17 @@ class ProductResource(ModelResource):
         instance.user = user
         return super().after_init_instance(instance, new, row, **kwargs)
 
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if self._is_dry_run(kwargs) or not self._meta.use_bulk:
+            # row by row saves already refreshed it (post_save)
+            return
+        # bulk writes skip post_save, refresh the new and updated rows here
+        updated = [row.object_id for row in result.valid_rows() if row.object_id]
+        Product.objects.update_search_vector(
+            Product.objects.filter(Q(search_vector__isnull=True) | Q(pk__in=updated))
+        )
+
 
 class OrderResource(ModelResource):
 
@@ -49,3 +108,6 @@ class OrderResource(ModelResource):
     class Meta:
         model = "products.Order"
         fields = ("order_id", "product", "product__price", "number_of_items", "status")
+
+    def get_queryset(self):
+        return super().get_queryset().select_related("product")
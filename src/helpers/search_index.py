@@ -0,0 +1,375 @@
+"""
+Product search index for databases without Postgres full-text search.
+
+`ProductManager.search` uses the stored tsvector on Postgres, everywhere
+else it asks `get_search_index()` for one of:
+
+    SQLiteFTS5SearchIndex   FTS5 virtual table next to the model table
+    InMemorySearchIndex     pure python inverted index, per process
+
+Both are kept current by the Product post_save / post_delete receivers.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import Case, FloatField, QuerySet, Value, When
+from django.utils.module_loading import import_string
+
+
+__all__ = [
+    "BaseSearchIndex",
+    "SQLiteFTS5SearchIndex",
+    "InMemorySearchIndex",
+    "get_search_index",
+]
+
+DEFAULT_LIMIT = 1000
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class BaseSearchIndex:
+
+    def __init__(
+        self,
+        model: type[models.Model],
+        fields: Optional[Iterable[str]] = None,
+        using: str = DEFAULT_DB_ALIAS,
+    ) -> None:
+        self.model = model
+        self.fields = tuple(fields or getattr(model, "SEARCH_FIELDS", ()))
+        self.using = using
+
+        assert self.fields, "%s has no SEARCH_FIELDS" % model.__name__
+
+    def document(self, obj: models.Model) -> list[str]:
+        return [
+            "" if (value := getattr(obj, field)) is None else str(value)
+            for field in self.fields
+        ]
+
+    def update(self, obj: models.Model) -> None:
+        raise NotImplementedError
+
+    def remove(self, pk: Any) -> None:
+        raise NotImplementedError
+
+    def update_many(self, objs: Iterable[models.Model]) -> None:
+        for obj in objs:
+            self.update(obj)
+
+    def rebuild(self) -> None:
+        raise NotImplementedError
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[tuple[Any, float]]:
+        """(pk, score) pairs, best match first"""
+        raise NotImplementedError
+
+    def filter_queryset(
+        self, queryset: QuerySet, query: Optional[str], limit: int = DEFAULT_LIMIT
+    ) -> QuerySet:
+
+        results = self.search(query or "", limit=limit)
+        if not results:
+            return queryset.none()
+
+        rank = Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in results],
+            output_field=FloatField(),
+        )
+        return (
+            queryset.filter(pk__in=[pk for pk, _ in results])
+            .annotate(rank=rank)
+            .order_by("-rank")
+        )
+
+
+class SQLiteFTS5SearchIndex(BaseSearchIndex):
+    """
+    FTS5 virtual table keyed by the model's rowid, ranked with bm25().
+    The table is created by migrations (products 0021).
+    """
+
+    @classmethod
+    def table_name(cls, model: type[models.Model]) -> str:
+        return "%s_fts" % model._meta.db_table
+
+    @classmethod
+    def is_available(cls, model: type[models.Model], using: str) -> bool:
+        connection = connections[using]
+        if connection.vendor != "sqlite":
+            return False
+        return cls.table_name(model) in connection.introspection.table_names()
+
+    @property
+    def table(self) -> str:
+        return connections[self.using].ops.quote_name(self.table_name(self.model))
+
+    def _columns(self) -> str:
+        quote_name = connections[self.using].ops.quote_name
+        return ", ".join(quote_name(field) for field in self.fields)
+
+    def update(self, obj: models.Model) -> None:
+
+        params = ", ".join(["%s"] * (len(self.fields) + 1))
+        with connections[self.using].cursor() as cursor:
+            cursor.execute("DELETE FROM %s WHERE rowid = %%s" % self.table, [obj.pk])
+            cursor.execute(
+                "INSERT INTO %s (rowid, %s) VALUES (%s)"
+                % (self.table, self._columns(), params),
+                [obj.pk, *self.document(obj)],
+            )
+
+    def remove(self, pk: Any) -> None:
+
+        with connections[self.using].cursor() as cursor:
+            cursor.execute("DELETE FROM %s WHERE rowid = %%s" % self.table, [pk])
+
+    def update_many(self, objs: Iterable[models.Model]) -> None:
+
+        objs = list(objs)
+        params = ", ".join(["%s"] * (len(self.fields) + 1))
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(
+                "DELETE FROM %s WHERE rowid = %%s" % self.table,
+                [[obj.pk] for obj in objs],
+            )
+            cursor.executemany(
+                "INSERT INTO %s (rowid, %s) VALUES (%s)"
+                % (self.table, self._columns(), params),
+                [[obj.pk, *self.document(obj)] for obj in objs],
+            )
+
+    def rebuild(self) -> None:
+
+        params = ", ".join(["%s"] * (len(self.fields) + 1))
+        rows = (
+            [pk, *("" if value is None else str(value) for value in values)]
+            for pk, *values in self.model._default_manager.using(self.using)
+            .values_list("pk", *self.fields)
+            .iterator()
+        )
+        with transaction.atomic(using=self.using):
+            with connections[self.using].cursor() as cursor:
+                cursor.execute("DELETE FROM %s" % self.table)
+                cursor.executemany(
+                    "INSERT INTO %s (rowid, %s) VALUES (%s)"
+                    % (self.table, self._columns(), params),
+                    rows,
+                )
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[tuple[Any, float]]:
+
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # every token is a quoted prefix, FTS5 operators can't be injected
+        match = " ".join('"%s"*' % token for token in tokens)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                "SELECT rowid, bm25(%s) FROM %s WHERE %s MATCH %%s "
+                "ORDER BY bm25(%s) LIMIT %%s"
+                % (self.table, self.table, self.table, self.table),
+                [match, limit],
+            )
+            # bm25() is negative, lower is better
+            return [(pk, -score) for pk, score in cursor.fetchall()]
+
+
+class InMemorySearchIndex(BaseSearchIndex):
+    """
+    Inverted index held in the process, BM25 ranked with prefix matching.
+    Built from the database on first search, then updated incrementally.
+    Every worker process keeps its own copy, so it suits single process
+    deployments, development and tests.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._lock = threading.RLock()
+        self._built = False
+        self._postings: dict[str, dict[Any, int]] = defaultdict(dict)
+        self._documents: dict[Any, dict[str, int]] = {}
+        self._lengths: dict[Any, int] = {}
+        self._total_length = 0
+        self._vocabulary: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _add(self, pk: Any, values: Iterable[str]) -> None:
+
+        self._remove(pk)
+        frequencies: dict[str, int] = defaultdict(int)
+        for value in values:
+            for token in tokenize(value):
+                frequencies[token] += 1
+
+        self._documents[pk] = dict(frequencies)
+        self._lengths[pk] = length = sum(frequencies.values())
+        self._total_length += length
+        for token, frequency in frequencies.items():
+            if token not in self._postings:
+                insort(self._vocabulary, token)
+            self._postings[token][pk] = frequency
+
+    def _remove(self, pk: Any) -> None:
+
+        self._total_length -= self._lengths.pop(pk, 0)
+        for token in self._documents.pop(pk, {}):
+            postings = self._postings[token]
+            postings.pop(pk, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary.pop(bisect_left(self._vocabulary, token))
+
+    def update(self, obj: models.Model) -> None:
+
+        pk, document = obj.pk, self.document(obj)
+
+        def _update() -> None:
+            with self._lock:
+                if not self._built:
+                    return
+                self._add(pk, document)
+
+        transaction.on_commit(_update, using=self.using)
+
+    def remove(self, pk: Any) -> None:
+
+        def _remove() -> None:
+            with self._lock:
+                self._remove(pk)
+
+        transaction.on_commit(_remove, using=self.using)
+
+    def rebuild(self) -> None:
+
+        rows = (
+            self.model._default_manager.using(self.using)
+            .values_list("pk", *self.fields)
+            .iterator()
+        )
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._lengths.clear()
+            self._total_length = 0
+            self._vocabulary.clear()
+            for pk, *values in rows:
+                self._add(pk, ("" if v is None else str(v) for v in values))
+            self._built = True
+
+    def _expand(self, token: str) -> list[str]:
+
+        vocabulary = self._vocabulary
+        index = bisect_left(vocabulary, token)
+        expanded = []
+        while index < len(vocabulary) and vocabulary[index].startswith(token):
+            expanded.append(vocabulary[index])
+            index += 1
+        return expanded
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[tuple[Any, float]]:
+
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            if not self._built:
+                self.rebuild()
+
+            total = len(self._documents)
+            if not total:
+                return []
+            average_length = self._total_length / total or 1
+
+            scores: Optional[dict[Any, float]] = None
+            for token in tokens:
+                token_scores: dict[Any, float] = defaultdict(float)
+                for term in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(
+                        1 + (total - len(postings) + 0.5) / (len(postings) + 0.5)
+                    )
+                    for pk, frequency in postings.items():
+                        length = self._lengths[pk]
+                        token_scores[pk] += (
+                            idf
+                            * frequency
+                            * (self.k1 + 1)
+                            / (
+                                frequency
+                                + self.k1
+                                * (1 - self.b + self.b * length / average_length)
+                            )
+                        )
+                # every token has to match
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        pk: score + token_scores[pk]
+                        for pk, score in scores.items()
+                        if pk in token_scores
+                    }
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+
+_indexes: dict[tuple[str, str], Optional[BaseSearchIndex]] = {}
+
+
+def get_search_index(
+    model: type[models.Model], using: str = DEFAULT_DB_ALIAS
+) -> Optional[BaseSearchIndex]:
+    """
+    Search index for `model` on database `using`, None on Postgres.
+    `SEARCH_INDEX_BACKEND` forces a backend class (dotted path).
+    """
+
+    key = (model._meta.label_lower, using)
+    if key in _indexes:
+        return _indexes[key]
+
+    backend = getattr(settings, "SEARCH_INDEX_BACKEND", None)
+    if backend is not None:
+        index_class = import_string(backend)
+    elif connections[using].vendor == "postgresql":
+        index_class = None
+    elif SQLiteFTS5SearchIndex.is_available(model, using):
+        index_class = SQLiteFTS5SearchIndex
+    else:
+        index_class = InMemorySearchIndex
+
+    index = _indexes[key] = index_class(model, using=using) if index_class else None
+    return index
+
+
+@receiver(setting_changed)
+def reset_search_indexes(*, setting: str, **kwargs: Any) -> None:
+    if setting in ("SEARCH_INDEX_BACKEND", "DATABASES"):
+        _indexes.clear()
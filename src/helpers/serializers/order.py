@@ -4,13 +4,12 @@ from typing import Any, NoReturn
 
 from rest_framework import serializers
 
-from django.db.models import Sum
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser, AbstractUser
 from django.utils.translation import gettext_lazy as _
 
-from products.order_utils import AddOrder
-from products.models import OrderProxy, Product
+from products.order_utils import AddOrder, OutOfStock, Checkout, CheckoutError
+from products.models import OrderProxy, Product, UserOrderStats
 from products.models import OrderStatusChoices
 from helpers.serializers import serializer_factory
 
@@ -78,12 +77,15 @@ class UserOrderCreateSerializer(serializers.Serializer):
 
         self.validate_item(product, data.get("number_of_items"))
         self.save_order(product, data)
-        qs = user.order_set.all()
+        stats = UserOrderStats.objects.get_for_user(user)
 
         kwargs["message"] = _("Added Item")
-        kwargs["item_count"] = qs.count()
+        # UserOrderStats leaves cancelled orders out: item_count is the
+        # number of the user's live orders and total_sum what they cost
+        # (unit price times items), not every order ever placed
+        kwargs["item_count"] = stats.order_count
 
-        kwargs["total_sum"] = qs.aggregate(total_sum=Sum("product__price"))["total_sum"]
+        kwargs["total_sum"] = stats.total_spend
 
         kwargs["user"] = {"username": user.username, "email": user.email}
         return self.returned_data(**kwargs)
@@ -131,8 +133,42 @@ class UserOrderCreateSerializer(serializers.Serializer):
 
         user = self.user
 
-        AddOrder(product_instance=product).create(user, data)
+        try:
+            AddOrder(product_instance=product).create(user, data)
+        except OutOfStock as e:
+            raise serializers.ValidationError(str(e))
 
     def returned_data(self, **kwargs: dict[Any, Any]) -> dict[Any, Any]:
         # TODO
         return kwargs
+
+
+class CheckoutItemSerializer(serializers.Serializer):
+
+    product_id = serializers.IntegerField(min_value=1)
+    number_of_items = serializers.IntegerField(min_value=1)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """
+    Order many products in one transaction, see `products.order_utils.Checkout`.
+    """
+
+    MAX_ITEMS = 100
+
+    items = CheckoutItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
+    manifest = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def create(self, validated_data: dict[str, Any]) -> list[OrderProxy]:
+
+        user = self.context["request"].user
+        lines = [
+            (item["product_id"], item["number_of_items"])
+            for item in validated_data["items"]
+        ]
+        try:
+            return Checkout(lines).create(user, manifest=validated_data["manifest"])
+        except CheckoutError as e:
+            raise serializers.ValidationError(
+                {"items": {str(pk): message for pk, message in e.errors.items()}}
+            )
@@ -8,10 +8,7 @@ from rest_framework import serializers
 from rest_framework.fields import CharField
 from rest_framework.exceptions import AuthenticationFailed
 
-from api.models import get_token_model
-
-
-Token = get_token_model()
+from api.backends import get_token_backend
 
 
 class PasswordField(CharField):
@@ -38,8 +35,7 @@ class TokenLoginSerializer(serializers.Serializer):
         if user is None:
             raise AuthenticationFailed("invaild credentials :(.")
         update_last_login(sender=None, user=user)
-        obj, _ = Token.objects.get_or_create(user=user)
-        data["token"] = obj.key
+        data["token"] = get_token_backend().issue(user)
         data["username"] = username
         return data
 
@@ -55,11 +51,7 @@ class TokenLogoutSerializer(serializers.Serializer):
     def validate(self, attrs: dict[str, Any]) -> dict[None, None]:
 
         token = attrs["token"]
-        try:
-            obj = Token.objects.get(key=token)
-        except Token.DoesNotExist:
+        if not get_token_backend().revoke(token):
             raise serializers.ValidationError("invalid token %s" % token)
-        else:
-            obj.delete()
 
         return {}
@@ -24,26 +24,55 @@ class ReadOnlyMixin:
 @action(description="%(verbose_name)s Delivered")
 def user_order_delivered_action(model_admin, request, queryset) -> None:
 
-    queryset.update(status=OrderStatusChoices.delivered.value)
-    model_admin.message_user(request, "Updated user order")
+    result = queryset.update_status(
+        OrderStatusChoices.delivered.value, user=request.user
+    )
+    model_admin.message_user(request, "Updated user orders: %s" % result)
 
 
 @action(description="%(verbose_name)s Pending")
 def user_order_pending_action(model_admin, request, queryset) -> None:
 
-    queryset.update(status=OrderStatusChoices.pending.value)
-    model_admin.message_user(request, "Updated user order")
+    result = queryset.update_status(OrderStatusChoices.pending.value, user=request.user)
+    model_admin.message_user(request, "Updated user orders: %s" % result)
 
 
 @action(description="%(verbose_name)s Cancelled")
 def user_order_cancelled_action(model_admin, request, queryset) -> None:
 
-    queryset.update(status=OrderStatusChoices.cancelled.value)
-    model_admin.message_user(request, "Updated user order")
+    result = queryset.update_status(
+        OrderStatusChoices.cancelled.value, user=request.user
+    )
+    model_admin.message_user(request, "Updated user orders: %s" % result)
 
 
 @action(description="%(verbose_name)s Trans-it")
 def user_order_in_transit_action(model_admin, request, queryset) -> None:
 
-    queryset.update(status=OrderStatusChoices.in_transit.value)
-    model_admin.message_user(request, "Updated user order")
+    result = queryset.update_status(
+        OrderStatusChoices.in_transit.value, user=request.user
+    )
+    model_admin.message_user(request, "Updated user orders: %s" % result)
+
+
+@action(description="Export selected %(verbose_name_plural)s in the background")
+def export_in_background_action(model_admin, request, queryset) -> None:
+    from django.utils.html import format_html
+
+    from .models import ExportJob
+
+    # checked against the formats by the admin's action_form (ExportActionForm)
+    format = request.POST.get("format") or "csv"
+    resource_class = model_admin.get_export_resource_classes(request)[0]
+    job = ExportJob.objects.create(
+        user=request.user,
+        resource="%s.%s" % (resource_class.__module__, resource_class.__qualname__),
+        format=format,
+        filters={"pk__in": [str(pk) for pk in queryset.values_list("pk", flat=True)]},
+    )
+    model_admin.message_user(
+        request,
+        format_html(
+            'Export queued, follow it <a href="{}">here</a>.', job.get_absolute_url()
+        ),
+    )
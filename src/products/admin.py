@@ -15,7 +15,7 @@ from import_export.admin import (
     ExportActionMixin,
 )
 from guardian.admin import GuardedModelAdminMixin
-from unfold.admin import ModelAdmin, GenericStackedInline
+from unfold.admin import ModelAdmin, GenericStackedInline, TabularInline
 
 from helpers import resources
 from .actions import (
@@ -23,8 +23,11 @@ from .actions import (
     user_order_delivered_action,
     user_order_cancelled_action,
     user_order_pending_action,
+    user_order_in_transit_action,
+    export_in_background_action,
 )
-from .models import Product, OrderProxy, Comment, Reply
+from .forms import ExportActionForm
+from .models import Product, OrderProxy, OrderStatusChange, Comment, Reply, ExportJob
 
 
 User = get_user_model()
@@ -83,6 +86,8 @@ class ProductAdmin(
     )
     resource_classes = (resources.ProductResource,)
     inlines = (CommentInline,)
+    actions = (export_in_background_action,)
+    action_form = ExportActionForm
 
     def get_queryset(self, request: HttpRequest) -> QuerySet:
         return super().get_queryset(request).select_related("user")
@@ -103,6 +108,18 @@ class ProductAdmin(
         return super().delete_model(request, obj)
 
 
+class OrderStatusChangeInline(TabularInline):
+
+    model = OrderStatusChange
+    fields = ("from_status", "to_status", "changed_by", "timestamp")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None) -> bool:
+        return False
+
+
 @admin.register(OrderProxy)
 class OrderAdmin(ReadOnlyMixin, ExportMixin, ModelAdmin):
 
@@ -118,8 +135,12 @@ class OrderAdmin(ReadOnlyMixin, ExportMixin, ModelAdmin):
     actions = (
         user_order_delivered_action,
         user_order_pending_action,
+        user_order_in_transit_action,
         user_order_cancelled_action,
+        export_in_background_action,
     )
+    action_form = ExportActionForm
+    inlines = (OrderStatusChangeInline,)
     exclude_fields = ("status",)
     resource_classes = (resources.OrderResource,)
 
@@ -130,3 +151,32 @@ class OrderAdmin(ReadOnlyMixin, ExportMixin, ModelAdmin):
             .select_related("user", "product")
             .order_by("-timestamp")
         )
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(ModelAdmin):
+
+    list_display = (
+        "user__username",
+        "resource",
+        "format",
+        "status",
+        "rows",
+        "timestamp",
+    )
+    list_filter = ("status", "format")
+    readonly_fields = (
+        "user",
+        "resource",
+        "format",
+        "filters",
+        "status",
+        "file",
+        "rows",
+        "error",
+        "started_at",
+        "finished_at",
+    )
+
+    def has_add_permission(self, request) -> bool:
+        return False
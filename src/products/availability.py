@@ -0,0 +1,131 @@
+"""
+Product availability snapshots for bulk stock reads
+(api.views.ProductAvailabilityView).
+
+Each product is cached as a compact tuple under
+
+    product_availability:<pk>
+
+holding (quantity, active, price, updated_at). Any write to a product's
+stock or price (saves, the F() updates of reservations, checkout and
+restocks, imports) reloads its entry once the transaction commits, so
+reads are served from the cache alone and misses are loaded together in
+one query. Ids without a product aren't cached, anyone can ask for them.
+
+The refresh is only seen by every worker through a shared cache (Redis).
+With a cache local to each process the entries live for
+`PRODUCT_AVAILABILITY_LOCAL_CACHE_TIMEOUT` seconds instead.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable, NamedTuple, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from helpers.caches import is_local_cache
+from helpers.metrics import cache_seconds
+
+
+__all__ = ["Availability", "get_availability", "refresh_availability"]
+
+AVAILABILITY_KEY = "product_availability:%s"
+FIELDS = ("quantity", "active", "price", "updated_at")
+
+
+def get_timeout() -> Optional[int]:
+    if is_local_cache():
+        # a refresh only reaches the worker that wrote, the others'
+        # copies have to run out quickly
+        return getattr(settings, "PRODUCT_AVAILABILITY_LOCAL_CACHE_TIMEOUT", 5)
+    return getattr(settings, "PRODUCT_AVAILABILITY_CACHE_TIMEOUT", 60 * 60)
+
+
+class Availability(NamedTuple):
+
+    quantity: int
+    active: bool
+    price: float
+    updated_at: datetime
+
+    @property
+    def in_stock(self) -> bool:
+        return self.active and self.quantity > 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**self._asdict(), "in_stock": self.in_stock}
+
+
+def load_availability(
+    pks: Iterable[Any], using: Optional[str] = None
+) -> dict[Any, Optional[Availability]]:
+    """Read from the database, None for the pks without a product"""
+
+    pks = list(pks)
+    product = apps.get_model("products", "Product")
+    rows = (
+        product._default_manager.using(using)
+        .filter(pk__in=pks)
+        .values_list("pk", *FIELDS)
+    )
+    found = {pk: Availability(*values) for pk, *values in rows}
+    return {pk: found.get(pk) for pk in pks}
+
+
+def store(entries: dict[Any, Optional[Availability]]) -> None:
+    """Write `entries`, the ones without a product are dropped"""
+
+    cache.set_many(
+        {AVAILABILITY_KEY % pk: tuple(value) for pk, value in entries.items() if value},
+        get_timeout(),
+    )
+    cache.delete_many(
+        [AVAILABILITY_KEY % pk for pk, value in entries.items() if not value]
+    )
+
+
+def fill(entries: dict[Any, Optional[Availability]]) -> None:
+    """
+    Cache what a miss read. add() never replaces an entry, one written by
+    a refresh since the read is newer than ours.
+    """
+    timeout = get_timeout()
+    for pk, value in entries.items():
+        if value is not None:
+            cache.add(AVAILABILITY_KEY % pk, tuple(value), timeout)
+
+
+def get_availability(pks: Iterable[Any]) -> dict[Any, Availability]:
+    """
+    The availability of the products `pks`, leaving out the ones that
+    don't exist.
+    """
+    keys = {AVAILABILITY_KEY % pk: pk for pk in pks}
+    with cache_seconds.time(cache="product_availability"):
+        cached = cache.get_many(keys)
+
+    entries = {keys[key]: Availability(*value) for key, value in cached.items()}
+    if missing := [pk for key, pk in keys.items() if key not in cached]:
+        loaded = load_availability(missing)
+        fill(loaded)
+        entries.update(loaded)
+    return {pk: value for pk, value in entries.items() if value is not None}
+
+
+def refresh_availability(pks: Iterable[Any], using: Optional[str] = None) -> None:
+    """
+    Reload the entries of `pks` once the current transaction commits,
+    in one query.
+    """
+    pks = list(pks)
+    if not pks:
+        return
+
+    def _refresh() -> None:
+        store(load_availability(pks, using=using))
+
+    transaction.on_commit(_refresh, using=using)
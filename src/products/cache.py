@@ -0,0 +1,167 @@
+"""
+Shared cache of the product detail object (ProductDetailView).
+
+The product is cached with its comments and replies, under a key
+carrying a per product version token:
+
+    product_detail:<pk>:<version>
+
+Only the rows' own field values go in, and of each author the id and
+username the page shows, never a whole User (password hash included).
+The instances are built back from them on a hit, the comments and
+replies as if prefetched.
+
+Saving or deleting a Product, Comment or Reply swaps the token (see the
+receivers in products.models), so stale entries are never read again
+and simply expire. Only a shared cache (Redis) carries the new token to
+every worker; with one local to each process the entries live for
+`PRODUCT_DETAIL_LOCAL_CACHE_TIMEOUT` seconds instead.
+"""
+
+from __future__ import annotations
+
+import uuid
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+
+from helpers.caches import is_local_cache
+from helpers.metrics import cache_seconds
+
+
+__all__ = [
+    "get_detail_version",
+    "aget_detail_version",
+    "invalidate_product_detail",
+    "get_cached_product_detail",
+]
+
+DETAIL_KEY = "product_detail:%s:%s"
+VERSION_KEY = "product_detail_version:%s"
+
+
+def get_timeout() -> Optional[int]:
+    if is_local_cache():
+        return getattr(settings, "PRODUCT_DETAIL_LOCAL_CACHE_TIMEOUT", 5)
+    return getattr(settings, "PRODUCT_DETAIL_CACHE_TIMEOUT", 60 * 15)
+
+
+def get_detail_version(pk: Any) -> str:
+
+    key = VERSION_KEY % pk
+    if (version := cache.get(key)) is None:
+        # add() so two concurrent misses agree on the same token
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_detail_version(pk: Any) -> str:
+
+    key = VERSION_KEY % pk
+    if (version := await cache.aget(key)) is None:
+        await cache.aadd(key, uuid.uuid4().hex, None)
+        version = await cache.aget(key)
+    return version
+
+
+def invalidate_product_detail(pk: Any, using: Optional[str] = None) -> None:
+    """
+    Swap the version token once the current transaction commits.
+    """
+
+    def _invalidate() -> None:
+        cache.set(VERSION_KEY % pk, uuid.uuid4().hex, None)
+
+    transaction.on_commit(_invalidate, using=using)
+
+
+def dump_row(obj: models.Model) -> dict[str, Any]:
+    return {f.attname: getattr(obj, f.attname) for f in obj._meta.concrete_fields}
+
+
+def dump_author(obj: models.Model) -> dict[str, Any]:
+    return {"pk": obj.user_id, "username": obj.user.username}
+
+
+def load_row(model: type[models.Model], row: dict[str, Any], author: dict, db: str):
+
+    obj = model.from_db(db, list(row), list(row.values()))
+    user = get_user_model()
+    # the rest of the author is deferred, loaded if anything asks
+    obj.user = user.from_db(
+        db, [user._meta.pk.attname, "username"], [author["pk"], author["username"]]
+    )
+    return obj
+
+
+def set_prefetched(obj: models.Model, name: str, related: list) -> None:
+    """What prefetch_related() leaves behind for `obj.<name>.all()`"""
+
+    queryset = getattr(obj, name).all()
+    queryset._result_cache, queryset._prefetch_done = related, True
+    obj._prefetched_objects_cache = {
+        **getattr(obj, "_prefetched_objects_cache", {}),
+        name: queryset,
+    }
+
+
+def dump_product_detail(obj: models.Model) -> dict[str, Any]:
+    return {
+        "product": dump_row(obj),
+        "user": dump_author(obj),
+        "comments": [
+            {
+                "comment": dump_row(comment),
+                "user": dump_author(comment),
+                "replies": [
+                    {"reply": dump_row(reply), "user": dump_author(reply)}
+                    for reply in comment.replies.all()
+                ],
+            }
+            for comment in obj.comments.all()
+        ],
+    }
+
+
+def load_product_detail(model: type[models.Model], entry: dict, db: str):
+
+    comment_model = model._meta.get_field("comments").related_model
+    reply_model = comment_model._meta.get_field("replies").related_model
+
+    obj = load_row(model, entry["product"], entry["user"], db)
+    comments = []
+    for item in entry["comments"]:
+        comment = load_row(comment_model, item["comment"], item["user"], db)
+        replies = [
+            load_row(reply_model, reply["reply"], reply["user"], db)
+            for reply in item["replies"]
+        ]
+        set_prefetched(comment, "replies", replies)
+        comments.append(comment)
+    set_prefetched(obj, "comments", comments)
+    return obj
+
+
+def get_cached_product_detail(pk: Any, queryset: models.QuerySet) -> Optional[Any]:
+    """
+    The product `pk` from `queryset`, served from the cache when possible.
+    None when it doesn't exist. `queryset` has to load the product's user
+    and its comments and replies with their users.
+    """
+
+    with cache_seconds.time(cache="product_detail"):
+        key = DETAIL_KEY % (pk, get_detail_version(pk))
+        entry = cache.get(key)
+    if entry is not None:
+        return load_product_detail(queryset.model, entry, queryset.db)
+
+    try:
+        obj = queryset.get(pk=pk)
+    except queryset.model.DoesNotExist:
+        return None
+    cache.set(key, dump_product_detail(obj), get_timeout())
+    return obj
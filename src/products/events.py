@@ -0,0 +1,42 @@
+"""
+Order status events, one broker channel per user (helpers.broker).
+
+Published by products.transitions (`Order.cancel`, the admin actions)
+once the transaction commits, streamed by products.views.order_events_view.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from helpers.broker import publish_many
+
+
+__all__ = ["order_channel", "publish_order_status"]
+
+
+def order_channel(user_id: Any) -> str:
+    return "orders:%s" % user_id
+
+
+def publish_order_status(
+    orders: Iterable[tuple[Any, Any]], status: str, using: str = "default"
+) -> None:
+    """
+    Publish `status` for each (user_id, order_id) of `orders` when the
+    current transaction commits, right away outside of one. The batch
+    goes out together, in one round trip to Redis.
+    """
+    timestamp = now().isoformat()
+    messages = [
+        (order_channel(user_id), {"order": str(pk), "status": status, "at": timestamp})
+        for user_id, pk in orders
+        if user_id is not None
+    ]
+    if not messages:
+        return
+
+    transaction.on_commit(lambda: publish_many(messages), using=using)
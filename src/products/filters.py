@@ -7,6 +7,7 @@ import django_filters
 from django.utils import timezone
 from django.db.models import QuerySet
 
+from helpers.filters import qs_trigram_search
 from .models import Product, Order, OrderStatusChoices
 
 
@@ -30,6 +31,18 @@ class ProductFilter(django_filters.FilterSet):
         fields = {"product_name": ["icontains"], "product_description": ["icontains"]}
 
 
+class ProductTrigramFilter(django_filters.FilterSet):
+
+    search = django_filters.CharFilter(method="filter_search", label="Search")
+
+    class Meta:
+        model = Product
+        fields = []
+
+    def filter_search(self, queryset: QuerySet, name: str, value: str) -> QuerySet:
+        return qs_trigram_search(Product, query=value, queryset=queryset)
+
+
 class OrderFilter(django_filters.FilterSet):
 
     status = django_filters.ChoiceFilter(
@@ -5,10 +5,12 @@ from typing import Any
 from django import forms
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from import_export.formats import base_formats
+from unfold.forms import ActionForm
+from unfold.widgets import UnfoldAdminSelectWidget
 
-from .models import Product, Order
+from .models import Product, Order, EXPORT_FORMATS
 from helpers.resources import OrderResource
+from helpers.exports import StreamingExport
 from helpers.enum import OrderStatusChoices
 from helpers.forms import FormatChoiceField
 from helpers.forms.mixins import TailwindRenderFormMixin
@@ -175,7 +177,7 @@ class AddOrderForm(forms.ModelForm):
 
 class ExportForm(forms.Form):
 
-    format = FormatChoiceField(formats=base_formats.DEFAULT_FORMATS)
+    format = FormatChoiceField(formats=EXPORT_FORMATS)
 
     def __init__(self, *args, **kwargs) -> None:
 
@@ -196,6 +198,25 @@ class ExportForm(forms.Form):
         dataset = OrderResource().export(queryset, **kwargs)  # export fields
         return format, format.export_data(dataset)
 
+    def is_streaming(self) -> bool:
+        return StreamingExport.supports(self.cleaned_data["format"])
+
+    def export_stream(self, request, queryset, **kwargs) -> StreamingExport:
+        # csv, tsv and jsonl, rendered row by row
+        format = self.cleaned_data["format"]
+        return StreamingExport(OrderResource(), queryset, format.get_title(), **kwargs)
+
+
+class ExportActionForm(ActionForm):
+    """The admin action bar, with the format of export_in_background_action"""
+
+    format = FormatChoiceField(
+        formats=EXPORT_FORMATS,
+        label=_("Format"),
+        required=False,
+        widget=UnfoldAdminSelectWidget,
+    )
+
 
 class OrderActionForm(forms.Form):
 
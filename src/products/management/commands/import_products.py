@@ -0,0 +1,78 @@
+import os
+import time
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from helpers.imports import read_rows
+from helpers.resources import ProductResource
+
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+
+    help = "Bulk import products from a csv, tsv or xlsx file"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="Owner username.")
+        parser.add_argument("--format", help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=None)
+        parser.add_argument(
+            "--key-fields",
+            help="Comma separated fields matching existing products, "
+            "defaults to ProductResource import_id_fields.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes cleaning the rows, 0 for one per CPU.",
+        )
+        parser.add_argument("--errors", help="Write the error report (csv) here.")
+
+    def handle(self, *args: list[Any], **options: dict[str, Any]) -> None:
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(options["user"])
+        except UserModel.DoesNotExist:
+            raise CommandError("User %r does not exist." % options["user"])
+
+        key_fields = options["key_fields"]
+        started = time.monotonic()
+        try:
+            result = ProductResource.bulk_import(
+                read_rows(options["path"], options["format"]),
+                user=user,
+                key_fields=key_fields.split(",") if key_fields else None,
+                chunk_size=options["chunk_size"],
+                dry_run=options["dry_run"],
+                workers=options["workers"] or os.cpu_count() or 1,
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if path := options["errors"]:
+            with open(path, "w", newline="") as f:
+                result.write_error_report(f)
+        else:
+            for error in result.errors:
+                self.stderr.write(str(error))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "%s rows in %.2fs: %s created, %s updated, %s skipped, %s errors%s"
+                % (
+                    result.total,
+                    time.monotonic() - started,
+                    result.created,
+                    result.updated,
+                    result.skipped,
+                    len(result.errors),
+                    " (dry run)" if options["dry_run"] else "",
+                )
+            )
+        )
@@ -0,0 +1,17 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from products.models import UserOrderStats
+
+
+class Command(BaseCommand):
+
+    help = "Rebuild the per user order statistics from the orders"
+
+    def handle(self, *args: list[Any], **options: dict[str, Any]) -> None:
+
+        UserOrderStats.objects.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS("Rebuilt %d rows" % UserOrderStats.objects.count())
+        )
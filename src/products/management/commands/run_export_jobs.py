@@ -0,0 +1,46 @@
+import time
+import logging
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from products.models import ExportJob
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = "Run pending export jobs, start as many workers as needed"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--once", action="store_true", help="Exit when no job is pending."
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=5.0, help="Seconds between polls."
+        )
+
+    def handle(self, *args: list[Any], **options: dict[str, Any]) -> None:
+
+        while True:
+            job = ExportJob.objects.claim()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            started = time.monotonic()
+            job.run()
+            if job.error:
+                logger.error("Export job %s failed \n %s", job.pk, job.error)
+                self.stdout.write(self.style.ERROR("Failed %s" % job))
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        "Exported %s rows in %.2fs (%s)"
+                        % (job.rows, time.monotonic() - started, job.pk)
+                    )
+                )
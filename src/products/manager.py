@@ -1,28 +1,255 @@
-from django.db import models
-from django.contrib.postgres.search import SearchVector
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, connections, transaction, IntegrityError
+from django.utils.timezone import now
+from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
+
+from helpers.search_index import get_search_index
+from helpers.enum import ExportJobStatusChoices, OrderStatusChoices
+from .availability import refresh_availability
+from .cache import invalidate_product_detail
+from .transitions import TransitionResult, transition_orders
+
+
+SEARCH_WEIGHTS = ("A", "B", "C", "D")
 
 
 class ProductManager(models.Manager):
 
-    def search(self, query: str | None = None) -> models.QuerySet:
+    def search_vector_supported(self) -> bool:
+        return connections[self.db].vendor == "postgresql"
 
+    def get_search_vector(self) -> SearchVector | None:
+        """
+        Weighted vector over `SEARCH_FIELDS`, the first field ranks highest.
+        """
         search_fields = getattr(self.model, "SEARCH_FIELDS", ())
 
         if not search_fields:
+            return None
+
+        vector = None
+        for field, weight in zip(search_fields, SEARCH_WEIGHTS):
+            _vector = SearchVector(field, weight=weight)
+            vector = _vector if vector is None else vector + _vector
+        return vector
+
+    def update_search_vector(self, queryset: models.QuerySet | None = None) -> int:
+        """
+        Refresh the stored `search_vector` column. A no-op outside Postgres.
+        """
+        vector = self.get_search_vector()
+
+        if vector is None or not self.search_vector_supported():
+            return 0
+
+        queryset = queryset if queryset is not None else self.all()
+        return queryset.update(search_vector=vector)
+
+    def search(self, query: str | None = None) -> models.QuerySet:
+
+        if not getattr(self.model, "SEARCH_FIELDS", ()):
             return self.none()
 
-        _search = SearchVector(search_fields)
+        if not self.search_vector_supported():
+            # sqlite and friends, see helpers.search_index
+            return get_search_index(self.model, using=self.db).filter_queryset(
+                self.all(), query
+            )
 
-        return self.annotate(search=_search).filter(search=query)
+        _query = SearchQuery(query, search_type="websearch")
+
+        return (
+            self.filter(search_vector=_query)
+            .annotate(rank=SearchRank(models.F("search_vector"), _query))
+            .order_by("-rank", "-timestamp")
+        )
 
     def active(self):
         return self.filter(active=True)
 
+    def reserve(self, pk, number_of_items: int) -> bool:
+        """
+        Take `number_of_items` off the stock of product `pk` with a single
+        UPDATE ... WHERE quantity >= n, False when not enough is left.
+        No row lock is held, concurrent reservations can't oversell.
+        """
+        assert number_of_items > 0
+
+        reserved = self.filter(pk=pk, quantity__gte=number_of_items).update(
+            quantity=models.F("quantity") - number_of_items,
+            # update() skips auto_now, the product card cache keys on it
+            updated_at=now(),
+        )
+        if reserved:
+            invalidate_product_detail(pk, using=self.db)
+            refresh_availability([pk], using=self.db)
+        return reserved == 1
+
+    def restock(self, items: dict) -> None:
+        """
+        Put `items` ({product pk: number of items}) back in stock, one
+        UPDATE ... SET quantity = quantity + n per product, in pk order
+        so concurrent restocks lock the rows the same way.
+        """
+        restocked = []
+        for pk, number_of_items in sorted(items.items()):
+            if not number_of_items:
+                continue
+            if self.filter(pk=pk).update(
+                quantity=models.F("quantity") + number_of_items, updated_at=now()
+            ):
+                invalidate_product_detail(pk, using=self.db)
+                restocked.append(pk)
+        refresh_availability(restocked, using=self.db)
+
+
+class OrderQuerySet(models.QuerySet):
+
+    def counted(self):
+        """Orders that count towards UserOrderStats"""
+        return self.exclude(status=OrderStatusChoices.cancelled)
+
+    def user_totals(self):
+        return (
+            self.filter(user__isnull=False)
+            .order_by()
+            .values("user")
+            .annotate(
+                orders=models.Count("pk"),
+                items=models.Sum("number_of_items"),
+                spend=models.Sum("total_cost"),
+            )
+        )
+
+    def product_totals(self):
+        return (
+            self.order_by()
+            .values("product")
+            .annotate(items=models.Sum("number_of_items"))
+        )
+
+    def update_status(self, status: str, *, user=None) -> TransitionResult:
+        """
+        Move the orders allowed to go to `status`, see
+        products.transitions for the state machine.
+        """
+        return transition_orders(self, status, user=user)
+
+
+class OrderManager(models.Manager.from_queryset(OrderQuerySet)):
+    pass
+
+
+class UserOrderStatsManager(models.Manager):
+
+    def add(self, user_id, orders: int = 0, items: int = 0, spend: float = 0.0):
+        """
+        Apply a delta to the stats of `user_id`. A missing row is built
+        from the user's orders instead, which already hold the change.
+        """
+        if user_id is None or not (orders or items or spend):
+            return
+
+        def _update() -> int:
+            return self.filter(user_id=user_id).update(
+                order_count=models.F("order_count") + orders,
+                item_count=models.F("item_count") + items,
+                total_spend=models.F("total_spend") + spend,
+                updated_at=now(),
+            )
+
+        if _update():
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(user_id=user_id, **self.compute(user_id))
+        except IntegrityError:
+            # created by a concurrent transaction
+            _update()
+
+    def add_orders(self, orders) -> None:
+        """Count freshly inserted orders (bulk_create skips the receivers)"""
+        totals = {}
+        for order in orders:
+            user_id, *delta = order._saved_stats = order.get_stats()
+            totals[user_id] = [
+                a + b for a, b in zip(totals.get(user_id, (0, 0, 0)), delta)
+            ]
+        for user_id, delta in totals.items():
+            self.add(user_id, *delta)
+
+    def compute(self, user_id) -> dict:
+
+        order_model = self.model._meta.apps.get_model("products", "Order")
+        return (
+            order_model._default_manager.using(self.db)
+            .filter(user_id=user_id)
+            .counted()
+            .aggregate(
+                order_count=models.Count("pk"),
+                item_count=models.Sum("number_of_items", default=0),
+                total_spend=models.Sum("total_cost", default=0.0),
+            )
+        )
+
+    def rebuild(self) -> None:
+
+        order_model = self.model._meta.apps.get_model("products", "Order")
+        totals = order_model._default_manager.using(self.db).counted().user_totals()
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self.bulk_create(
+                self.model(
+                    user_id=row["user"],
+                    order_count=row["orders"],
+                    item_count=row["items"],
+                    total_spend=row["spend"] or 0.0,
+                )
+                for row in totals
+            )
+
+    def get_for_user(self, user):
+        """The stats row of `user`, unsaved and empty when there is none"""
+        return self.filter(user=user).first() or self.model(user=user)
+
 
-class OrderManager(models.Manager):
+class ExportJobManager(models.Manager):
 
-    def get_queryset(self):
-        return super().get_queryset().annotate(
-            total_cost=models.F("product__price") * models.F("number_of_items")
+    def fail_stale(self) -> int:
+        """
+        Fail the jobs left running longer than `EXPORT_JOB_TIMEOUT`
+        seconds, their worker died (or was killed) mid export.
+        """
+        timeout = getattr(settings, "EXPORT_JOB_TIMEOUT", 60 * 60)
+        timestamp = now()
+        return self.filter(
+            status=ExportJobStatusChoices.running,
+            started_at__lt=timestamp - timedelta(seconds=timeout),
+        ).update(
+            status=ExportJobStatusChoices.failed,
+            error="Timed out after %s seconds, the worker stopped." % timeout,
+            finished_at=timestamp,
         )
 
+    def claim(self):
+        """
+        Mark the oldest pending job running and return it, None when there
+        is nothing to do. Locked rows are skipped so several workers can
+        run side by side. Stale running jobs are failed first.
+        """
+        self.fail_stale()
+        with transaction.atomic(using=self.db):
+            job = (
+                self.select_for_update(skip_locked=True)
+                .filter(status=ExportJobStatusChoices.pending)
+                .order_by("timestamp")
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = ExportJobStatusChoices.running
+            job.started_at = now()
+            job.save(update_fields=["status", "started_at"])
+        return job
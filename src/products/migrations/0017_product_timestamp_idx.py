@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 06:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0016_alter_order_number_of_items"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["-timestamp", "id"], name="product_timestamp_idx"
+            ),
+        ),
+    ]
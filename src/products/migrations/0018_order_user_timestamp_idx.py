@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 06:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0017_product_timestamp_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-timestamp", "order_id"],
+                name="order_user_timestamp_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 06:55
+
+import django.contrib.postgres.search
+from django.db import migrations
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+
+
+SEARCH_VECTOR_INDEX = GinIndex(
+    fields=["search_vector"], name="product_search_vector_idx"
+)
+
+
+def is_postgres(schema_editor) -> bool:
+    return schema_editor.connection.vendor == "postgresql"
+
+
+def create_search_vector_index(apps, schema_editor):
+    # GIN is Postgres only, the sqlite (dev/test) database skips it.
+    if not is_postgres(schema_editor):
+        return
+    Product = apps.get_model("products", "Product")
+    schema_editor.add_index(Product, SEARCH_VECTOR_INDEX)
+    Product.objects.using(schema_editor.connection.alias).update(
+        search_vector=(
+            SearchVector("product_name", weight="A")
+            + SearchVector("product_description", weight="B")
+            + SearchVector("price", weight="C")
+        )
+    )
+
+
+def drop_search_vector_index(apps, schema_editor):
+    if not is_postgres(schema_editor):
+        return
+    Product = apps.get_model("products", "Product")
+    schema_editor.remove_index(Product, SEARCH_VECTOR_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0018_order_user_timestamp_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_vector_index, drop_search_vector_index),
+    ]
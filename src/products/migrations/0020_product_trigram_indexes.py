@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+
+
+# Django compiles `icontains` to UPPER(col) LIKE UPPER(%s) on Postgres, the
+# trigram indexes are built on the same expression so they can serve it.
+TRIGRAM_INDEXES = [
+    GinIndex(
+        OpClass(Upper("product_name"), name="gin_trgm_ops"),
+        name="product_name_trgm_idx",
+    ),
+    GinIndex(
+        OpClass(Upper("product_description"), name="gin_trgm_ops"),
+        name="product_description_trgm_idx",
+    ),
+]
+
+
+def is_postgres(schema_editor) -> bool:
+    return schema_editor.connection.vendor == "postgresql"
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm is Postgres only, the sqlite (dev/test) database skips it.
+    if not is_postgres(schema_editor):
+        return
+    Product = apps.get_model("products", "Product")
+    for index in TRIGRAM_INDEXES:
+        schema_editor.add_index(Product, index)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if not is_postgres(schema_editor):
+        return
+    Product = apps.get_model("products", "Product")
+    for index in TRIGRAM_INDEXES:
+        schema_editor.remove_index(Product, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0019_product_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
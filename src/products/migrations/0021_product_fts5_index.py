@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+FTS_TABLE = "products_product_fts"
+FTS_COLUMNS = ("product_name", "product_description", "price")
+
+
+def has_fts5(schema_editor) -> bool:
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return "ENABLE_FTS5" in {row[0] for row in cursor.fetchall()}
+
+
+def create_fts5_table(apps, schema_editor):
+    # helpers.search_index.SQLiteFTS5SearchIndex, sqlite only.
+    if not has_fts5(schema_editor):
+        return
+    quote_name = schema_editor.quote_name
+    columns = ", ".join(quote_name(column) for column in FTS_COLUMNS)
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(%s)"
+        % (quote_name(FTS_TABLE), columns)
+    )
+    schema_editor.execute(
+        "INSERT INTO %s (rowid, %s) SELECT id, %s FROM products_product"
+        % (quote_name(FTS_TABLE), columns, columns)
+    )
+
+
+def drop_fts5_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "DROP TABLE IF EXISTS %s" % schema_editor.quote_name(FTS_TABLE)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0020_product_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts5_table, drop_fts5_table),
+    ]
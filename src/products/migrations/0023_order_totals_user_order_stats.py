@@ -0,0 +1,86 @@
+# Generated by Django 5.2 on 2026-10-18 07:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_order_totals(apps, schema_editor):
+    Order = apps.get_model("products", "Order")
+    Product = apps.get_model("products", "Product")
+    UserOrderStats = apps.get_model("products", "UserOrderStats")
+    db = schema_editor.connection.alias
+
+    price = Product.objects.filter(pk=models.OuterRef("product")).values("price")
+    Order.objects.using(db).update(unit_price=models.Subquery(price))
+    Order.objects.using(db).update(
+        total_cost=models.F("unit_price") * models.F("number_of_items")
+    )
+
+    totals = (
+        Order.objects.using(db)
+        .filter(user__isnull=False)
+        .exclude(status="cancelled")
+        .order_by()
+        .values("user")
+        .annotate(
+            orders=models.Count("pk"),
+            items=models.Sum("number_of_items"),
+            spend=models.Sum("total_cost"),
+        )
+    )
+    UserOrderStats.objects.using(db).bulk_create(
+        UserOrderStats(
+            user_id=row["user"],
+            order_count=row["orders"],
+            item_count=row["items"],
+            total_spend=row["spend"] or 0.0,
+        )
+        for row in totals
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("products", "0022_export_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserOrderStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="order_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="User",
+                    ),
+                ),
+                ("order_count", models.IntegerField(default=0)),
+                ("item_count", models.IntegerField(default=0)),
+                ("total_spend", models.FloatField(default=0.0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "User Order Stats",
+                "verbose_name_plural": "User Order Stats",
+            },
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="total_cost",
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="unit_price",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
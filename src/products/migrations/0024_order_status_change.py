@@ -0,0 +1,88 @@
+# Generated by Django 5.2 on 2026-10-18 07:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0023_order_totals_user_order_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderStatusChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_status",
+                    models.CharField(
+                        choices=[
+                            ("delivered", "Delivered"),
+                            ("pending", "Pending"),
+                            ("cancelled", "Cancelled"),
+                            ("in_transit", "In Transit"),
+                        ],
+                        max_length=20,
+                        verbose_name="From",
+                    ),
+                ),
+                (
+                    "to_status",
+                    models.CharField(
+                        choices=[
+                            ("delivered", "Delivered"),
+                            ("pending", "Pending"),
+                            ("cancelled", "Cancelled"),
+                            ("in_transit", "In Transit"),
+                        ],
+                        max_length=20,
+                        verbose_name="To",
+                    ),
+                ),
+                ("timestamp", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "changed_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Changed by",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_changes",
+                        to="products.order",
+                        verbose_name="Order",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Order Status Change",
+                "verbose_name_plural": "Order Status Changes",
+                "ordering": ("-timestamp",),
+                "indexes": [
+                    models.Index(
+                        fields=["order", "-timestamp"], name="order_status_change_idx"
+                    )
+                ],
+            },
+        ),
+    ]
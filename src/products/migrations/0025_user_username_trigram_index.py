@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+
+
+# Product.TRIGRAM_SEARCH_FIELDS matches user__username in a subquery on the
+# user table, served by this index (same UPPER() expression as 0020).
+USERNAME_INDEX = GinIndex(
+    OpClass(Upper("username"), name="gin_trgm_ops"),
+    name="user_username_trgm_idx",
+)
+
+
+def is_postgres(schema_editor) -> bool:
+    return schema_editor.connection.vendor == "postgresql"
+
+
+def create_username_index(apps, schema_editor):
+    if not is_postgres(schema_editor):
+        return
+    schema_editor.add_index(apps.get_model(settings.AUTH_USER_MODEL), USERNAME_INDEX)
+
+
+def drop_username_index(apps, schema_editor):
+    if not is_postgres(schema_editor):
+        return
+    schema_editor.remove_index(apps.get_model(settings.AUTH_USER_MODEL), USERNAME_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("products", "0024_order_status_change"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_username_index, drop_username_index),
+    ]
@@ -1,26 +1,43 @@
 from __future__ import annotations
 
 import uuid
+import tempfile
 from typing import Any
 
 from django.db import models
 from django.urls import reverse
+from django.core.files import File
+from django.utils.module_loading import import_string
+from django.dispatch import receiver
 from django.utils.timezone import now
 from django.contrib.auth import get_user_model
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.contrib.postgres.search import SearchVectorField
 
 from cloudinary.models import CloudinaryField
+from import_export.formats.base_formats import DEFAULT_FORMATS
 
 from helpers.fields import AutoSlugField
-from helpers.enum import OrderStatusChoices
-from .manager import ProductManager, OrderManager
+from helpers.search_index import get_search_index
+from helpers.enum import OrderStatusChoices, ExportJobStatusChoices
+from helpers.exports import JSONL, get_export_storage, write_export
+from .manager import (
+    ProductManager,
+    OrderManager,
+    ExportJobManager,
+    UserOrderStatsManager,
+)
+from .availability import refresh_availability
+from .cache import invalidate_product_detail
 
 
 User = get_user_model()
 
+EXPORT_FORMATS = (*DEFAULT_FORMATS, JSONL)
+
 
 class Product(models.Model):
 
@@ -53,15 +70,24 @@ class Product(models.Model):
         db_persist=True,
     )
     comments = GenericRelation("comment")
+    # kept in sync by ProductManager.update_search_vector, GIN indexed on
+    # Postgres (see migration 0019)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
 
     SEARCH_FIELDS = ("product_name", "product_description", "price")
+    # gin_trgm_ops indexed on Postgres (see migrations 0020 and 0025)
+    TRIGRAM_SEARCH_FIELDS = ("product_name", "product_description", "user__username")
 
     def __str__(self) -> str:
         return self.product_name
 
     class Meta:
         ordering = ["-timestamp"]
-        indexes = [models.Index(fields=["product_name"], name="product_name_index")]
+        indexes = [
+            models.Index(fields=["product_name"], name="product_name_index"),
+            # keyset pagination (ProductListView)
+            models.Index(fields=["-timestamp", "id"], name="product_timestamp_idx"),
+        ]
         permissions = (("user_product", _("User Add/Update/Delete Product")),)
 
     objects = ProductManager()
@@ -71,6 +97,15 @@ class Product(models.Model):
         return reverse(
             "product-detail", kwargs={"pk": self.pk, "slug": self.product_slug}
         )
+
+    def reserve(self, number_of_items: int) -> bool:
+        """
+        See `ProductManager.reserve`, keeps `quantity` in step when it works.
+        """
+        reserved = type(self).objects.reserve(self.pk, number_of_items)
+        if reserved:
+            self.quantity -= number_of_items
+        return reserved
     
     def render_image(self, lazy=True, **option):
         image = self.image
@@ -89,6 +124,34 @@ class Product(models.Model):
         return format_html("<img {0}/>", merge)
 
 
+@receiver(models.signals.post_save, sender=Product)
+def update_product_search_vector(sender, instance, raw=False, **kwargs) -> None:
+
+    update_fields = kwargs.get("update_fields")
+    if raw or (
+        update_fields is not None and not set(update_fields) & set(sender.SEARCH_FIELDS)
+    ):
+        return None
+
+    sender.objects.update_search_vector(sender.objects.filter(pk=instance.pk))
+
+
+@receiver(models.signals.post_save, sender=Product)
+def update_product_search_index(sender, instance, raw=False, using=None, **kwargs):
+
+    if raw or (index := get_search_index(sender, using=using)) is None:
+        return None
+    index.update(instance)
+
+
+@receiver(models.signals.post_delete, sender=Product)
+def remove_product_search_index(sender, instance, using=None, **kwargs) -> None:
+
+    if (index := get_search_index(sender, using=using)) is None:
+        return None
+    index.remove(instance.pk)
+
+
 def create_product(**kwargs: Any) -> Product:
     return Product.objects.create(**kwargs)
 
@@ -124,6 +187,9 @@ class Order(models.Model):
     manifest = models.TextField(blank=True, null=True, verbose_name=_("Manifest"))
 
     number_of_items = models.PositiveSmallIntegerField(default=1)
+    # prices at purchase time
+    unit_price = models.FloatField(null=True, blank=True, editable=False)
+    total_cost = models.FloatField(default=0.0, editable=False)
     inactive_at = models.DateTimeField(null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
     status = models.CharField(
@@ -134,18 +200,71 @@ class Order(models.Model):
 
     class Meta:
         ordering = ("-timestamp",)
+        indexes = [
+            # keyset pagination (UserOrderListAPIView)
+            models.Index(
+                fields=["user", "-timestamp", "order_id"],
+                name="order_user_timestamp_idx",
+            ),
+        ]
+
+    # (user_id, orders, items, spend) as stored, see update_user_order_stats,
+    # None when a stats field was deferred and it's read before a write
+    _saved_stats = (None, 0, 0, 0.0)
+    STATS_FIELDS = frozenset({"user_id", "status", "number_of_items", "total_cost"})
 
     def __str__(self) -> str:
 
         return "%s's Order" % self.user.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # a deferred field would be fetched from here, once per row
+        if cls.STATS_FIELDS.issubset(field_names):
+            instance._saved_stats = instance.get_stats()
+        else:
+            instance._saved_stats = None
+        return instance
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        self.set_totals()
+        super().save(*args, **kwargs)
+
+    def set_totals(self, product: Product | None = None) -> None:
+        if self.unit_price is None:
+            self.unit_price = (product or self.product).price
+        self.total_cost = self.unit_price * self.number_of_items
+
+    def get_stats(self) -> tuple[Any, int, int, float]:
+        """This order's share of the UserOrderStats of its user"""
+        if self.status == OrderStatusChoices.cancelled:
+            return (self.user_id, 0, 0, 0.0)
+        return (self.user_id, 1, self.number_of_items, self.total_cost)
+
+    def load_saved_stats(self, using: str | None = None) -> None:
+        """Read the stored share when from_db couldn't take it"""
+        row = (
+            type(self)
+            ._default_manager.using(using or self._state.db)
+            .filter(pk=self.pk)
+            .values("user_id", "status", "number_of_items", "total_cost")
+            .first()
+        )
+        self._saved_stats = Order(**row).get_stats() if row else (None, 0, 0, 0.0)
+
     def can_delete(self):
         return ("pending",)
 
-    def cancel(self):
-        self.status = "cancelled"
-        self.inactive_at = now()
-        self.save()
+    def cancel(self, user=None) -> bool:
+        """False when the order can't be cancelled any more"""
+        orders = type(self)._default_manager.filter(pk=self.pk)
+        result = orders.update_status(OrderStatusChoices.cancelled, user=user)
+        if not result.updated:
+            return False
+        self.refresh_from_db(fields=["status", "inactive_at"])
+        self._saved_stats = self.get_stats()
+        return True
 
 
 class OrderProxy(Order):
@@ -161,6 +280,74 @@ class OrderProxy(Order):
     cancelled.short_description = _("Cancelled")
 
 
+class UserOrderStats(models.Model):
+    """
+    Running order totals of a user, cancelled orders left out. Kept in
+    step by the Order receivers, `OrderQuerySet.update_status` and
+    `UserOrderStatsManager.add_orders`.
+    """
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="order_stats",
+        verbose_name=_("User"),
+    )
+    order_count = models.IntegerField(default=0)
+    item_count = models.IntegerField(default=0)
+    total_spend = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = UserOrderStatsManager()
+
+    class Meta:
+        verbose_name = _("User Order Stats")
+        verbose_name_plural = _("User Order Stats")
+
+    def __str__(self) -> str:
+        return "%s's Order Stats" % self.user
+
+
+class OrderStatusChange(models.Model):
+    """Written in bulk by products.transitions, one row per order moved"""
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="status_changes",
+        verbose_name=_("Order"),
+    )
+    from_status = models.CharField(
+        max_length=20, choices=OrderStatusChoices.choices, verbose_name=_("From")
+    )
+    to_status = models.CharField(
+        max_length=20, choices=OrderStatusChoices.choices, verbose_name=_("To")
+    )
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("Changed by"),
+    )
+    timestamp = models.DateTimeField(default=now)
+
+    class Meta:
+        ordering = ("-timestamp",)
+        verbose_name = _("Order Status Change")
+        verbose_name_plural = _("Order Status Changes")
+        indexes = [
+            models.Index(
+                fields=["order", "-timestamp"], name="order_status_change_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return "%s -> %s" % (self.from_status, self.to_status)
+
+
 class Comment(models.Model):
 
     user = models.ForeignKey(User, related_name="comments", on_delete=models.CASCADE)
@@ -194,3 +381,168 @@ class Reply(models.Model):
     class Meta:
         indexes = (models.Index(fields=("message",)),)
         verbose_name_plural = _("Replies")
+
+
+class ExportJob(models.Model):
+    """
+    An export run outside the request by `manage.py run_export_jobs`.
+
+    `resource` is the dotted path of an import-export resource, the rows
+    are `resource.Meta.model` filtered with `filters`.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="export_jobs")
+    resource = models.CharField(max_length=255)
+    format = models.CharField(max_length=20)
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=ExportJobStatusChoices.choices,
+        default=ExportJobStatusChoices.pending,
+    )
+    file = models.FileField(
+        upload_to="%Y/%m/%d/", storage=get_export_storage, blank=True, null=True
+    )
+    rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    timestamp = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ExportJobManager()
+
+    class Meta:
+        ordering = ("-timestamp",)
+        indexes = [
+            # the worker picks the oldest pending job
+            models.Index(fields=["status", "timestamp"], name="export_job_status_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return "%s export (%s)" % (self.resource.rsplit(".", 1)[-1], self.status)
+
+    def get_absolute_url(self) -> str:
+        return reverse("export_job", kwargs={"job_id": self.pk})
+
+    def get_download_url(self) -> str:
+        return reverse("export_job_download", kwargs={"job_id": self.pk})
+
+    def get_resource(self):
+        return import_string(self.resource)()
+
+    def get_queryset(self) -> models.QuerySet:
+        resource = self.get_resource()
+        queryset = resource.get_queryset()
+        if self.filters:
+            queryset = queryset.filter(**self.filters)
+        return queryset
+
+    def get_format(self):
+        for format_class in EXPORT_FORMATS:
+            if (format := format_class()).get_title() == self.format:
+                return format
+        raise ValueError("Unknown export format %r." % self.format)
+
+    def filename(self) -> str:
+        return "%s-%s.%s" % (
+            self.timestamp.strftime("%d-%m-%Y"),
+            self.get_resource()._meta.model._meta.model_name,
+            self.get_format().get_extension(),
+        )
+
+    def run(self) -> None:
+        """
+        Write the export to a temporary file, then hand it to the storage
+        which copies it in chunks.
+        """
+        try:
+            with tempfile.NamedTemporaryFile(suffix=".export") as tmp:
+                self.rows = write_export(
+                    self.get_resource(), self.get_queryset(), self.get_format(), tmp
+                )
+                tmp.flush()
+                tmp.seek(0)
+                self.file.save(self.filename(), File(tmp), save=False)
+        except Exception as e:
+            self.status = ExportJobStatusChoices.failed
+            self.error = repr(e)
+        else:
+            self.status = ExportJobStatusChoices.done
+        self.finished_at = now()
+        self.save(update_fields=["file", "rows", "status", "error", "finished_at"])
+
+
+@receiver(models.signals.post_save, sender=Product)
+@receiver(models.signals.post_delete, sender=Product)
+def invalidate_product_detail_cache(sender, instance, using=None, **kwargs) -> None:
+
+    invalidate_product_detail(instance.pk, using=using)
+
+
+@receiver(models.signals.post_save, sender=Product)
+@receiver(models.signals.post_delete, sender=Product)
+def refresh_product_availability(sender, instance, using=None, **kwargs) -> None:
+
+    refresh_availability([instance.pk], using=using)
+
+
+@receiver(models.signals.post_save, sender=Comment)
+@receiver(models.signals.post_delete, sender=Comment)
+def invalidate_comment_product_detail_cache(
+    sender, instance, using=None, **kwargs
+) -> None:
+
+    if instance.content_type_id == ContentType.objects.get_for_model(Product).pk:
+        invalidate_product_detail(instance.object_id, using=using)
+
+
+@receiver(models.signals.post_save, sender=Reply)
+@receiver(models.signals.post_delete, sender=Reply)
+def invalidate_reply_product_detail_cache(
+    sender, instance, using=None, **kwargs
+) -> None:
+
+    comment = (
+        Comment.objects.using(using)
+        .filter(pk=instance.comment_id)
+        .values("content_type_id", "object_id")
+        .first()
+    )
+    # deleted along with its comment, the comment receiver covers it
+    if comment is None:
+        return None
+    if comment["content_type_id"] == ContentType.objects.get_for_model(Product).pk:
+        invalidate_product_detail(comment["object_id"], using=using)
+
+
+@receiver(models.signals.pre_save, sender=Order)
+@receiver(models.signals.pre_save, sender=OrderProxy)
+@receiver(models.signals.pre_delete, sender=Order)
+@receiver(models.signals.pre_delete, sender=OrderProxy)
+def load_saved_order_stats(sender, instance, using=None, **kwargs) -> None:
+
+    if instance._saved_stats is None:
+        instance.load_saved_stats(using)
+
+
+@receiver(models.signals.post_save, sender=Order)
+@receiver(models.signals.post_save, sender=OrderProxy)
+def update_user_order_stats(sender, instance, using=None, **kwargs) -> None:
+
+    (old_user, *old), (new_user, *new) = instance._saved_stats, instance.get_stats()
+    stats = UserOrderStats.objects.db_manager(using)
+    if old_user != new_user:
+        stats.add(old_user, *(-value for value in old))
+        stats.add(new_user, *new)
+    else:
+        stats.add(new_user, *(b - a for a, b in zip(old, new)))
+    instance._saved_stats = instance.get_stats()
+
+
+@receiver(models.signals.post_delete, sender=Order)
+@receiver(models.signals.post_delete, sender=OrderProxy)
+def remove_user_order_stats(sender, instance, using=None, **kwargs) -> None:
+
+    user_id, *saved = instance._saved_stats
+    UserOrderStats.objects.db_manager(using).add(user_id, *(-value for value in saved))
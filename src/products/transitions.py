@@ -0,0 +1,157 @@
+"""
+Order status state machine.
+
+    >>> result = Order.objects.filter(pk__in=selected).update_status("delivered")
+    >>> result.moved, result.skipped
+    ({'pending': 40, 'in_transit': 2}, {'cancelled': 3})
+
+A batch is applied with one UPDATE and one `bulk_create` of
+OrderStatusChange rows, whatever its size, plus one stock UPDATE per
+product when it crosses the cancelled line. Orders whose current status
+can't move to the new one are left alone and counted in `skipped`.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils.timezone import now
+
+from helpers.enum import OrderStatusChoices
+from .events import publish_order_status
+
+
+__all__ = ["TRANSITIONS", "TransitionResult", "can_transition", "transition_orders"]
+
+Status = OrderStatusChoices
+
+# current status -> the statuses it may move to
+TRANSITIONS: dict[str, frozenset[str]] = {
+    Status.pending: frozenset({Status.in_transit, Status.delivered, Status.cancelled}),
+    Status.in_transit: frozenset({Status.pending, Status.delivered, Status.cancelled}),
+    # reopened by staff
+    Status.cancelled: frozenset({Status.pending}),
+    Status.delivered: frozenset(),
+}
+
+
+def can_transition(current: str, status: str) -> bool:
+    return status in TRANSITIONS.get(current, ())
+
+
+def get_sources(status: str) -> list[str]:
+    """The statuses that may move to `status`"""
+    return [current for current, targets in TRANSITIONS.items() if status in targets]
+
+
+@dataclass(slots=True)
+class TransitionResult:
+
+    status: str
+    # orders per status they had, moved or left alone
+    moved: dict[str, int] = field(default_factory=dict)
+    skipped: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def updated(self) -> int:
+        return sum(self.moved.values())
+
+    def __str__(self) -> str:
+        label = Status(self.status).label
+        if not self.skipped:
+            return "%d moved to %s" % (self.updated, label)
+        return "%d moved to %s, %d skipped (%s)" % (
+            self.updated,
+            label,
+            sum(self.skipped.values()),
+            ", ".join("%s: %d" % item for item in sorted(self.skipped.items())),
+        )
+
+
+def transition_orders(
+    queryset: QuerySet, status: str, *, user: Optional[Any] = None
+) -> TransitionResult:
+    """
+    Move the orders of `queryset` that may go to `status`, recording who
+    did it. Cancelled orders go back in stock, one UPDATE per product;
+    reopened ones take it again, or stay cancelled (with every other
+    reopened order of their product) when there isn't enough left.
+    UserOrderStats follows the orders crossing the cancelled line and the
+    users' order streams get the change once it commits.
+    """
+    if status not in TRANSITIONS:
+        raise ValueError("Unknown order status %r" % status)
+
+    db = queryset.db
+    apps = queryset.model._meta.apps
+    stats = apps.get_model("products", "UserOrderStats")
+    history = apps.get_model("products", "OrderStatusChange")
+    products = apps.get_model("products", "Product")._default_manager.db_manager(db)
+    cancelled = Status.cancelled
+    result = TransitionResult(status)
+
+    with transaction.atomic(using=db):
+        locked = list(
+            queryset.select_for_update()
+            .order_by()
+            .values_list("pk", "user", "product", "status", named=True)
+        )
+        moving = [row for row in locked if can_transition(row.status, status)]
+
+        # the rows are locked, this is exactly `moving`
+        orders = queryset.filter(status__in=get_sources(status))
+        if status == cancelled:
+            crossing, sign = orders, -1
+        else:
+            crossing, sign = orders.filter(status=cancelled), 1
+
+        items = {row["product"]: row["items"] for row in crossing.product_totals()}
+        if sign < 0:
+            products.restock(items)
+        elif stocked_out := [
+            pk for pk, n in sorted(items.items()) if n and not products.reserve(pk, n)
+        ]:
+            moving = [
+                row
+                for row in moving
+                if row.status != cancelled or row.product not in stocked_out
+            ]
+            orders = orders.exclude(status=cancelled, product__in=stocked_out)
+            crossing = crossing.exclude(product__in=stocked_out)
+
+        moved = {row.pk for row in moving}
+        result.moved = dict(Counter(row.status for row in moving))
+        result.skipped = dict(
+            Counter(row.status for row in locked if row.pk not in moved)
+        )
+        if not moving:
+            return result
+
+        totals = list(crossing.user_totals())
+        timestamp = now()
+        orders.update(
+            status=status, inactive_at=timestamp if status == cancelled else None
+        )
+        history.objects.using(db).bulk_create(
+            history(
+                order_id=row.pk,
+                from_status=row.status,
+                to_status=status,
+                changed_by=user,
+                timestamp=timestamp,
+            )
+            for row in moving
+        )
+        for row in totals:
+            stats.objects.db_manager(db).add(
+                row["user"],
+                sign * row["orders"],
+                sign * row["items"],
+                sign * row["spend"],
+            )
+        publish_order_status([(row.user, row.pk) for row in moving], status, using=db)
+    return result
@@ -9,7 +9,10 @@ from .views import (
     UserOrderDetailView,
     product_create_view,
     user_orders_view,
+    order_events_view,
     export_order_view,
+    ExportJobView,
+    ExportJobDownloadView,
     CommentDeleteView,
     CommentCreateView,
     CommentUpdateView,
@@ -31,6 +34,7 @@ urlpatterns = [
     path("add/", product_create_view, name="product_create"),
     # Orders Path
     path("orders/", user_orders_view, name="user_orders"),
+    path("orders/events/", order_events_view, name="order_events"),
     path("orders/add/<int:product_id>/", AddOrderView.as_view(), name="add_user_order"),
     path(
         "orders/delete/<int:order_id>/",
@@ -43,6 +47,12 @@ urlpatterns = [
         name="order_user_detail",
     ),
     path("orders/export/", export_order_view, name="export_order"),
+    path("orders/export/<uuid:job_id>/", ExportJobView.as_view(), name="export_job"),
+    path(
+        "orders/export/<uuid:job_id>/download/",
+        ExportJobDownloadView.as_view(),
+        name="export_job_download",
+    ),
     path("comment/add/<int:pk>/", CommentCreateView.as_view(), name="add_comment"),
     path(
         "comment/delete/<int:comment_id>/",
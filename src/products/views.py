@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import json
 from typing import Any, TypeVar
 
+from django.conf import settings
 from django.urls import reverse
 from django.db import transaction
 from django.contrib import messages
-from django.db.models import QuerySet
+from django.db.models import QuerySet, Prefetch
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views.generic import View, ListView, DetailView, FormView
@@ -15,11 +17,15 @@ from django.http import (
     HttpRequest,
     HttpResponse,
     HttpResponseRedirect,
+    StreamingHttpResponse,
+    JsonResponse,
+    FileResponse,
 )
 from django.views.generic.edit import ModelFormMixin, DeletionMixin
 from django.views.generic.detail import SingleObjectMixin
 from django.shortcuts import get_object_or_404, render
 from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.cache import never_cache
 from django.contrib.admin.views.decorators import staff_member_required
 from guardian.shortcuts import assign_perm, get_perms
@@ -27,11 +33,16 @@ from guardian.decorators import permission_required_or_403
 from django_filters.views import FilterView
 from django_htmx.http import HttpResponseClientRedirect
 
+from helpers.broker import get_broker
 from helpers.decorators import require_htmx
+from helpers.enum import ExportJobStatusChoices
 from helpers._typing import HTMXHttpRequest
-from helpers.mixins import ModelFormsetView
+from helpers.mixins import ModelFormsetView, CursorPaginationMixin
 from clients.views import FormRequestMixin
-from .models import Product, Order, Comment, Reply
+from .models import Product, Order, Comment, Reply, ExportJob
+from .cache import get_cached_product_detail
+from .events import order_channel
+from .order_utils import OutOfStock
 from .forms import (
     AddOrderForm,
     ProductForm,
@@ -41,7 +52,7 @@ from .forms import (
     SearchForm,
     ProductFormset,
 )
-from .filters import ProductFilter, OrderFilter
+from .filters import ProductFilter, ProductTrigramFilter, OrderFilter
 
 
 login_required_m = method_decorator(login_required, name="dispatch")
@@ -51,6 +62,7 @@ never_cache_m = method_decorator(never_cache, name="dispatch")
 T = TypeVar("T", bound=QuerySet)
 DEFAULT_OBJECT_PERM = "user_product"
 QUERY_SEACRH = "search"
+SSE_RETRY_MS = 5000
 
 
 class ObjectUserCheckMixin:
@@ -62,12 +74,13 @@ class ObjectUserCheckMixin:
 
 
 @never_cache_m
-class ProductListView(ListView):
+class ProductListView(CursorPaginationMixin, ListView):
 
     queryset = Product.objects.select_related("user").filter(active=True)
     template_name = "products/product_list.html"
     context_object_name = "queryset"
     paginate_by = 10
+    cursor_ordering = ("-timestamp", "pk")
 
     def get_template_names(self):
         if self.request.htmx:
@@ -82,12 +95,14 @@ class ProductListView(ListView):
 class ProductDetailView(FormRequestMixin, ModelFormMixin, DetailView):
     http_method_names = ("get", "post", "put", "delete")
     queryset = Product.objects.prefetch_related(
-        "comments", "comments__replies"
+        Prefetch("comments", Comment.objects.select_related("user")),
+        Prefetch("comments__replies", Reply.objects.select_related("user")),
     ).select_related("user")
     template_name = "products/product-detail.html"
     query_pk_and_slug = True
     slug_url_kwarg = "product_slug"
     form_class = ProductForm
+    _object = None
 
     def get_template_names(self):
 
@@ -110,6 +125,37 @@ class ProductDetailView(FormRequestMixin, ModelFormMixin, DetailView):
         self.object = self.get_object()
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset=None):
+        # dispatch, check_method_perm, get_form_kwargs and the comment form
+        # all ask for it, fetch it once per request.
+        if queryset is None and self._object is not None:
+            return self._object
+
+        if queryset is None and self.request.method == "GET":
+            obj = self.get_cached_object()
+        else:
+            obj = super().get_object(queryset)
+
+        if queryset is None:
+            self._object = obj
+        return obj
+
+    def get_cached_object(self):
+        """
+        Served from the shared detail cache (products.cache), writes always
+        read the database.
+        """
+        obj = get_cached_product_detail(
+            self.kwargs.get(self.pk_url_kwarg), self.get_queryset()
+        )
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        if obj is None or (slug is not None and obj.product_slug != slug):
+            raise Http404(
+                "No %s found matching the query"
+                % self.get_queryset().model._meta.verbose_name
+            )
+        return obj
+
     def post(self, request, *args, **kwargs):
         self.check_method_perm(request)
         form = self.get_form()
@@ -192,6 +238,16 @@ class ProductSearchView(FilterView):
     ordering = ("-timestamp",)
     template_name = "helpers/products/search.html"
     filterset_class = ProductFilter
+    search_backend = "trigram"
+    search_filterset_classes = {
+        "icontains": ProductFilter,
+        "trigram": ProductTrigramFilter,
+    }
+
+    def get_filterset_class(self):
+        return self.search_filterset_classes.get(
+            self.search_backend, self.filterset_class
+        )
 
     def get_filterset_data(self, request: HttpRequest, filter_class) -> dict:
 
@@ -268,6 +324,43 @@ class UserOrderView(ListView):
 user_orders_view = UserOrderView.as_view()
 
 
+async def order_event_stream(channel: str, keepalive: float):
+
+    subscription = await get_broker().subscribe(channel)
+    try:
+        yield "retry: %d\n\n" % SSE_RETRY_MS
+        while True:
+            message = await subscription.get(timeout=keepalive)
+            if message is None:
+                # a comment line, keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+            else:
+                yield "event: status\ndata: %s\n\n" % json.dumps(message)
+    finally:
+        await subscription.close()
+
+
+@login_required
+async def order_events_view(request: HttpRequest) -> HttpResponse:
+    """
+    Server-sent events for the status changes of the user's orders,
+    published by `Order.cancel` and the admin actions (products.events).
+    Each open stream holds a connection, so it's only served under ASGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Order events are only served under ASGI.", status=501)
+
+    user = await request.auser()
+    keepalive = getattr(settings, "SSE_KEEPALIVE", 15)
+    response = StreamingHttpResponse(
+        order_event_stream(order_channel(user.pk), keepalive),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx
+    return response
+
+
 @login_required_m
 class UserOrderDetailView(DetailView):
 
@@ -279,15 +372,20 @@ class UserOrderDetailView(DetailView):
         if request.htmx:
             obj = self.get_object()
             with transaction.atomic():
-                obj = self._cancel_user_order(request, obj)
-            return self.render_to_response(context=self.get_context_data(object=obj))
+                cancelled = self._cancel_user_order(request, obj)
+            context = self.get_context_data(object=obj)
+            if not cancelled:
+                context["error"] = "This order can no longer be cancelled."
+            return self.render_to_response(context=context)
         return HttpResponse(status=204)  # NO CONENT
 
-    def _cancel_user_order(self, request, obj):
-        obj.status = "cancelled"
-        obj.save()
+    def _cancel_user_order(self, request, obj) -> bool:
         self.object = obj
-        return obj
+        if obj.cancel(user=request.user):
+            return True
+        # show where it is now, not the status the page was rendered with
+        obj.refresh_from_db(fields=["status"])
+        return False
 
 
 @method_decorator((login_required, require_htmx), name="dispatch")
@@ -312,7 +410,12 @@ class AddOrderView(SingleObjectMixin, FormRequestMixin, FormView):
         return kwargs
 
     def form_valid(self, form) -> HttpResponse:
-        obj = form.save()
+        try:
+            obj = form.save()
+        except OutOfStock as e:
+            # sold out since clean() looked at it
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
         self.object = obj.product
         return HttpResponseClientRedirect(obj.product.get_absolute_url())
 
@@ -341,17 +444,38 @@ class OrderExportView(FormMixin, View):
             return self.form_valid(form)
         return self.form_invalid(form)
 
+    def post(self, request) -> HttpResponse:
+        """Queue the export as an ExportJob, polled at its url"""
+        form = self.get_form()
+        if not form.is_valid():
+            return self.form_invalid(form)
+        job = ExportJob.objects.create(
+            user=request.user,
+            resource="helpers.resources.OrderResource",
+            format=form.cleaned_data["format"].get_title(),
+            filters={"user_id": request.user.pk},
+        )
+        return JsonResponse(get_export_job_data(job), status=202)
+
     def form_valid(self, form) -> HttpResponse:
         qs = self.get_queryset()
         model = qs.model
         object_name = model._meta.object_name
-        format, export_data = form.export_data(self.request, qs)
-        response = HttpResponse(export_data, content_type=format.get_content_type())
+        format = form.cleaned_data["format"]
+        if form.is_streaming():
+            export = form.export_stream(self.request, qs)
+            response = StreamingHttpResponse(export, content_type=export.content_type)
+        else:
+            format, export_data = form.export_data(self.request, qs)
+            response = HttpResponse(export_data, content_type=format.get_content_type())
         response["Content-Disposition"] = 'attachment; filename="{}"'.format(
             form.date_format(format, object_name)
         )
         return response
 
+    def form_invalid(self, form) -> HttpResponse:
+        return JsonResponse({"errors": form.errors}, status=400)
+
     def get_form_kwargs(self) -> dict[str, Any]:
         kwargs = super().get_form_kwargs()
         if self.request.method == "GET":
@@ -364,6 +488,46 @@ class OrderExportView(FormMixin, View):
 export_order_view = OrderExportView.as_view()
 
 
+def get_export_job_data(job: ExportJob) -> dict[str, Any]:
+
+    return {
+        "id": str(job.pk),
+        "status": job.status,
+        "rows": job.rows,
+        "error": job.error,
+        "url": job.get_absolute_url(),
+        "download_url": (
+            job.get_download_url()
+            if job.status == ExportJobStatusChoices.done
+            else None
+        ),
+    }
+
+
+@never_cache_m
+@login_required_m
+class ExportJobView(View):
+
+    def get_object(self) -> ExportJob:
+        return get_object_or_404(
+            ExportJob, pk=self.kwargs["job_id"], user=self.request.user
+        )
+
+    def get(self, request, *args, **kwargs) -> HttpResponse:
+        return JsonResponse(get_export_job_data(self.get_object()))
+
+
+class ExportJobDownloadView(ExportJobView):
+
+    def get(self, request, *args, **kwargs) -> HttpResponse:
+        job = self.get_object()
+        if job.status != ExportJobStatusChoices.done or not job.file:
+            raise Http404("Export is not ready.")
+        return FileResponse(
+            job.file.open("rb"), as_attachment=True, filename=job.filename()
+        )
+
+
 @login_required_m
 @require_htmx_m
 class UserOrderDeleteView(SingleObjectMixin, ObjectUserCheckMixin, View):
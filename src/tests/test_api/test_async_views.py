@@ -0,0 +1,74 @@
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+
+from products.order_utils import AddOrder
+
+
+def get(url, **headers):
+    return async_to_sync(AsyncClient().get)(url, headers=headers)
+
+
+def test_async_product_list(user, token, products) -> None:
+
+    for i in range(3):
+        products.create(product_name="Liquid Soap %s" % i, user=user)
+    url = reverse("async_product_list")
+
+    assert get(url).status_code == 401
+    assert get(url, authorization="Token nope").json() == {"detail": "Invalid token."}
+
+    key = token.objects.create(user=user).key
+    response = get(url + "?page_size=2", authorization="Token %s" % key)
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["product_name"] for p in data["results"]] == [
+        "Liquid Soap 2",
+        "Liquid Soap 1",
+    ]
+    assert data["results"][0]["user"] == {
+        "username": "test_user",
+        "email": "admin@test.com",
+    }
+
+    response = get(data["next"], authorization="Token %s" % key)
+    assert [p["product_name"] for p in response.json()["results"]] == ["Liquid Soap 0"]
+    assert response.json()["next"] is None
+
+
+def test_async_product_detail(
+    user, token, products, django_capture_on_commit_callbacks
+) -> None:
+
+    obj = products.create(product_name="Liquid Soap")
+    auth = {"authorization": "Token %s" % token.objects.create(user=user).key}
+    url = reverse(
+        "async_product_retrieve",
+        kwargs={"pk": obj.pk, "product_slug": obj.product_slug},
+    )
+
+    assert get(url, **auth).json()["product_name"] == "Liquid Soap"
+    obj.product_name = "Gucci Bag"
+    with django_capture_on_commit_callbacks(execute=True):
+        obj.save()
+    assert get(url, **auth).json()["product_name"] == "Gucci Bag"
+
+    url = reverse("async_product_retrieve", kwargs={"pk": obj.pk, "product_slug": "x"})
+    assert get(url, **auth).status_code == 404
+
+
+def test_async_user_orders(user, token, products, django_user_model) -> None:
+
+    obj = products.create(product_name="Liquid Soap", quantity=5)
+    AddOrder(product_instance=obj).create(user, {"number_of_items": 2})
+    other = django_user_model.objects.create_user(username="other")
+    AddOrder(product_instance=obj).create(other, {"number_of_items": 1})
+
+    key = token.objects.create(user=user).key
+    response = get(reverse("async_user_order"), authorization="Token %s" % key)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 1
+    assert results[0]["number_of_items"] == 2
+    assert results[0]["product"]["product_name"] == "Liquid Soap"
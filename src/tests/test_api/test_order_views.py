@@ -13,13 +13,16 @@ def test_order_list_view(authenticated_client, user, products) -> None:
     response = authenticated_client.get(reverse("user_order"))
 
     assert response.status_code == 200
-    assert all(x["user"]["username"] == user.username for x in response.data)
+    assert response.data["next"] is None
+    assert all(x["user"]["username"] == user.username for x in response.data["results"])
 
 
 def test_user_order_create(user, authenticated_client, products) -> None:
 
     data = {"manifest": "%s" % words(12), "number_of_items": 1}
     obj = products.create(product_name=f"{words(4)}")
+    # left out of item_count and total_sum
+    Order.objects.create(user=user, product=obj, status="cancelled")
     response = authenticated_client.post(
         reverse(
             "product_retrieve", kwargs={"pk": obj.pk, "product_slug": obj.product_slug}
@@ -32,6 +35,8 @@ def test_user_order_create(user, authenticated_client, products) -> None:
     assert response.status_code == 201
     assert obj.quantity == 0
     assert response.data["message"] == "Added Item"
+    assert response.data["item_count"] == 1
+    assert response.data["total_sum"] == obj.price
     assert Order.objects.count() >= 1
 
 
@@ -58,3 +63,58 @@ def test_user_order_retrieve(user, authenticated_client) -> None:
     response = authenticated_client.get(reverse("order_retrieve", args=(obj.order_id,)))
 
     assert response.status_code == 200
+
+
+def test_order_checkout(user, authenticated_client, products) -> None:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    soap = products.create(product_name="Liquid Soap", quantity=5)
+    bag = products.create(product_name="Gucci Bag", quantity=2)
+    data = {
+        "manifest": words(6),
+        "items": [
+            {"product_id": soap.pk, "number_of_items": 2},
+            {"product_id": bag.pk, "number_of_items": 2},
+            {"product_id": soap.pk, "number_of_items": 1},
+        ],
+    }
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = authenticated_client.post(
+            reverse("order_checkout"), data, format="json"
+        )
+    soap.refresh_from_db()
+    bag.refresh_from_db()
+
+    assert response.status_code == 201
+    assert len(response.data["orders"]) == 2
+    assert (soap.quantity, bag.quantity) == (2, 0)
+    assert Order.objects.filter(user=user).count() == 2
+    assert (
+        sum(
+            q["sql"].startswith('INSERT INTO "products_order"')
+            for q in ctx.captured_queries
+        )
+        == 1
+    )
+    assert user.order_stats.item_count == 5
+
+
+def test_order_checkout_not_enough_quantity(authenticated_client, products) -> None:
+
+    soap = products.create(product_name="Liquid Soap", quantity=5)
+    bag = products.create(product_name="Gucci Bag", quantity=1)
+    data = {
+        "items": [
+            {"product_id": soap.pk, "number_of_items": 1},
+            {"product_id": bag.pk, "number_of_items": 2},
+        ],
+    }
+
+    response = authenticated_client.post(reverse("order_checkout"), data, format="json")
+    soap.refresh_from_db()
+
+    assert response.status_code == 400
+    assert str(bag.pk) in response.data["items"]
+    assert soap.quantity == 5 and not Order.objects.exists()
@@ -78,3 +78,72 @@ def test_product_delete_api_view(authenticated_client, products) -> None:
 
     assert response.status_code == status.HTTP_204_NO_CONTENT
     assert not products.filter(product_name=obj.product_name).exists()
+
+
+def test_product_list_api_cursor_pagination(authenticated_client, user) -> None:
+    from helpers.factories import ProductFactory
+
+    ProductFactory.create_batch(12, user=user)
+
+    response = authenticated_client.get(reverse("product_list"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["results"]) == 10
+    assert "cursor=" in response.data["next"]
+
+    next_response = authenticated_client.get(response.data["next"])
+    pks = {x["pk"] for x in response.data["results"]}
+
+    assert len(next_response.data["results"]) == 2
+    assert next_response.data["next"] is None
+    assert not pks & {x["pk"] for x in next_response.data["results"]}
+
+
+def test_product_list_api_search(authenticated_client, user, products) -> None:
+    products.create(product_name="Liquid Soap", product_description=words(6))
+    products.create(product_name="Air Freshener", product_description="no soap")
+    products.create(product_name="Disinfectant", product_description=words(6))
+
+    response = authenticated_client.get(reverse("product_list"), {"q": "soap"})
+    names = {x["product_name"] for x in response.data["results"]}
+
+    assert response.status_code == status.HTTP_200_OK
+    assert names == {"Liquid Soap", "Air Freshener"}
+
+    # the seller and the price, like the icontains search
+    products.create(product_name="Sponge", user=user)
+    response = authenticated_client.get(reverse("product_list"), {"q": user.username})
+    assert [x["product_name"] for x in response.data["results"]] == ["Sponge"]
+
+    products.create(product_name="Bleach", price=1500)
+    response = authenticated_client.get(reverse("product_list"), {"q": "1500"})
+    assert [x["product_name"] for x in response.data["results"]] == ["Bleach"]
+
+
+def test_product_list_api_search_keeps_rank(
+    authenticated_client, products, monkeypatch
+) -> None:
+    from helpers import filters
+
+    for name in ("Soap C", "Soap A", "Soap D", "Soap B"):
+        products.create(product_name=name)
+
+    # SQLite has no similarity to rank on, stand in with the name
+    search = filters.qs_trigram_search
+    monkeypatch.setattr(
+        filters,
+        "qs_trigram_search",
+        lambda *args, **kwargs: search(*args, **kwargs).order_by("product_name"),
+    )
+
+    response = authenticated_client.get(
+        reverse("product_list"), {"q": "soap", "page_size": 3}
+    )
+    assert [x["product_name"] for x in response.data["results"]] == [
+        "Soap A",
+        "Soap B",
+        "Soap C",
+    ]
+    response = authenticated_client.get(response.data["next"])
+    assert [x["product_name"] for x in response.data["results"]] == ["Soap D"]
+    assert response.data["next"] is None
@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.urls import reverse
+
+
+def test_product_availability(
+    api_client,
+    user,
+    products,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+) -> None:
+
+    cache.clear()
+    soap = products.create(product_name="Liquid Soap", quantity=5, price=10, user=user)
+    salt = products.create(product_name="Salt", quantity=0, price=2, user=user)
+    url = reverse("product_availability") + "?ids=%s,%s,999,%s" % (
+        soap.pk,
+        salt.pk,
+        soap.pk,
+    )
+
+    with django_assert_num_queries(1):
+        response = api_client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert list(data) == [str(soap.pk), str(salt.pk), "999"]
+    assert data[str(soap.pk)]["quantity"] == 5
+    assert data[str(soap.pk)]["in_stock"] is True
+    assert data[str(salt.pk)]["in_stock"] is False
+    assert data["999"] is None
+
+    # unknown ids aren't cached, anyone could fill the cache with them
+    with django_assert_num_queries(1):
+        assert api_client.get(url).json() == data
+
+    # reservations and saves reload the snapshot once they commit
+    with django_capture_on_commit_callbacks(execute=True):
+        assert products.model.objects.reserve(soap.pk, 2)
+    with django_capture_on_commit_callbacks(execute=True):
+        salt.active = False
+        salt.save()
+    with django_assert_num_queries(1):
+        data = api_client.get(url).json()
+    assert data[str(soap.pk)]["quantity"] == 3
+    # inactive products aren't on the storefront either
+    assert data[str(salt.pk)] is None
+
+    for ids in (
+        "",
+        "1,a",
+        "0",
+        "1,99999999999999999999999",
+        ",".join(map(str, range(1, 102))),
+    ):
+        response = api_client.get(reverse("product_availability") + "?ids=" + ids)
+        assert response.status_code == 400
+
+
+def test_product_availability_late_miss(user, products) -> None:
+    from products.availability import fill, get_availability, load_availability, store
+
+    cache.clear()
+    soap = products.create(product_name="Liquid Soap", quantity=5, price=10, user=user)
+
+    stale = load_availability([soap.pk])  # a miss reads the row
+    products.filter(pk=soap.pk).update(quantity=2)
+    store(load_availability([soap.pk]))  # a refresh commits meanwhile
+    fill(stale)  # and the miss writes late
+    assert get_availability([soap.pk])[soap.pk].quantity == 2
+
+
+def test_product_availability_throttle(api_client, user, monkeypatch) -> None:
+    from rest_framework.throttling import ScopedRateThrottle
+
+    cache.clear()
+    monkeypatch.setattr(
+        ScopedRateThrottle, "THROTTLE_RATES", {"product_availability": "2/min"}
+    )
+    url = reverse("product_availability") + "?ids=1"
+
+    assert [api_client.get(url).status_code for _ in range(3)] == [200, 200, 429]
+
+
+def test_product_availability_timeout(settings) -> None:
+    from products.availability import get_timeout
+
+    # LocMem, a refresh isn't seen by the other workers
+    assert get_timeout() == settings.PRODUCT_AVAILABILITY_LOCAL_CACHE_TIMEOUT
+
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": "redis://localhost:6379/1",
+        }
+    }
+    assert get_timeout() == settings.PRODUCT_AVAILABILITY_CACHE_TIMEOUT
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.utils import timezone
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+
+from helpers.purge import BatchPurge
+
+
+User = get_user_model()
+
+
+def test_delete_token_in_batches(token) -> None:
+
+    for i in range(5):
+        token.objects.create(user=User.objects.create_user(username="user%s" % i))
+    expired = list(token.objects.values_list("pk", flat=True)[:3])
+    token.objects.filter(pk__in=expired).update(
+        expired_at=timezone.now() - timezone.timedelta(days=1)
+    )
+
+    out = StringIO()
+    call_command("delete_token", "--dry-run", stdout=out)
+    assert "3 rows in 1 batches (dry run)" in out.getvalue()
+    assert token.objects.count() == 5
+
+    out = StringIO()
+    call_command("delete_token", "--chunk-size", "2", stdout=out)
+    assert "3 rows in 2 batches" in out.getvalue()
+    assert not token.objects.filter(pk__in=expired).exists()
+    assert token.objects.count() == 2
+
+
+def test_delete_inactive_users(user) -> None:
+
+    now = timezone.now()
+    window = now - timezone.timedelta(hours=23)
+    old = now - timezone.timedelta(days=3)
+    for username, joined in (("window0", window), ("window1", window), ("old", old)):
+        User.objects.create_user(username=username, is_active=False, date_joined=joined)
+    User.objects.create_user(username="new", is_active=False)
+    # deactivated by staff, not an unfinished sign up
+    User.objects.create_user(
+        username="banned", is_active=False, date_joined=old, last_login=old
+    )
+
+    def inactive() -> list[str]:
+        users = User.objects.filter(is_active=False).order_by("username")
+        return list(users.values_list("username", flat=True))
+
+    out = StringIO()
+    call_command("delete_inactive_users", "--dry-run", stdout=out)
+    assert "Would delete Inactive Users" in out.getvalue()
+    assert len(inactive()) == 5
+
+    call_command("delete_inactive_users", "--chunk-size", "1", stdout=StringIO())
+    assert inactive() == ["banned", "new", "old"]
+
+    call_command("delete_inactive_users", "--all", stdout=StringIO())
+    assert inactive() == ["banned", "new"]
+    assert User.objects.filter(pk=user.pk).exists()
+
+
+def test_batch_purge_ranges(user) -> None:
+
+    users = [User.objects.create_user(username="user%s" % i) for i in range(5)]
+    purge = BatchPurge(User.objects.filter(username__startswith="user"), chunk_size=2)
+
+    assert list(purge.ranges()) == [
+        (None, users[1].pk),
+        (users[1].pk, users[3].pk),
+        (users[3].pk, users[4].pk),
+    ]
+    report = purge.run()
+    assert (report.rows, report.batches) == (5, 3)
+    assert not User.objects.filter(username__startswith="user").exists()
+    assert User.objects.filter(pk=user.pk).exists()
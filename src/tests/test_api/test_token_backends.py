@@ -0,0 +1,104 @@
+import pytest
+import time_machine
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from api.backends import SignedTokenBackend, get_token_backend
+
+
+@pytest.fixture
+def signed_tokens(settings):
+    settings.API_TOKEN_BACKEND = "api.backends.SignedTokenBackend"
+    return get_token_backend()
+
+
+def login(api_client) -> str:
+    data = {"username": "test_user", "password": "password"}
+    response = api_client.post(reverse("api_login"), data)
+    assert response.status_code == status.HTTP_200_OK
+    return response.data["token"]
+
+
+def test_signed_token_login_and_logout(api_client, token, signed_tokens) -> None:
+
+    assert isinstance(signed_tokens, SignedTokenBackend)
+    key = login(api_client)
+    assert not token.objects.exists()
+
+    api_client.credentials(HTTP_AUTHORIZATION="Token %s" % key)
+    assert api_client.get(reverse("user_order")).status_code == status.HTTP_200_OK
+
+    response = api_client.post(reverse("api_logout"), {"token": key})
+    assert response.status_code == status.HTTP_200_OK
+    response = api_client.get(reverse("user_order"))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    # revoked twice
+    response = api_client.post(reverse("api_logout"), {"token": key})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_signed_token_rejected(api_client, user, settings, signed_tokens) -> None:
+
+    key = login(api_client)
+
+    api_client.credentials(HTTP_AUTHORIZATION="Token %s" % key[:-1])
+    response = api_client.get(reverse("user_order"))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    api_client.credentials(HTTP_AUTHORIZATION="Token %s" % key)
+    with time_machine.travel(timezone.now() + settings.API_TOKEN_EXPIRE_TIME):
+        response = api_client.get(reverse("user_order"))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.data["detail"] == "Token expired."
+
+
+def test_signed_token_denylist_check(settings) -> None:
+    from api.checks import check_token_denylist
+
+    assert check_token_denylist() == []
+
+    settings.API_TOKEN_BACKEND = "api.backends.SignedTokenBackend"
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    assert [e.id for e in check_token_denylist()] == ["api.E002"]
+
+    settings.API_TOKEN_DENYLIST_ALIAS = "tokens"
+    assert [e.id for e in check_token_denylist()] == ["api.E001"]
+
+    settings.CACHES = {
+        **settings.CACHES,
+        "tokens": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": "redis://localhost:6379/1",
+        },
+    }
+    assert check_token_denylist() == []
+
+
+def test_token_cache_check(settings) -> None:
+    from api.checks import check_token_cache
+
+    settings.API_TOKEN_CACHE_ALIAS = None
+    assert check_token_cache() == []
+
+    settings.API_TOKEN_CACHE_ALIAS = "default"
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    assert [e.id for e in check_token_cache()] == ["api.E004"]
+
+    settings.API_TOKEN_CACHE_ALIAS = "tokens"
+    assert [e.id for e in check_token_cache()] == ["api.E003"]
+
+    settings.CACHES = {
+        **settings.CACHES,
+        "tokens": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": "redis://localhost:6379/1",
+        },
+    }
+    assert check_token_cache() == []
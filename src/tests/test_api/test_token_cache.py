@@ -0,0 +1,51 @@
+from django.db import connection
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.cache import get_cached_token
+
+
+def token_queries(ctx) -> int:
+    return sum('"api_token"' in q["sql"] for q in ctx.captured_queries)
+
+
+def test_token_authentication_is_cached(
+    api_client, user, token, django_capture_on_commit_callbacks
+) -> None:
+
+    obj = token.objects.create(user=user)
+    api_client.credentials(HTTP_AUTHORIZATION="Token %s" % obj.key)
+
+    response = api_client.get(reverse("user_order"))
+    assert response.status_code == status.HTTP_200_OK
+    assert get_cached_token(obj.key)[0] == user
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(reverse("user_order"))
+    assert response.status_code == status.HTTP_200_OK
+    assert token_queries(ctx) == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.is_active = False
+        user.save()
+    assert get_cached_token(obj.key) is None
+    response = api_client.get(reverse("user_order"))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_token_cache_dropped_on_logout(
+    api_client, user, token, django_capture_on_commit_callbacks
+) -> None:
+
+    obj = token.objects.create(user=user)
+    api_client.credentials(HTTP_AUTHORIZATION="Token %s" % obj.key)
+    api_client.get(reverse("user_order"))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(reverse("api_logout"), {"token": obj.key})
+    assert response.status_code == status.HTTP_200_OK
+    assert get_cached_token(obj.key) is None
+
+    response = api_client.get(reverse("user_order"))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -1,3 +1,5 @@
+import time
+
 import pytest  # noqa
 
 from django.urls import reverse
@@ -9,3 +11,81 @@ def test_health_check_view(client) -> None:
 
     assert response.status_code == 200
     assert response.text.lower() == "Ok".lower()
+
+
+def test_query_stats_view(client, user, settings, caplog) -> None:
+    from helpers.middleware import query_stats
+
+    query_stats.clear()
+    response = client.get(reverse("query_stats"))
+    assert response.status_code == 302  # admin login
+
+    settings.QUERY_COUNT_DUPLICATE_THRESHOLD = 1
+    client.force_login(user)
+    client.get(reverse("products"))
+    assert "N+1 suspect in products" in caplog.text
+
+    response = client.get(reverse("query_stats"))
+    assert response.status_code == 200
+    stats = response.json()["views"]["products"]
+    assert stats["requests"] == 1
+    assert stats["queries"] >= 1 and stats["n_plus_one"] == 1
+
+
+def test_metrics_view(client, admin_client, api_client, settings) -> None:
+
+    client.get(reverse("products"))
+    client.generic("BREW", reverse("products"))
+    api_client.credentials(HTTP_AUTHORIZATION="Token not-a-token")
+    api_client.get(reverse("product_list"))
+
+    settings.METRICS_TOKEN = ""
+    assert client.get(reverse("metrics")).status_code == 401
+
+    response = admin_client.get(reverse("metrics"))
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert (
+        'http_request_duration_seconds_bucket{view="products",method="GET",le="+Inf"}'
+        in text
+    )
+    assert 'http_requests_total{view="product_list",method="GET",status="401"}' in text
+    assert 'api_auth_failures_total{reason="Invalid token."}' in text
+    assert 'db_queries_total{view="products"}' in text
+    assert 'method="other"' in text and "BREW" not in text
+
+    settings.METRICS_TOKEN = "secret"
+    assert client.get(reverse("metrics")).status_code == 401
+    response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_readiness_check_view(client, settings, monkeypatch) -> None:
+    from helpers import health
+
+    health.clear_health_report()
+    response = client.get(reverse("readiness_check"))
+    assert response.status_code == 200
+    checks = response.json()["checks"]
+    assert checks["database"]["ok"]
+    assert checks["cache"]["skipped"]  # no REDIS_URL
+
+    # cached until HEALTH_CHECK_CACHE_SECONDS
+    monkeypatch.setitem(health.PROBES, "database", lambda: 1 / 0)
+    assert client.get(reverse("readiness_check")).status_code == 200
+
+    health.clear_health_report()
+    response = client.get(reverse("readiness_check"))
+    assert response.status_code == 503
+    assert "ZeroDivisionError" in response.json()["checks"]["database"]["error"]
+
+    settings.HEALTH_CHECK_TIMEOUT = 0.05
+    monkeypatch.setitem(health.PROBES, "database", lambda: time.sleep(0.5))
+    health.clear_health_report()
+    response = client.get(reverse("readiness_check"))
+    assert response.status_code == 503
+    assert "timed out" in response.json()["checks"]["database"]["error"]
+    health.clear_health_report()
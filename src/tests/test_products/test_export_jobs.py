@@ -0,0 +1,122 @@
+import pytest
+from django.urls import reverse
+from django.core.management import call_command
+
+from products.models import Product, Order, ExportJob
+
+
+@pytest.fixture(autouse=True)
+def export_root(settings, tmp_path):
+    settings.EXPORT_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_order_export_job(client, user):
+    obj = Product.objects.create(user=user, product_name="Liquid Soap")
+    Order.objects.create(user=user, product=obj, number_of_items=2)
+    client.force_login(user)
+
+    # a link or a prefetch can't queue one
+    client.get(reverse("export_order"), {"format": "csv", "background": 1})
+    assert not ExportJob.objects.exists()
+    assert client.post(reverse("export_order"), {"format": ""}).status_code == 400
+    assert client.post(reverse("export_order"), {"format": "nope"}).status_code == 400
+    assert client.get(reverse("export_order"), {"format": "nope"}).status_code == 400
+
+    response = client.post(reverse("export_order"), {"format": "csv"})
+    job = ExportJob.objects.get()
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+    assert response.json()["download_url"] is None
+
+    call_command("run_export_jobs", "--once")
+    data = client.get(job.get_absolute_url()).json()
+
+    assert data["status"] == "done" and data["rows"] == 1
+
+    response = client.get(data["download_url"])
+    content = b"".join(response.streaming_content).decode()
+
+    assert response.status_code == 200
+    assert "Liquid Soap" in content
+
+
+@pytest.mark.django_db
+def test_export_job_failure_is_recorded(user):
+    job = ExportJob.objects.create(
+        user=user, resource="helpers.resources.ProductResource", format="nope"
+    )
+
+    call_command("run_export_jobs", "--once")
+    job.refresh_from_db()
+
+    assert job.status == "failed" and "nope" in job.error
+    assert ExportJob.objects.claim() is None
+
+
+@pytest.mark.django_db
+def test_export_job_stale_running_is_failed(user, settings):
+    from datetime import timedelta
+    from django.utils.timezone import now
+
+    settings.EXPORT_JOB_TIMEOUT = 60
+    started = now() - timedelta(seconds=120)
+    stale, busy = (
+        ExportJob.objects.create(
+            user=user,
+            resource="helpers.resources.ProductResource",
+            format="csv",
+            status="running",
+            started_at=timestamp,
+        )
+        for timestamp in (started, now())
+    )
+
+    assert ExportJob.objects.claim() is None
+    stale.refresh_from_db()
+    busy.refresh_from_db()
+
+    assert stale.status == "failed" and "Timed out" in stale.error
+    assert busy.status == "running"
+
+
+@pytest.mark.django_db
+def test_export_job_owner_only(client, user, django_user_model):
+    job = ExportJob.objects.create(
+        user=user, resource="helpers.resources.ProductResource", format="csv"
+    )
+    other = django_user_model.objects.create_user(username="other", password="x")
+    client.force_login(other)
+
+    assert client.get(job.get_absolute_url()).status_code == 404
+    assert client.get(job.get_download_url()).status_code == 404
+
+
+@pytest.mark.django_db
+def test_export_in_background_action(rf, admin_user, user):
+    from django.contrib.admin import AdminSite
+    from django.contrib.messages.storage.fallback import FallbackStorage
+
+    from products.admin import OrderAdmin
+    from products.actions import export_in_background_action
+    from products.forms import ExportActionForm
+    from products.models import OrderProxy
+
+    obj = Product.objects.create(user=user, product_name="Liquid Soap")
+    order = Order.objects.create(user=user, product=obj, number_of_items=2)
+    model_admin = OrderAdmin(OrderProxy, AdminSite())
+
+    # the action bar turns down an unknown format before the action runs
+    form = ExportActionForm({"action": "export", "format": "nope"})
+    form.fields["action"].choices = [("export", "Export")]
+    assert not form.is_valid() and "format" in form.errors
+
+    request = rf.post("/", {"format": "json"})
+    request.user, request.session = admin_user, {}
+    request._messages = FallbackStorage(request)
+    export_in_background_action(model_admin, request, Order.objects.all())
+    job = ExportJob.objects.get()
+
+    assert job.format == "json" and job.filters == {"pk__in": [str(order.pk)]}
@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from django.urls import reverse
+
+from helpers.broker import RedisBroker, get_broker
+from products.events import publish_order_status
+from products.models import Order
+from products.order_utils import AddOrder
+
+
+def read_event(chunk: bytes) -> dict:
+    event, data = chunk.decode().strip().split("\n")
+    assert event == "event: status"
+    return json.loads(data.removeprefix("data: "))
+
+
+async def disconnect(stream) -> None:
+    """The ASGI handler cancels the response task when the client leaves"""
+    task = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+def test_order_events_stream(user, products, django_capture_on_commit_callbacks):
+
+    obj = products.create(product_name="Liquid Soap", quantity=5, price=10, user=user)
+    order = AddOrder(product_instance=obj).create(user, {"number_of_items": 1})
+    channel = "orders:%s" % user.pk
+
+    @sync_to_async
+    def committed(change) -> None:
+        with django_capture_on_commit_callbacks(execute=True):
+            change()
+
+    async def run() -> list[dict]:
+        client = AsyncClient()
+        assert (await client.get(reverse("order_events"))).status_code == 302
+
+        await client.aforce_login(user)
+        response = await client.get(reverse("order_events"))
+        assert response["Content-Type"] == "text/event-stream"
+
+        stream = aiter(response.streaming_content)
+        assert await anext(stream) == b"retry: 5000\n\n"
+        assert get_broker().subscribers(channel) == 1
+
+        await committed(lambda: Order.objects.get(pk=order.pk).cancel())
+        # the admin actions, orders that don't move aren't published
+        await committed(lambda: Order.objects.all().update_status("pending"))
+        await committed(lambda: Order.objects.all().update_status("pending"))
+
+        events = [read_event(await anext(stream)) for _ in range(2)]
+        await disconnect(stream)
+        assert get_broker().subscribers(channel) == 0
+        return events
+
+    first, second = async_to_sync(run)()
+    assert (first["order"], first["status"]) == (str(order.pk), "cancelled")
+    assert (second["order"], second["status"]) == (str(order.pk), "pending")
+
+
+def test_order_events_keepalive(user, settings, client):
+
+    settings.SSE_KEEPALIVE = 0.01
+
+    async def run() -> bytes:
+        client = AsyncClient()
+        await client.aforce_login(user)
+        stream = aiter((await client.get(reverse("order_events"))).streaming_content)
+        await anext(stream)
+        try:
+            return await anext(stream)
+        finally:
+            await disconnect(stream)
+
+    assert async_to_sync(run)() == b": keepalive\n\n"
+
+    # a stream would hold a WSGI worker for good
+    client.force_login(user)
+    assert client.get(reverse("order_events")).status_code == 501
+
+
+def test_order_events_pipelined(
+    settings, monkeypatch, django_capture_on_commit_callbacks
+):
+
+    settings.REDIS_URL = "redis://localhost:6379/0"
+    sent = []
+
+    class Pipeline:
+        def publish(self, channel, data):
+            sent.append((channel, json.loads(data)["order"]))
+
+        def execute(self):
+            sent.append("execute")
+
+    monkeypatch.setattr(RedisBroker, "publish", None)
+    monkeypatch.setattr(get_broker().client, "pipeline", lambda transaction: Pipeline())
+    with django_capture_on_commit_callbacks(execute=True):
+        publish_order_status([(1, 10), (2, 20), (1, 11)], "delivered")
+
+    assert sent == [
+        ("orders:1", "10"),
+        ("orders:2", "20"),
+        ("orders:1", "11"),
+        "execute",
+    ]
@@ -0,0 +1,103 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from products.models import Order, OrderStatusChange, UserOrderStats
+from products.order_utils import AddOrder
+
+
+def test_order_transitions(user, products) -> None:
+
+    obj = products.create(product_name="Liquid Soap", quantity=50, price=10, user=user)
+    orders = [
+        AddOrder(product_instance=obj).create(user, {"number_of_items": 1})
+        for _ in range(5)
+    ]
+    assert orders[0].cancel(user=user) is True
+    assert orders[0].cancel(user=user) is False
+    assert orders[0].status == "cancelled" and orders[0].inactive_at is not None
+    assert products.get(pk=obj.pk).quantity == 46
+    Order.objects.filter(pk=orders[1].pk).update_status("delivered")
+
+    with CaptureQueriesContext(connection) as queries:
+        result = Order.objects.all().update_status("in_transit", user=user)
+    writes = [
+        q["sql"].split(" ", 3)[:3]
+        for q in queries
+        if q["sql"][:6] in ("UPDATE", "INSERT")
+    ]
+    assert writes == [
+        ["UPDATE", '"products_order"', "SET"],
+        ["INSERT", "INTO", '"products_orderstatuschange"'],
+    ]
+    assert result.moved == {"pending": 3}
+    assert result.skipped == {"cancelled": 1, "delivered": 1}
+    assert (
+        str(result) == "3 moved to In Transit, 2 skipped (cancelled: 1, delivered: 1)"
+    )
+
+    changes = OrderStatusChange.objects.filter(to_status="in_transit")
+    assert changes.count() == 3
+    assert {c.changed_by for c in changes} == {user}
+    assert (
+        OrderStatusChange.objects.filter(order=orders[0]).get().to_status == "cancelled"
+    )
+
+    # reopened, counted again
+    result = Order.objects.all().update_status("pending")
+    assert (result.moved, result.skipped) == (
+        {"cancelled": 1, "in_transit": 3},
+        {"delivered": 1},
+    )
+    assert Order.objects.get(pk=orders[0].pk).inactive_at is None
+    assert products.get(pk=obj.pk).quantity == 45
+    assert UserOrderStats.objects.get(user=user).order_count == 5
+
+
+def test_cancel_restocks_per_product(user, products) -> None:
+
+    soap = products.create(product_name="Liquid Soap", quantity=10, price=10, user=user)
+    salt = products.create(product_name="Salt", quantity=10, price=5, user=user)
+    for obj, n in ((soap, 2), (soap, 3), (salt, 4)):
+        AddOrder(product_instance=obj).create(user, {"number_of_items": n})
+
+    def stock() -> tuple[int, int]:
+        return tuple(products.get(pk=obj.pk).quantity for obj in (soap, salt))
+
+    assert stock() == (5, 6)
+
+    with CaptureQueriesContext(connection) as queries:
+        result = Order.objects.all().update_status("cancelled")
+    restocks = [q for q in queries if q["sql"].startswith('UPDATE "products_product"')]
+    assert result.moved == {"pending": 3}
+    assert len(restocks) == 2
+    assert stock() == (10, 10)
+    assert UserOrderStats.objects.get(user=user).order_count == 0
+
+    # reopening takes the stock again, all of a product's orders or none
+    products.filter(pk=soap.pk).update(quantity=4)
+    result = Order.objects.all().update_status("pending")
+    assert (result.moved, result.skipped) == ({"cancelled": 1}, {"cancelled": 2})
+    assert stock() == (4, 6)
+    assert Order.objects.filter(product=soap, status="cancelled").count() == 2
+    assert UserOrderStats.objects.get(user=user).item_count == 4
+
+
+def test_user_cancels_order(client, user, products) -> None:
+    from django.urls import reverse
+
+    obj = products.create(product_name="Liquid Soap", quantity=5, price=10, user=user)
+    order = AddOrder(product_instance=obj).create(user, {"number_of_items": 1})
+    url = reverse("order_user_detail", kwargs={"order_id": order.pk})
+    client.force_login(user)
+
+    response = client.post(url, HTTP_HX_REQUEST="true")
+    assert response.status_code == 200
+    assert "can no longer be cancelled" not in response.content.decode()
+    change = OrderStatusChange.objects.get(order=order)
+    assert (change.to_status, change.changed_by) == ("cancelled", user)
+
+    Order.objects.filter(pk=order.pk).update_status("pending")
+    Order.objects.filter(pk=order.pk).update_status("delivered")
+    response = client.post(url, HTTP_HX_REQUEST="true")
+    assert "This order can no longer be cancelled." in response.content.decode()
+    assert Order.objects.get(pk=order.pk).status == "delivered"
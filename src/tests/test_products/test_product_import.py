@@ -0,0 +1,112 @@
+import pytest
+from django.core.management import call_command
+
+from products.models import Product
+from helpers.resources import ProductResource
+
+
+ROWS = [
+    {"product_name": "Liquid Soap", "price": "1500", "quantity": "3", "active": "1"},
+    {"product_name": "Gucci Bag", "price": "90000.5", "quantity": "", "active": "no"},
+    {"product_name": "", "price": "10"},
+    {"product_name": "Air Freshener", "price": "cheap"},
+]
+
+
+@pytest.mark.django_db
+def test_bulk_import(user):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as ctx:
+        result = ProductResource.bulk_import(ROWS, user=user)
+    with CaptureQueriesContext(connection) as many:
+        ProductResource.bulk_import(
+            [{"product_name": "Product %s" % i} for i in range(500)], user=user
+        )
+
+    soap, bag = Product.objects.filter(price__gt=1000).order_by("-product_name")
+
+    # a few INSERT batches, no query per row
+    assert len(many.captured_queries) < len(ctx.captured_queries) + 10
+
+    assert (result.total, result.created, len(result.errors)) == (4, 2, 2)
+    # the header is line 1
+    assert [error.line for error in result.errors] == [4, 5]
+    assert "product_name" in result.errors[0].errors
+    assert (soap.price, soap.quantity, soap.user) == (1500.0, 3, user)
+    assert soap.product_slug == "liquid-soap"
+    assert not bag.active and bag.quantity == 1
+
+
+@pytest.mark.django_db
+def test_bulk_import_existing_rows(user):
+    ProductResource.bulk_import(ROWS[:2], user=user)
+
+    # every column is a key by default, the same rows are skipped
+    result = ProductResource.bulk_import(ROWS[:2], user=user)
+    assert (result.created, result.skipped) == (0, 2)
+
+    rows = [{**ROWS[0], "price": "1200"}, {**ROWS[0], "price": "1300"}]
+    result = ProductResource.bulk_import(
+        rows, user=user, key_fields=["product_name"], chunk_size=1
+    )
+
+    assert (result.created, result.updated) == (0, 2)
+    assert Product.objects.get(product_name="Liquid Soap").price == 1300.0
+    assert Product.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_import_update_before_sqlite_333(user, monkeypatch):
+    from django.db import connection
+
+    ProductResource.bulk_import(ROWS[:1], user=user)
+    # UPDATE ... FROM is a syntax error there, bulk_update instead
+    monkeypatch.setattr(connection.Database, "sqlite_version_info", (3, 31, 1))
+    result = ProductResource.bulk_import(
+        [{**ROWS[0], "price": "1200"}], user=user, key_fields=["product_name"]
+    )
+
+    assert result.updated == 1
+    assert Product.objects.get().price == 1200.0
+
+
+@pytest.mark.django_db
+def test_bulk_import_dry_run(user):
+    result = ProductResource.bulk_import(ROWS, user=user, dry_run=True)
+
+    assert result.created == 2 and not Product.objects.exists()
+
+
+@pytest.mark.django_db
+def test_import_products_command(user, tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text(
+        "product_name,product_description,price,active,quantity\n"
+        "Liquid Soap,Lemon scented,1500,1,3\n"
+        "Gucci Bag,,90000,0,1\n"
+    )
+
+    # left out of the index, only the imported rows are indexed
+    Product.objects.create(user=user, product_name="Old Soap")
+    Product.objects.update(product_description="lemon")
+
+    call_command("import_products", str(path), user=user.username)
+
+    assert Product.objects.count() == 3
+    assert Product.objects.search("lemon").get().product_name == "Liquid Soap"
+
+
+@pytest.mark.django_db
+def test_bulk_import_workers(user, tmp_path):
+    rows = [{"product_name": "Product %s" % i, "price": i or "free"} for i in range(50)]
+    report = tmp_path / "errors.csv"
+
+    result = ProductResource.bulk_import(rows, user=user, chunk_size=7, workers=2)
+    with open(report, "w", newline="") as f:
+        result.write_error_report(f)
+
+    assert (result.total, result.created) == (50, 49)
+    assert Product.objects.filter(product_name="Product 49", price=49).exists()
+    assert report.read_text().splitlines()[1].startswith("2,price,")
@@ -14,3 +14,87 @@ class TestProductModel:
 
         assert isinstance(index_names, (list, tuple))
         assert "product_name_index" in index_names
+
+    def test_search_vector_refresh_is_noop_outside_postgres(self) -> None:
+
+        obj = Product.objects.create(product_name="Liquid Soap")
+
+        assert not Product.objects.search_vector_supported()
+        assert Product.objects.update_search_vector() == 0
+        obj.refresh_from_db()
+        assert obj.search_vector is None
+
+    def test_reserve(self) -> None:
+
+        obj = Product.objects.create(product_name="Liquid Soap", quantity=3)
+
+        assert obj.reserve(2) and obj.quantity == 1
+        assert not Product.objects.reserve(obj.pk, 2)
+        obj.refresh_from_db()
+        assert obj.quantity == 1 and not obj.out_of_stock
+
+    def test_add_order_does_not_oversell(self, user) -> None:
+        from products.models import Order
+        from products.order_utils import AddOrder, OutOfStock
+
+        obj = Product.objects.create(product_name="Liquid Soap", quantity=1)
+        # a concurrent checkout sold the last one, `obj` still says 1
+        Product.objects.reserve(obj.pk, 1)
+
+        with pytest.raises(OutOfStock):
+            AddOrder(product_instance=obj).create(user, {"number_of_items": 1})
+        obj.refresh_from_db()
+        assert obj.quantity == 0 and not Order.objects.exists()
+
+    def test_user_order_stats(self, user) -> None:
+        from products.models import Order, UserOrderStats
+        from products.order_utils import AddOrder
+
+        obj = Product.objects.create(product_name="Liquid Soap", quantity=5, price=10)
+        first = AddOrder(product_instance=obj).create(user, {"number_of_items": 2})
+        second = AddOrder(product_instance=obj).create(user, {"number_of_items": 1})
+        # later price changes don't touch placed orders
+        Product.objects.filter(pk=obj.pk).update(price=99)
+
+        def stats():
+            stats = UserOrderStats.objects.get(user=user)
+            return stats.order_count, stats.item_count, stats.total_spend
+
+        assert (first.unit_price, first.total_cost) == (10, 20)
+        assert stats() == (2, 3, 30)
+
+        Order.objects.get(pk=first.pk).cancel()
+        assert stats() == (1, 1, 10)
+
+        Order.objects.filter(pk=first.pk).update_status("pending")
+        assert stats() == (2, 3, 30)
+
+        Order.objects.filter(pk=second.pk).delete()
+        assert stats() == (1, 2, 20)
+
+        UserOrderStats.objects.all().delete()
+        UserOrderStats.objects.rebuild()
+        assert stats() == (1, 2, 20)
+
+    def test_user_order_stats_deferred(self, user) -> None:
+        from products.models import Order, UserOrderStats
+        from products.order_utils import AddOrder
+
+        obj = Product.objects.create(product_name="Liquid Soap", quantity=5, price=10)
+        order = AddOrder(product_instance=obj).create(user, {"number_of_items": 2})
+
+        def stats():
+            stats = UserOrderStats.objects.get(user=user)
+            return stats.order_count, stats.item_count, stats.total_spend
+
+        assert stats() == (1, 2, 20)
+        Order.objects.only("pk", "status").get(pk=order.pk).save()
+        assert stats() == (1, 2, 20)
+        deferred = Order.objects.only("pk", "manifest").get(pk=order.pk)
+        deferred.number_of_items = 3
+        deferred.save()
+        assert stats() == (1, 3, 30)
+        assert stats() == tuple(UserOrderStats.objects.compute(user.pk).values())
+
+        Order.objects.defer("status").get(pk=order.pk).delete()
+        assert stats() == (0, 0, 0)
@@ -0,0 +1,77 @@
+import pytest
+
+from products.models import Product
+from helpers.filters import qs_vector_search
+from helpers.search_index import (
+    InMemorySearchIndex,
+    SQLiteFTS5SearchIndex,
+    get_search_index,
+)
+
+
+@pytest.fixture
+def catalog(user):
+    return [
+        Product.objects.create(
+            user=user, product_name="Liquid Soap", product_description="soap soap"
+        ),
+        Product.objects.create(
+            user=user, product_name="Bar Soap", product_description="hand wash"
+        ),
+        Product.objects.create(
+            user=user, product_name="Air Freshener", product_description="lemon"
+        ),
+    ]
+
+
+@pytest.mark.django_db
+def test_default_search_index_is_fts5() -> None:
+
+    assert isinstance(get_search_index(Product), SQLiteFTS5SearchIndex)
+
+
+@pytest.mark.django_db
+def test_fts5_search_ranked(catalog) -> None:
+
+    liquid_soap, bar_soap, _ = catalog
+    qs = qs_vector_search(Product, "soap")
+
+    assert list(qs) == [liquid_soap, bar_soap]
+    assert list(Product.objects.search("fresh lem")) == [catalog[2]]
+
+
+@pytest.mark.django_db
+def test_fts5_search_follows_save_and_delete(catalog) -> None:
+
+    liquid_soap, bar_soap, air_freshener = catalog
+    air_freshener.product_name = "Soap Dispenser"
+    air_freshener.save()
+    liquid_soap.delete()
+
+    assert set(Product.objects.search("soap")) == {bar_soap, air_freshener}
+    assert not Product.objects.search("liquid").exists()
+
+
+@pytest.mark.django_db
+def test_in_memory_search_index(catalog) -> None:
+
+    liquid_soap, bar_soap, air_freshener = catalog
+    index = InMemorySearchIndex(Product)
+
+    assert [pk for pk, _ in index.search("soap")] == [liquid_soap.pk, bar_soap.pk]
+    assert len(index) == 3
+
+    index._remove(bar_soap.pk)
+    index._add(air_freshener.pk, ["Soap Dispenser"])
+
+    assert {pk for pk, _ in index.search("so")} == {liquid_soap.pk, air_freshener.pk}
+    assert index.search("freshener") == []
+
+
+@pytest.mark.django_db
+def test_search_index_backend_setting(settings, catalog) -> None:
+
+    settings.SEARCH_INDEX_BACKEND = "helpers.search_index.InMemorySearchIndex"
+
+    assert isinstance(get_search_index(Product), InMemorySearchIndex)
+    assert list(Product.objects.search("hand")) == [catalog[1]]
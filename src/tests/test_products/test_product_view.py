@@ -38,3 +38,138 @@ def test_product_delete(client, user):
 
     assert response.status_code == 200
     assert Product.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_product_list_cursor_pagination(client, user):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    ProductFactory.create_batch(15, user=user)
+    headers = {"HX-Request": "true"}
+
+    response = client.get(reverse("products"), headers=headers)
+    page = response.context["page_obj"]
+
+    assert response.status_code == 200
+    assert len(page) == 10 and page.has_next()
+    assert "cursor=%s" % page.next_cursor in response.text
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(
+            reverse("products"), {"cursor": page.next_cursor}, headers=headers
+        )
+    next_page = response.context["page_obj"]
+
+    assert len(next_page) == 5 and not next_page.has_next()
+    assert not {obj.pk for obj in page} & {obj.pk for obj in next_page}
+    assert not any("COUNT(" in q["sql"] for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_product_list_invalid_cursor(client):
+    response = client.get(reverse("products"), {"cursor": "not-a-cursor"})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_product_search_view(client, user):
+    Product.objects.create(user=user, product_name="Liquid Soap")
+    Product.objects.create(user=user, product_name="Air Freshener")
+
+    response = client.get(
+        reverse("product_search"), {"search": "soap"}, headers={"HX-Request": "true"}
+    )
+    names = [obj.product_name for obj in response.context["object_list"]]
+
+    assert response.status_code == 200
+    assert names == ["Liquid Soap"]
+
+
+@pytest.mark.django_db
+def test_product_list_card_cache(client, user):
+    from django.core.cache import cache
+
+    cache.clear()
+    obj = Product.objects.create(user=user, product_name="Liquid Soap")
+    headers = {"HX-Request": "true"}
+
+    assert "Liquid Soap" in client.get(reverse("products"), headers=headers).text
+
+    # bypasses save(), updated_at is unchanged so the cached card is served
+    Product.objects.filter(pk=obj.pk).update(product_name="Bar Soap")
+    assert "Liquid Soap" in client.get(reverse("products"), headers=headers).text
+
+    obj.product_name = "Bar Soap"
+    obj.save()
+    response = client.get(reverse("products"), headers=headers)
+
+    assert "Bar Soap" in response.text and "Liquid Soap" not in response.text
+
+
+@pytest.mark.django_db
+def test_product_detail_cache(client, user, django_capture_on_commit_callbacks):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from products.cache import DETAIL_KEY, get_detail_version
+    from products.models import Comment, Reply
+
+    cache.clear()
+    obj = Product.objects.create(user=user, product_name="Liquid Soap")
+    comment = Comment.objects.create(user=user, content_object=obj, message="Nice")
+    Reply.objects.create(user=user, comment=comment, message="Thanks")
+
+    assert "Thanks" in client.get(obj.get_absolute_url()).text
+    # field values and author names, no User rows
+    entry = cache.get(DETAIL_KEY % (obj.pk, get_detail_version(obj.pk)))
+    assert entry["comments"][0]["user"] == {"pk": user.pk, "username": user.username}
+    assert user.password not in repr(entry)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(obj.get_absolute_url())
+
+    assert "Nice" in response.text and "Thanks" in response.text
+    assert not any("comments" in q["sql"] for q in ctx.captured_queries)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Reply.objects.create(user=user, comment=comment, message="Welcome")
+
+    assert "Welcome" in client.get(obj.get_absolute_url()).text
+
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.delete()
+
+    assert "Nice" not in client.get(obj.get_absolute_url()).text
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("format", ["csv", "tsv", "jsonl"])
+def test_order_export_streaming(client, user, format):
+    import json
+    from products.models import Order
+
+    obj = Product.objects.create(user=user, product_name="Liquid Soap")
+    Order.objects.create(user=user, product=obj, number_of_items=2)
+    client.force_login(user)
+
+    response = client.get(reverse("export_order"), {"format": format})
+    lines = b"".join(response.streaming_content).decode().splitlines()
+
+    assert response.status_code == 200 and response.streaming
+    assert response["Content-Disposition"].endswith('.%s"' % format)
+    if format == "jsonl":
+        assert len(lines) == 1
+        assert json.loads(lines[0])["product"] == "Liquid Soap"
+    else:
+        assert len(lines) == 2 and "Liquid Soap" in lines[1]
+
+
+@pytest.mark.django_db
+def test_order_export_xlsx_is_not_streamed(client, user):
+    client.force_login(user)
+
+    response = client.get(reverse("export_order"), {"format": "xlsx"})
+
+    assert response.status_code == 200 and not response.streaming